@@ -0,0 +1,18 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.exceptions import ValidationError
+
+User = get_user_model()
+
+
+class CachedModelBackend(ModelBackend):
+    # 로그인/권한 확인은 ModelBackend와 같고, 요청마다 세션의 user id로 User를 읽는 get_user만
+    # 캐시된 스냅샷(User.get_cached)을 사용합니다. User.save()와 queryset.update()/delete() 시 스냅샷이 지워집니다.
+
+    def get_user(self, user_id):
+        try:
+            pk = User._meta.pk.to_python(user_id)
+        except ValidationError:
+            return None
+        user = User.get_cached(pk)
+        return user if user is not None and self.user_can_authenticate(user) else None
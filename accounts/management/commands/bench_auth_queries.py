@@ -0,0 +1,92 @@
+import time
+from contextlib import ExitStack
+
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand
+from django.db import connections, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+# 로그인한 사용자의 요청당 쿼리 수를 세션/사용자 로딩 방식별로 비교합니다.
+# - db : DB 세션 + ModelBackend (이전 방식)
+# - cached : 현재 설정 (cached_db 세션 + CachedModelBackend)
+# 임시 사용자를 만들어 측정하고, 측정이 끝나면 트랜잭션을 롤백합니다.
+
+PROFILES = {
+    "db": {
+        "SESSION_ENGINE": "django.contrib.sessions.backends.db",
+        "AUTHENTICATION_BACKENDS": ["django.contrib.auth.backends.ModelBackend"],
+    },
+    "cached": {},
+}
+
+DEFAULT_URL_NAMES = [
+    "mall:cart_detail",
+    "mall:product_list",
+    "accounts:profile",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare per-request queries/latency of DB vs cached session and user loading"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--url-name",
+            action="append",
+            help="측정할 URL 이름 (복수 지정 가능)",
+        )
+        parser.add_argument("--requests", type=int, default=50)
+
+    def measure(self, url_list, request_count):
+        client = Client()
+        user = get_user_model().objects.create_user(
+            username=f"bench-auth-{time.time_ns()}", password="bench-password"
+        )
+        client.force_login(user)
+        # 첫 요청은 캐시를 채우므로 측정에서 제외합니다.
+        for url in url_list:
+            client.get(url)
+
+        result = {}
+        for url in url_list:
+            with ExitStack() as stack:
+                captures = [
+                    stack.enter_context(CaptureQueriesContext(conn))
+                    for conn in connections.all()
+                ]
+                started = time.perf_counter()
+                for _ in range(request_count):
+                    response = client.get(url)
+                    assert response.status_code == 200, (url, response.status_code)
+                elapsed = time.perf_counter() - started
+            query_count = sum(len(capture.captured_queries) for capture in captures)
+            result[url] = (query_count / request_count, elapsed / request_count * 1000)
+        client.logout()
+        user.delete()
+        return result
+
+    def handle(self, *args, **options):
+        url_list = [reverse(name) for name in options["url_name"] or DEFAULT_URL_NAMES]
+
+        results = {}
+        for profile, overrides in PROFILES.items():
+            with transaction.atomic():
+                with override_settings(**overrides):
+                    results[profile] = self.measure(url_list, options["requests"])
+                transaction.set_rollback(True)
+
+        self.stdout.write(
+            f"{'url':<24}{'db queries':>12}{'cached queries':>16}{'saved':>8}"
+            f"{'db ms':>10}{'cached ms':>12}"
+        )
+        for url in url_list:
+            db_queries, db_ms = results["db"][url]
+            cached_queries, cached_ms = results["cached"][url]
+            self.stdout.write(
+                f"{url:<24}{db_queries:>12.1f}{cached_queries:>16.1f}"
+                f"{db_queries - cached_queries:>8.1f}{db_ms:>10.2f}{cached_ms:>12.2f}"
+            )
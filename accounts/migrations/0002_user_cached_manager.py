@@ -0,0 +1,20 @@
+# Generated by Django 4.2.9 on 2026-10-19 19:55
+
+import accounts.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name="user",
+            managers=[
+                ("objects", accounts.models.CachedUserManager()),
+            ],
+        ),
+    ]
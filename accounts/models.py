@@ -1,7 +1,111 @@
-from django.contrib.auth.models import AbstractUser
-from django.db import models
+import hashlib
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.contrib.auth.models import AbstractUser, UserManager
+from django.core.cache import cache
+from django.db import models, transaction
+
+
+class UserQuerySet(models.QuerySet):
+    # queryset.update()/delete()/bulk_update()는 save()를 거치지 않으므로 대상 사용자의 스냅샷을 직접 지웁니다.
+    # (예: 관리자 화면에서 여러 사용자를 한 번에 비활성화)
+
+    def update(self, **kwargs):
+        pk_list = list(self.values_list("pk", flat=True))
+        count = super().update(**kwargs)
+        User.invalidate_cache_many(pk_list)
+        return count
+
+    def delete(self):
+        pk_list = list(self.values_list("pk", flat=True))
+        result = super().delete()
+        User.invalidate_cache_many(pk_list)
+        return result
+
+    def bulk_update(self, objs, fields, batch_size=None):
+        objs = list(objs)
+        count = super().bulk_update(objs, fields, batch_size=batch_size)
+        User.invalidate_cache_many(obj.pk for obj in objs)
+        return count
+
+
+# 동적으로 만든 매니저는 마이그레이션에서 import 할 수 있도록 클래스로 정의합니다.
+class CachedUserManager(UserManager.from_queryset(UserQuerySet)):
+    pass
 
 
 # Create your models here.
 class User(AbstractUser):
-    pass
+    # 로그인한 요청마다 User 조회 쿼리가 나가지 않도록 컬럼 값만 캐시에 보관합니다. (accounts/backends.py)
+    # password 컬럼은 공유 캐시에 두지 않고, 세션 인증 해시 검증에 필요한 HMAC 값(get_session_auth_hash)만 보관합니다.
+    # 캐시에서 만든 인스턴스의 password는 지연 로딩(deferred)되므로, 저장해도 password 컬럼은 덮어쓰지 않습니다.
+
+    objects = CachedUserManager()
+
+    @classmethod
+    def snapshot_fields(cls) -> list:
+        return [
+            field.attname
+            for field in cls._meta.concrete_fields
+            if field.attname != "password"
+        ]
+
+    @classmethod
+    def cache_key(cls, pk) -> str:
+        # 컬럼이 추가/삭제되면 키가 바뀌어서 이전 형식의 스냅샷을 읽지 않습니다.
+        version = hashlib.md5(",".join(cls.snapshot_fields()).encode()).hexdigest()[:8]
+        return f"accounts:user:{version}:{pk}"
+
+    @classmethod
+    def get_cached(cls, pk) -> Optional["User"]:
+        key = cls.cache_key(pk)
+        values = cache.get(key)
+        if values is None:
+            try:
+                user = cls.objects.get(pk=pk)
+            except cls.DoesNotExist:
+                return None
+            values = [getattr(user, attname) for attname in cls.snapshot_fields()]
+            cache.set(
+                key,
+                [user.get_session_auth_hash(), *values],
+                settings.USER_CACHE_TIMEOUT,
+            )
+            return user
+        session_auth_hash, *values = values
+        # from_db로 만들어야 DB에서 읽은 인스턴스와 같은 상태(_state.adding=False)가 됩니다.
+        user = cls.from_db("default", cls.snapshot_fields(), values)
+        user._cached_session_auth_hash = session_auth_hash
+        return user
+
+    @classmethod
+    def invalidate_cache_many(cls, pk_list: Iterable) -> None:
+        keys = [cls.cache_key(pk) for pk in pk_list]
+        if not keys:
+            return
+        cache.delete_many(keys)
+        # 커밋 전에 다른 요청이 이전 값으로 다시 캐시를 채울 수 있으므로 커밋 후에도 한 번 더 지웁니다.
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+    def invalidate_cache(self) -> None:
+        self.invalidate_cache_many([self.pk])
+
+    def _get_session_auth_hash(self, secret=None):
+        # 캐시에서 만든 인스턴스는 password를 읽지 않고 캐시된 해시를 씁니다. (이전 SECRET_KEY 검증은 DB에서 읽습니다.)
+        cached = getattr(self, "_cached_session_auth_hash", None)
+        if (
+            secret is None
+            and cached is not None
+            and "password" in self.get_deferred_fields()
+        ):
+            return cached
+        return super()._get_session_auth_hash(secret=secret)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.invalidate_cache()
+
+    def delete(self, *args, **kwargs):
+        self.invalidate_cache()
+        return super().delete(*args, **kwargs)
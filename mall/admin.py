@@ -1,5 +1,50 @@
 from django.contrib import admin
-from .models import Category, Product
+from django.contrib.admin import helpers
+from django.db.models import F, Sum
+from django.shortcuts import get_object_or_404, redirect
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils import timezone
+from django.utils.html import format_html
+
+from . import bulk_actions, exports, tasks
+from .cancellation import create_job
+from .changelist import EstimatedCountPaginator, KeysetChangeList
+from .forms import PriceChangeForm
+from .models import (
+    ArchivedOrder,
+    ArchivedOrderedProduct,
+    BulkActionJob,
+    CancellationJob,
+    Category,
+    DailyCategorySales,
+    DailyProductSales,
+    Order,
+    OrderPayment,
+    Product,
+    Task,
+)
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    # 행이 많은 테이블의 목록 화면 (mall/changelist.py)
+    # 전체 건수를 세지 않고, 깊은 페이지는 keyset 이동을 합니다.
+    # date_hierarchy는 전체 테이블에서 DISTINCT 날짜를 구하므로 쓰지 않고 날짜 list_filter(범위 조건)를 씁니다.
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+    def start_bulk_action(self, request, queryset, action_name, params=None):
+        # 관리자 요청에서는 작업만 만들고 변경은 작업 큐에서 청크 단위로 처리합니다. (mall/bulk_actions.py, mall/tasks.py)
+        job = bulk_actions.create_job(action_name, queryset, params, user=request.user)
+        tasks.run_bulk_action_job.enqueue(job_id=job.pk)
+        self.message_user(
+            request,
+            f"대량 작업 {job.pk}번을 시작했습니다. ({job.total_count}건)",
+        )
+        return redirect("admin:mall_bulkactionjob_change", job.pk)
 
 
 @admin.register(Category)
@@ -9,28 +54,293 @@ class CategoryAdmin(admin.ModelAdmin):
 
 
 @admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
+class ProductAdmin(LargeTableAdmin):
     search_fields = ["name"]  # 검색바, 다수로 지정하면 쿼리 셀렉문에 or로 들어감
     list_display = ["category", "name", "price", "status"]
     list_display_links = ["name"]
+    list_select_related = ["category"]  # 행마다 분류를 조회하지 않도록 JOIN
     list_filter = ["category", "status", "created_at", "updated_at"]
-    date_hierarchy = "updated_at"
-    actions = ["make_active"]
+    actions = ["make_active", "make_sold_out", "make_obsolete", "change_price"]
 
+    # 수십만 건을 선택해도 요청이 오래 걸리거나 테이블을 오래 잠그지 않도록 백그라운드 작업으로 처리합니다.
     @admin.display(
         description=f"지정 상품을 {Product.Status.ACTIVE.label} 상태로 변경합니다."
     )
     def make_active(self, request, queryset):
-        count = queryset.update(  # count는 적용된 행의 개수
-            status=Product.Status.ACTIVE
-        )  # 이렇게 하면 뭉탱이로 한 번에 날아감
+        return self.start_bulk_action(request, queryset, "product.active")
+
+    @admin.display(
+        description=f"지정 상품을 {Product.Status.SOLD_OUT.label} 상태로 변경합니다."
+    )
+    def make_sold_out(self, request, queryset):
+        return self.start_bulk_action(request, queryset, "product.sold_out")
+
+    @admin.display(
+        description=f"지정 상품을 {Product.Status.OBSOLETE.label} 상태로 변경합니다."
+    )
+    def make_obsolete(self, request, queryset):
+        return self.start_bulk_action(request, queryset, "product.obsolete")
+
+    @admin.display(description="지정 상품의 가격을 일괄 변경합니다.")
+    def change_price(self, request, queryset):
+        # 변경 비율/금액을 입력받는 중간 화면을 보여주고, 입력이 오면(apply) 작업을 시작합니다.
+        form = PriceChangeForm(request.POST if "apply" in request.POST else None)
+        if form.is_valid():
+            return self.start_bulk_action(
+                request, queryset, "product.change_price", form.get_params()
+            )
+        return TemplateResponse(
+            request,
+            "admin/mall/product/change_price.html",
+            {
+                **self.admin_site.each_context(request),
+                "title": "가격 일괄 변경",
+                "opts": self.model._meta,
+                "form": form,
+                "action_checkbox_name": helpers.ACTION_CHECKBOX_NAME,
+                "selected_list": request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+                "select_across": request.POST.get("select_across", "0"),
+            },
+        )
+
+
+@admin.register(Order)
+class OrderAdmin(LargeTableAdmin):
+    list_display = ["pk", "uid", "user", "total_amount", "status", "created_at"]
+    list_select_related = ["user"]
+    list_filter = ["status", "created_at"]
+    raw_id_fields = ["user"]
+    actions = ["export_csv", "export_jsonl_gzip"]
+
+    # 선택한 주문(전체 선택 시 필터된 전체 주문)을 배치 단위로 읽어 바로 응답으로 흘려보냅니다.
+    @admin.display(description="선택한 주문을 CSV로 내보냅니다.")
+    def export_csv(self, request, queryset):
+        return exports.streaming_response(queryset, "csv")
+
+    @admin.display(description="선택한 주문을 JSONL(gzip)로 내보냅니다.")
+    def export_jsonl_gzip(self, request, queryset):
+        return exports.streaming_response(queryset, "jsonl", use_gzip=True)
+
+
+class ArchivedOrderedProductInline(admin.TabularInline):
+    model = ArchivedOrderedProduct
+    fields = ["product", "name", "price", "quantity"]
+    readonly_fields = fields
+    raw_id_fields = ["product"]
+    extra = 0
+    can_delete = False
+
+
+@admin.register(ArchivedOrder)
+class ArchivedOrderAdmin(LargeTableAdmin):
+    # 보관 주문은 옮긴 그대로 보존하므로 조회만 합니다. (mall/archive.py)
+    list_display = ["pk", "uid", "user", "total_amount", "status", "created_at"]
+    list_select_related = ["user"]
+    list_filter = ["status", "created_at"]
+    inlines = [ArchivedOrderedProductInline]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(OrderPayment)
+class OrderPaymentAdmin(LargeTableAdmin):
+    list_display = ["pk", "order", "name", "desired_amount", "pay_status", "is_paid_ok"]
+    list_select_related = ["order"]
+    list_filter = ["pay_status", "is_paid_ok", "paid_at"]
+    raw_id_fields = ["order"]
+    actions = ["cancel_payments"]
+
+    @admin.display(description="선택한 결제를 포트원에서 취소(환불)합니다.")
+    def cancel_payments(self, request, queryset):
+        job = create_job(queryset.filter(is_paid_ok=True), reason="관리자 일괄취소")
+        # 관리자 요청이 수백 건의 포트원 호출을 기다리지 않도록 작업 큐(run_tasks --queue jobs)에서 처리합니다.
+        tasks.run_cancellation_job.enqueue(job_id=job.pk)
         self.message_user(
             request,
-            f"{count}개의 상품을 {Product.Status.ACTIVE.label} 상태로 변경했습니다. ",
-        )  # messages 더 편학게 쓸 수 있게 해주는거
-
-        """
-        for product in queryset:  # 이렇게 하면 쿼리셋이 하나하나 날라가서 느림
-            product.status = Product.Status.ACTIVE
-            product.save()
-        """
+            f"결제취소 작업 {job.pk}번을 시작했습니다. ({job.total_count}건) "
+            f"진행상황은 결제취소 작업 메뉴에서 확인할 수 있습니다.",
+        )
+
+
+@admin.register(BulkActionJob)
+class BulkActionJobAdmin(admin.ModelAdmin):
+    # 작업 화면이 진행상황 페이지입니다. 진행중에는 2초마다 새로고침되고, 중단 버튼으로 작업을 멈출 수 있습니다.
+    list_display = [
+        "pk",
+        "action_label",
+        "status",
+        "progress",
+        "throughput",
+        "created_by",
+        "created_at",
+    ]
+    list_filter = ["status", "action"]
+    list_select_related = ["created_by"]
+    fields = [
+        "action_label",
+        "params",
+        "status",
+        "progress",
+        "throughput",
+        "remaining",
+        "total_count",
+        "processed_count",
+        "changed_count",
+        "last_pk",
+        "cancel_requested",
+        "error",
+        "created_by",
+        "created_at",
+        "started_at",
+        "finished_at",
+    ]
+    readonly_fields = fields
+    change_form_template = "admin/mall/bulkactionjob/change_form.html"
+
+    def get_queryset(self, request):
+        # 대상 pk 구간은 실행기에서만 읽습니다. (새로고침마다 불러오지 않도록)
+        return super().get_queryset(request).defer("target_ranges")
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.display(description="작업")
+    def action_label(self, obj):
+        action = bulk_actions.ACTIONS.get(obj.action)
+        return action.label if action else obj.action
+
+    @admin.display(description="진행률")
+    def progress(self, obj):
+        percent = obj.processed_count * 100 // obj.total_count if obj.total_count else 0
+        return format_html(
+            '<progress value="{}" max="{}"></progress> {}% ({}/{})',
+            obj.processed_count,
+            obj.total_count or 1,
+            percent,
+            obj.processed_count,
+            obj.total_count,
+        )
+
+    @admin.display(description="처리 속도")
+    def throughput(self, obj):
+        throughput = bulk_actions.get_throughput(obj)
+        return f"{throughput:,.0f}건/초" if throughput else "-"
+
+    @admin.display(description="남은 시간")
+    def remaining(self, obj):
+        seconds = bulk_actions.get_remaining_seconds(obj)
+        return f"약 {seconds:,.0f}초" if seconds is not None else "-"
+
+    def get_urls(self):
+        return [
+            path(
+                "<path:object_id>/cancel/",
+                self.admin_site.admin_view(self.cancel_view),
+                name="mall_bulkactionjob_cancel",
+            ),
+        ] + super().get_urls()
+
+    def cancel_view(self, request, object_id):
+        job = get_object_or_404(self.get_queryset(request), pk=object_id)
+        if request.method == "POST" and self.has_change_permission(request, job):
+            # 실행기는 청크 사이마다 중단 요청을 확인합니다. 아직 시작 전이면 바로 중단 처리합니다.
+            BulkActionJob.objects.filter(pk=job.pk).update(cancel_requested=True)
+            BulkActionJob.objects.filter(
+                pk=job.pk, status=BulkActionJob.Status.PENDING
+            ).update(
+                status=BulkActionJob.Status.CANCELED,
+                finished_at=timezone.now(),
+                updated_at=timezone.now(),
+            )
+            self.message_user(request, f"대량 작업 {job.pk}번 중단을 요청했습니다.")
+        return redirect(reverse("admin:mall_bulkactionjob_change", args=[job.pk]))
+
+
+@admin.register(Task)
+class TaskAdmin(LargeTableAdmin):
+    list_display = ["pk", "name", "queue", "priority", "status", "attempts", "run_at"]
+    list_filter = ["status", "queue", "name"]
+    readonly_fields = ["locked_by", "locked_at", "last_error", "created_at"]
+    actions = ["retry_tasks"]
+
+    @admin.display(description="선택한 작업을 다시 대기 상태로 돌립니다.")
+    def retry_tasks(self, request, queryset):
+        count = queryset.filter(status=Task.Status.FAILED).update(
+            status=Task.Status.QUEUED,
+            attempts=0,
+            run_at=timezone.now(),
+            locked_by="",
+            locked_at=None,
+        )
+        self.message_user(request, f"{count}개의 작업을 다시 대기 상태로 돌렸습니다.")
+
+
+@admin.register(CancellationJob)
+class CancellationJobAdmin(admin.ModelAdmin):
+    list_display = [
+        "pk",
+        "reason",
+        "status",
+        "total_count",
+        "canceled_count",
+        "failed_count",
+        "skipped_count",
+        "updated_at",
+    ]
+    readonly_fields = list_display
+
+
+class SalesRollupAdmin(admin.ModelAdmin):
+    # 매출 화면은 집계 테이블만 읽습니다. 집계는 주문 상태 변경 시 자동으로 갱신되므로 직접 수정하지 않습니다.
+    date_hierarchy = "date"
+    change_list_template = "admin/mall/sales_change_list.html"
+    summary_field = ""  # 기간 합계를 묶어 보여줄 기준 (분류명/상품명)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def changelist_view(self, request, extra_context=None):
+        response = super().changelist_view(request, extra_context)
+        cl = getattr(response, "context_data", {}).get("cl")
+        if cl is None:  # 필터 오류 등으로 리다이렉트된 경우
+            return response
+        qs = cl.queryset.order_by()
+        response.context_data["summary_total"] = qs.aggregate(
+            quantity=Sum("quantity"), revenue=Sum("revenue")
+        )
+        response.context_data["summary_list"] = (
+            qs.values(name=F(self.summary_field))
+            .annotate(quantity=Sum("quantity"), revenue=Sum("revenue"))
+            .order_by("-revenue")[:20]
+        )
+        return response
+
+
+@admin.register(DailyCategorySales)
+class DailyCategorySalesAdmin(SalesRollupAdmin):
+    list_display = ["date", "category", "quantity", "revenue"]
+    list_filter = ["category"]
+    list_select_related = ["category"]
+    summary_field = "category__name"
+
+
+@admin.register(DailyProductSales)
+class DailyProductSalesAdmin(SalesRollupAdmin):
+    list_display = ["date", "product", "quantity", "revenue"]
+    list_filter = ["product__category"]
+    list_select_related = ["product"]
+    search_fields = ["product__name"]
+    summary_field = "product__name"
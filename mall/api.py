@@ -0,0 +1,272 @@
+import base64
+import logging
+from contextlib import ExitStack
+from functools import wraps
+from typing import List, Optional
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.decorators import api_view
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from mall import archive, local_cache, metrics
+from mall.middleware import QueryCounter
+from mall.models import ArchivedOrder, CartProduct, Order
+from mall.ratelimit import get_user_id, rate_limit
+from mall.serializers import (
+    CartBatchSerializer,
+    CartItemSerializer,
+    OrderSerializer,
+    parse_fields,
+)
+from mall.waiting_room import admit
+
+# 모바일 앱용 JSON API (/mall/api/)
+# 장바구니 조회/일괄 변경, 주문 생성(checkout), 주문내역을 HTML 화면과 같은 규칙으로 제공합니다.
+# 인증은 HTML 화면과 같은 세션 로그인을 씁니다. (POST 요청에는 CSRF 토큰이 필요합니다.)
+#
+# 응답 건수와 상관없이 쿼리 수가 일정하도록 조인(select_related)/prefetch/일괄 저장으로 읽고 씁니다.
+# 뷰마다 쿼리 예산(query_budget)을 두고, 넘으면 경고 로그와 api_query_budget_exceeded_total 메트릭을 남깁니다.
+# ?fields=id,status 로 필요한 필드만 받을 수 있고, 주문상품(products)을 빼면 주문상품 쿼리도 하지 않습니다.
+logger = logging.getLogger(__name__)
+
+
+def query_budget(limit: int):
+    # 인증/세션 조회를 포함한 요청 전체의 쿼리 수입니다. 응답 건수에 따라 늘어나면(N+1) 예산을 넘습니다.
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            query_counter = QueryCounter()
+            with ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(query_counter))
+                response = view_func(request, *args, **kwargs)
+            if query_counter.count > limit:
+                metrics.inc("api_query_budget_exceeded_total", view=view_func.__name__)
+                logger.warning(
+                    "API %s 쿼리 %d회 (예산 %d회)",
+                    view_func.__name__,
+                    query_counter.count,
+                    limit,
+                )
+            if settings.DEBUG:
+                response["X-Query-Count"] = str(query_counter.count)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def get_cart_item_list(user) -> List[CartProduct]:
+    cart_product_list = list(
+        CartProduct.objects.filter(user=user)
+        .select_related("product")
+        .order_by("product__name")
+    )
+    local_cache.attach_categories(
+        cart_product.product for cart_product in cart_product_list
+    )
+    return cart_product_list
+
+
+def cart_response(request, fields=None) -> Response:
+    cart_product_list = get_cart_item_list(request.user)
+    serializer = CartItemSerializer(cart_product_list, many=True, fields=fields)
+    return Response(
+        {
+            "results": serializer.data,
+            "total_amount": sum(
+                cart_product.amount for cart_product in cart_product_list
+            ),
+        }
+    )
+
+
+def apply_cart_operations(user, operations: List[dict]) -> None:
+    # 상품 확인은 프로세스 캐시(mall/local_cache.py)에서, 장바구니는 한 번에 읽고 종류별로 한 번씩 저장합니다.
+    product_ids = [operation["product_id"] for operation in operations]
+    products = local_cache.product_cache.get_many(
+        product_ids, local_cache.load_products
+    )
+    current_dict = {
+        cart_product.product_id: cart_product
+        for cart_product in CartProduct.objects.filter(
+            user=user, product_id__in=product_ids
+        )
+    }
+
+    errors = {}
+    create_list, update_list, delete_pk_list = [], [], []
+    for index, operation in enumerate(operations):
+        product_id = operation["product_id"]
+        current = current_dict.get(product_id)
+        quantity = operation["quantity"]
+        if operation["op"] == "add" and current is not None:
+            quantity += current.quantity
+
+        if quantity == 0:
+            if current is not None:
+                delete_pk_list.append(current.pk)
+            continue
+        product = products.get(product_id)
+        if product is None or not product.is_active:
+            errors[index] = {"product_id": ["판매중인 상품이 아닙니다."]}
+        elif current is None:
+            create_list.append(
+                CartProduct(user=user, product_id=product_id, quantity=quantity)
+            )
+        elif current.quantity != quantity:
+            current.quantity = quantity
+            update_list.append(current)
+    if errors:
+        raise ValidationError({"items": errors})
+
+    with transaction.atomic():
+        if delete_pk_list:
+            CartProduct.objects.filter(pk__in=delete_pk_list).delete()
+        if update_list:
+            CartProduct.objects.bulk_update(update_list, ["quantity"])
+        if create_list:
+            # 다른 요청이 먼저 담은 경우에는 수량을 덮어씁니다. (user, product 유일 제약)
+            # MySQL(ON DUPLICATE KEY UPDATE)은 충돌 대상 컬럼을 지정하지 않습니다.
+            features = connections[router.db_for_write(CartProduct)].features
+            CartProduct.objects.bulk_create(
+                create_list,
+                update_conflicts=True,
+                unique_fields=(
+                    ["user", "product"]
+                    if features.supports_update_conflicts_with_target
+                    else None
+                ),
+                update_fields=["quantity"],
+            )
+
+
+# GET : 장바구니 목록
+# POST : {"items": [{"product_id": 1, "quantity": 2, "op": "set"}, ...]} 로 여러 상품을 한 번에 담기/수량 변경/빼기
+@query_budget(settings.API_QUERY_BUDGETS["cart"])
+@api_view(["GET", "POST"])
+def cart(request):
+    fields = parse_fields(request, CartItemSerializer)
+    if request.method == "GET":
+        return cart_response(request, fields)
+
+    serializer = CartBatchSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    apply_cart_operations(request.user, serializer.validated_data["items"])
+    return cart_response(request, fields)
+
+
+# 장바구니로 주문을 만듭니다. 결제는 응답의 pay_url(포트원 결제 화면)에서 진행합니다.
+# HTML 주문(order_new)과 같은 요청 제한과 대기열을 거칩니다.
+@query_budget(settings.API_QUERY_BUDGETS["checkout"])
+@rate_limit("order_new")
+@api_view(["POST"])
+def checkout(request):
+    fields = parse_fields(request, OrderSerializer)
+    user_id = get_user_id(request)
+    if settings.WAITING_ROOM_SLOTS and user_id is not None:
+        admission = admit(user_id)
+        if not admission.admitted:
+            return Response(
+                {
+                    "detail": "주문이 많아 대기 중입니다.",
+                    "position": admission.position,
+                    "wait_seconds": admission.wait_seconds,
+                },
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": str(settings.WAITING_ROOM_POLL_SECONDS)},
+            )
+
+    with transaction.atomic():
+        cart_product_qs = CartProduct.objects.filter(user=request.user)
+        cart_product_list = list(cart_product_qs.select_related("product"))
+        if not cart_product_list:
+            raise ValidationError({"detail": "장바구니가 비어 있습니다."})
+        order = Order.create_from_cart(request.user, cart_product_list)
+        cart_product_qs.filter(
+            pk__in=[cart_product.pk for cart_product in cart_product_list]
+        ).delete()
+
+    data = OrderSerializer(order, fields=fields).data
+    data["pay_url"] = request.build_absolute_uri(
+        reverse("mall:order_pay", args=[order.pk])
+    )
+    return Response(data, status=status.HTTP_201_CREATED)
+
+
+def wants_products(fields) -> bool:
+    # 주문상품을 응답하지 않으면 prefetch 쿼리도 하지 않습니다.
+    return fields is None or "products" in fields
+
+
+def encode_cursor(pk: int) -> str:
+    return base64.urlsafe_b64encode(str(pk).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        return int(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (TypeError, ValueError, UnicodeDecodeError):
+        raise NotFound("잘못된 커서입니다.")
+
+
+def get_page_size(request) -> int:
+    try:
+        page_size = int(request.query_params.get("page_size", 0))
+    except ValueError:
+        page_size = 0
+    if page_size <= 0:
+        return settings.API_PAGE_SIZE
+    return min(page_size, settings.API_MAX_PAGE_SIZE)
+
+
+# 주문내역 : 운영/보관 주문을 최신순(-pk)으로 합쳐서 커서(마지막 pk) 기준으로 페이지를 나눕니다.
+# OFFSET을 쓰지 않으므로 뒤 페이지도 앞 페이지와 같은 비용이고, 그 사이 새 주문이 생겨도 중복/누락이 없습니다.
+@query_budget(settings.API_QUERY_BUDGETS["order_list"])
+@api_view(["GET"])
+def order_list(request):
+    fields = parse_fields(request, OrderSerializer)
+    page_size = get_page_size(request)
+    order_qs = Order.objects.filter(user=request.user)
+    archived_order_qs = ArchivedOrder.objects.filter(user=request.user)
+    cursor = request.query_params.get("cursor")
+    if cursor:
+        before = decode_cursor(cursor)
+        order_qs = order_qs.filter(pk__lt=before)
+        archived_order_qs = archived_order_qs.filter(pk__lt=before)
+    if wants_products(fields):
+        order_qs = order_qs.prefetch_related("orderedproduct_set")
+        archived_order_qs = archived_order_qs.prefetch_related("orderedproduct_set")
+
+    # 다음 페이지가 있는지 알기 위해 한 건 더 읽습니다.
+    order_list = archive.get_order_list(
+        order_qs, archived_order_qs, limit=page_size + 1
+    )
+    next_url: Optional[str] = None
+    if len(order_list) > page_size:
+        order_list = order_list[:page_size]
+        next_url = replace_query_param(
+            request.build_absolute_uri(), "cursor", encode_cursor(order_list[-1].pk)
+        )
+    return Response(
+        {
+            "next": next_url,
+            "results": OrderSerializer(order_list, many=True, fields=fields).data,
+        }
+    )
+
+
+@query_budget(settings.API_QUERY_BUDGETS["order_detail"])
+@api_view(["GET"])
+def order_detail(request, pk):
+    fields = parse_fields(request, OrderSerializer)
+    prefetch = ["orderedproduct_set"] if wants_products(fields) else []
+    # 운영 테이블에 없으면 보관 테이블에서 찾습니다. (Http404는 DRF가 404 응답으로 바꿉니다.)
+    order = archive.get_order_or_404(pk, prefetch=prefetch, user=request.user)
+    return Response(OrderSerializer(order, fields=fields).data)
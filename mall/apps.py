@@ -4,3 +4,19 @@ from django.apps import AppConfig
 class MallConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "mall"
+
+    def ready(self):
+        # 상품/분류 변경 시 페이지 캐시를 퍼지하는 시그널을 등록합니다.
+        from mall import page_cache  # noqa: F401
+
+        # 주문 상태가 바뀌면 주문내역 화면 캐시의 상태 값을 갱신하는 시그널을 등록합니다.
+        from mall import order_cache  # noqa: F401
+
+        # 상품/분류가 바뀌면 자동완성 색인의 버전을 올리는 시그널을 등록합니다.
+        from mall import autocomplete  # noqa: F401
+
+        # 분류/상품이 바뀌면 프로세스 조회 캐시를 비우는 시그널을 등록합니다.
+        from mall import local_cache  # noqa: F401
+
+        # 작업 큐 워커가 작업 이름으로 함수를 찾을 수 있도록 작업을 등록합니다.
+        from mall import tasks  # noqa: F401
@@ -0,0 +1,125 @@
+import logging
+from datetime import timedelta
+from typing import List, Optional, Sequence, Union
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import QuerySet
+from django.http import Http404
+from django.utils import timezone
+
+from mall.models import (
+    ArchivedOrder,
+    ArchivedOrderedProduct,
+    ArchivedOrderPayment,
+    CancellationItem,
+    Order,
+    OrderedProduct,
+    OrderPayment,
+)
+
+# 오래된 주문 보관(hot/cold 분리)
+# 종료된 주문(배송완료/취소) 중 ORDER_ARCHIVE_AFTER_DAYS 동안 변경이 없었던 주문을 주문상품/결제시도와 함께
+# 보관 테이블(ArchivedOrder 등)로 옮깁니다. pk 순으로 batch_size 건씩 나눠, 배치마다 복사와 삭제를 한 트랜잭션으로 처리하므로
+# 도중에 중단되어도 주문이 양쪽에 있거나 어느 쪽에도 없는 상태가 되지 않습니다.
+# 주문은 같은 pk로 옮기므로 주문 화면의 주소는 그대로이고, get_order_or_404 / get_order_list가 보관 테이블까지 읽습니다.
+logger = logging.getLogger(__name__)
+
+ARCHIVE_ORDER_STATUSES = (Order.Status.DELIVERED, Order.Status.CANCELED)
+
+AnyOrder = Union[Order, ArchivedOrder]
+
+
+def get_archivable_qs(cutoff) -> QuerySet:
+    # created_at 인덱스로 범위를 좁히고, 보관 직전에 상태가 바뀐 주문은 updated_at으로 거릅니다.
+    # 진행중인 대량 결제취소 항목이 있는 주문은 취소가 끝난 뒤에 옮깁니다.
+    return (
+        Order.objects.filter(
+            status__in=ARCHIVE_ORDER_STATUSES,
+            created_at__lt=cutoff,
+            updated_at__lt=cutoff,
+        )
+        .exclude(orderpayment__cancellationitem__status=CancellationItem.Status.PENDING)
+        .order_by("pk")
+    )
+
+
+def copy_rows(source_qs: QuerySet, archive_model) -> int:
+    # 보관 모델의 필드명은 원본 모델과 같으므로(archived_at 제외) values()로 읽어 그대로 만듭니다.
+    field_names = [
+        field.attname
+        for field in archive_model._meta.concrete_fields
+        if field.attname != "archived_at"
+    ]
+    archive_list = archive_model.objects.bulk_create(
+        [archive_model(**row) for row in source_qs.values(*field_names)],
+        batch_size=1000,
+    )
+    return len(archive_list)
+
+
+def archive_batch(cutoff, batch_size: int, last_pk: int = 0) -> List[int]:
+    qs = get_archivable_qs(cutoff).filter(pk__gt=last_pk)
+    if connection.features.has_select_for_update_skip_locked:
+        # 상태 변경 중인(잠긴) 주문은 건너뛰고 다음 실행에서 옮깁니다.
+        qs = qs.select_for_update(skip_locked=True)
+    else:
+        qs = qs.select_for_update()
+
+    with transaction.atomic():
+        order_ids = list(qs.values_list("pk", flat=True)[:batch_size])
+        if not order_ids:
+            return []
+        copy_rows(Order.objects.filter(pk__in=order_ids), ArchivedOrder)
+        copy_rows(
+            OrderedProduct.objects.filter(order_id__in=order_ids),
+            ArchivedOrderedProduct,
+        )
+        copy_rows(
+            OrderPayment.objects.filter(order_id__in=order_ids), ArchivedOrderPayment
+        )
+        # 끝난 결제취소 항목은 작업별 건수가 CancellationJob에 남아 있으므로 함께 지웁니다.
+        CancellationItem.objects.filter(payment__order_id__in=order_ids).delete()
+        OrderedProduct.objects.filter(order_id__in=order_ids).delete()
+        OrderPayment.objects.filter(order_id__in=order_ids).delete()
+        Order.objects.filter(pk__in=order_ids).delete()
+    return order_ids
+
+
+def archive_orders(
+    days: Optional[int] = None, batch_size: int = 500, limit: Optional[int] = None
+) -> int:
+    days = settings.ORDER_ARCHIVE_AFTER_DAYS if days is None else days
+    cutoff = timezone.now() - timedelta(days=days)
+    count, last_pk = 0, 0
+    while limit is None or count < limit:
+        size = batch_size if limit is None else min(batch_size, limit - count)
+        order_ids = archive_batch(cutoff, size, last_pk=last_pk)
+        if not order_ids:
+            break
+        count += len(order_ids)
+        last_pk = order_ids[-1]
+        logger.info("주문 %d건 보관 (~%d)", len(order_ids), last_pk)
+    return count
+
+
+def get_order_or_404(pk: int, prefetch: Sequence[str] = (), **kwargs) -> AnyOrder:
+    # 운영 테이블에 없으면 보관 테이블에서 찾습니다. 대부분의 조회는 최근 주문이라 첫 쿼리에서 끝납니다.
+    # 보관 모델의 관계 이름은 원본과 같으므로 prefetch에 같은 이름을 쓸 수 있습니다.
+    for model in (Order, ArchivedOrder):
+        order = (
+            model.objects.filter(pk=pk, **kwargs).prefetch_related(*prefetch).first()
+        )
+        if order is not None:
+            return order
+    raise Http404("주문내역을 찾을 수 없습니다.")
+
+
+def get_order_list(
+    hot_qs: QuerySet, archived_qs: QuerySet, limit: Optional[int] = None
+) -> List[AnyOrder]:
+    # 운영/보관 주문을 최신순(-pk)으로 각각 limit 건까지 읽어 합칩니다. pk가 같은 순서로 이어지므로 합친 뒤 다시 자릅니다.
+    if limit is not None:
+        hot_qs, archived_qs = hot_qs[:limit], archived_qs[:limit]
+    order_list = sorted([*hot_qs, *archived_qs], key=lambda o: o.pk, reverse=True)
+    return order_list[:limit]
@@ -0,0 +1,353 @@
+import logging
+import re
+import sys
+import threading
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from mall import metrics
+from mall.models import Category, Product
+
+# 검색어 자동완성
+# 판매중(ACTIVE) 상품 이름과 분류 이름을 워커 프로세스 메모리의 정렬된 배열에 두고, bisect로 접두어 범위를 찾습니다.
+# 한글은 자모 단위로 풀어서 저장하므로 입력 중인 글자로도 찾을 수 있습니다. ("삭" → "사과", "달" → "닭가슴살")
+# 상품 이름의 맨 앞뿐 아니라 단어의 시작으로도 찾을 수 있습니다. ("사과" → "청송 사과")
+#
+# 갱신
+# 상품/분류가 바뀌면 캐시의 버전 값을 올리고 바뀐 대상(product:<pk>, category:<pk>)을 버전별로 남깁니다.
+# 워커는 요청마다 버전 값만 읽어서, 바뀐 버전이 있으면 그 대상만 DB에서 다시 읽어 색인을 고칩니다.
+# 변경 기록이 만료되었거나 너무 많이 밀렸으면 색인을 처음부터 다시 만듭니다.
+# 다른 워커에도 반영되려면 CACHE_URL로 공유 캐시(redis/memcached)를 지정해야 합니다.
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = "autocomplete:version"
+
+CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+JUNGSEONG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+# 받침의 첫 값(공백)은 받침 없음입니다.
+JONGSEONG = " ㄱㄲㄳㄴㄵㄶㄷㄹㄺㄻㄼㄽㄾㄿㅀㅁㅂㅄㅅㅆㅇㅈㅊㅋㅌㅍㅎ"
+
+# 두 번 눌러 입력하는 겹모음/겹받침은 나눠서 저장합니다. (된소리 ㄲ, ㅆ 등은 한 번에 입력하므로 그대로 둡니다.)
+COMPOUND_JAMO = {
+    "ㅘ": "ㅗㅏ",
+    "ㅙ": "ㅗㅐ",
+    "ㅚ": "ㅗㅣ",
+    "ㅝ": "ㅜㅓ",
+    "ㅞ": "ㅜㅔ",
+    "ㅟ": "ㅜㅣ",
+    "ㅢ": "ㅡㅣ",
+    "ㄳ": "ㄱㅅ",
+    "ㄵ": "ㄴㅈ",
+    "ㄶ": "ㄴㅎ",
+    "ㄺ": "ㄹㄱ",
+    "ㄻ": "ㄹㅁ",
+    "ㄼ": "ㄹㅂ",
+    "ㄽ": "ㄹㅅ",
+    "ㄾ": "ㄹㅌ",
+    "ㄿ": "ㄹㅍ",
+    "ㅀ": "ㄹㅎ",
+    "ㅄ": "ㅂㅅ",
+}
+
+WHITESPACE_RE = re.compile(r"\s+")
+
+# 단어로 찾을 때 확인할 최대 항목 수. 흔한 단어 하나로 찾을 때 응답시간이 길어지지 않도록 제한합니다.
+MAX_WORD_SCAN = 1000
+
+
+def decompose_syllable(code: int) -> str:
+    cho, jung, jong = code // 588, code // 28 % 21, code % 28
+    jamo = CHOSEONG[cho] + JUNGSEONG[jung] + JONGSEONG[jong].strip()
+    return "".join(COMPOUND_JAMO.get(j, j) for j in jamo)
+
+
+# 한글 음절(가~힣)과 겹자모를 풀어쓰는 변환표. str.translate로 한 번에 바꿉니다.
+DECOMPOSE_TABLE = {
+    **{0xAC00 + code: decompose_syllable(code) for code in range(11172)},
+    **{ord(jamo): split for jamo, split in COMPOUND_JAMO.items()},
+}
+
+
+def normalize(text: str) -> str:
+    return WHITESPACE_RE.sub(" ", text).strip().casefold().translate(DECOMPOSE_TABLE)
+
+
+def get_keys(name: str) -> List[str]:
+    # 이름 전체와 두 번째 이후의 단어들
+    # 단어는 여러 상품 이름에 반복되므로 intern 해서 같은 문자열 객체를 같이 씁니다.
+    key = normalize(name)
+    return [key, *(sys.intern(word) for word in set(key.split(" ")[1:]))]
+
+
+class PrefixIndex:
+    # (키, 값) 쌍을 키 순으로 정렬한 배열입니다. 값은 정수 배열에 두어 메모리를 줄입니다.
+    def __init__(self, entries: Iterable[Tuple[str, int]] = ()):
+        entries = sorted(entries)
+        self.keys = [key for key, __ in entries]
+        self.values = array("q", (value for __, value in entries))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, key: str, value: int) -> None:
+        index = bisect_left(self.keys, key)
+        self.keys.insert(index, key)
+        self.values.insert(index, value)
+
+    def remove(self, key: str, value: int) -> None:
+        index = bisect_left(self.keys, key)
+        while index < len(self.keys) and self.keys[index] == key:
+            if self.values[index] == value:
+                del self.keys[index]
+                del self.values[index]
+                return
+            index += 1
+
+    def search(self, prefix: str, exact: bool = False) -> Iterator[int]:
+        index = bisect_left(self.keys, prefix)
+        while index < len(self.keys) and self.keys[index].startswith(prefix):
+            if exact and self.keys[index] != prefix:
+                break
+            yield self.values[index]
+            index += 1
+
+
+class Autocomplete:
+    def __init__(self, version: int = 0):
+        self.version = version
+        self.products: Dict[int, Tuple[str, int]] = {}  # 상품 pk: (이름, 분류 pk)
+        self.categories: Dict[int, str] = {}
+        self.category_counts = Counter()  # 분류별 판매중 상품 수
+        self.name_index = PrefixIndex()  # 이름 전체
+        self.word_index = PrefixIndex()  # 두 번째 이후 단어
+        self.category_index = PrefixIndex()
+        self.lock = threading.Lock()
+
+    @classmethod
+    def build(cls, version: int) -> "Autocomplete":
+        product_qs = Product.objects.filter(status=Product.Status.ACTIVE).values_list(
+            "pk", "name", "category_id"
+        )
+        categories = dict(Category.objects.values_list("pk", "name"))
+        return cls.from_rows(version, product_qs.order_by(), categories)
+
+    @classmethod
+    def from_rows(
+        cls,
+        version: int,
+        product_rows: Iterable[Tuple[int, str, int]],
+        categories: Dict[int, str],
+    ) -> "Autocomplete":
+        # product_rows : 판매중 상품의 (pk, 이름, 분류 pk)
+        self = cls(version)
+        name_entries, word_entries = [], []
+        for pk, name, category_id in product_rows:
+            self.products[pk] = (name, category_id)
+            self.category_counts[category_id] += 1
+            key, *word_keys = get_keys(name)
+            name_entries.append((key, pk))
+            word_entries += [(word_key, pk) for word_key in word_keys]
+        self.name_index = PrefixIndex(name_entries)
+        self.word_index = PrefixIndex(word_entries)
+        self.set_categories(categories)
+        return self
+
+    def set_categories(self, categories: Dict[int, str]) -> None:
+        # 분류는 수가 적으므로 바뀔 때마다 모두 다시 읽습니다.
+        self.categories = categories
+        self.category_index = PrefixIndex(
+            (normalize(name), pk) for pk, name in categories.items()
+        )
+
+    def remove_product(self, pk: int) -> None:
+        name, category_id = self.products.pop(pk)
+        self.category_counts[category_id] -= 1
+        key, *word_keys = get_keys(name)
+        self.name_index.remove(key, pk)
+        for word_key in word_keys:
+            self.word_index.remove(word_key, pk)
+
+    def add_product(self, pk: int, name: str, category_id: int) -> None:
+        self.products[pk] = (name, category_id)
+        self.category_counts[category_id] += 1
+        key, *word_keys = get_keys(name)
+        self.name_index.add(key, pk)
+        for word_key in word_keys:
+            self.word_index.add(word_key, pk)
+
+    def apply_changes(self, version: int, changes: Iterable[str]) -> None:
+        product_ids, category_changed = set(), False
+        for change in changes:
+            kind, pk = change.split(":")
+            if kind == "product":
+                product_ids.add(int(pk))
+            else:
+                category_changed = True
+        active_list, categories = [], None
+        if product_ids:
+            product_qs = Product.objects.filter(
+                pk__in=product_ids, status=Product.Status.ACTIVE
+            ).values_list("pk", "name", "category_id")
+            active_list = list(product_qs.order_by())
+        if category_changed:
+            categories = dict(Category.objects.values_list("pk", "name"))
+        with self.lock:
+            for pk in product_ids:
+                if pk in self.products:
+                    self.remove_product(pk)
+            for pk, name, category_id in active_list:
+                self.add_product(pk, name, category_id)
+            if categories is not None:
+                self.set_categories(categories)
+            self.version = version
+
+    def search_words(self, prefix: str) -> Iterator[int]:
+        if " " not in prefix:
+            yield from self.word_index.search(prefix)
+            return
+        # 여러 단어로 찾으면 첫 단어가 같은 상품의 이름에서 나머지를 확인합니다.
+        first, __ = prefix.split(" ", 1)
+        for pk in self.word_index.search(first, exact=True):
+            if f" {prefix}" in normalize(self.products[pk][0]):
+                yield pk
+
+    def search(self, query: str, limit: int) -> dict:
+        prefix = normalize(query)
+        if not prefix:
+            return {"products": [], "categories": []}
+        with self.lock:
+            # 이름이 검색어로 시작하는 상품을 먼저, 단어가 검색어로 시작하는 상품을 뒤에 둡니다.
+            product_ids = list(islice(self.name_index.search(prefix), limit))
+            for pk in islice(self.search_words(prefix), MAX_WORD_SCAN):
+                if len(product_ids) >= limit:
+                    break
+                if pk not in product_ids:
+                    product_ids.append(pk)
+            category_ids = []
+            for pk in self.category_index.search(prefix):
+                if len(category_ids) >= limit:
+                    break
+                if self.category_counts[pk] > 0:
+                    category_ids.append(pk)
+            return {
+                "products": [
+                    {"id": pk, "name": self.products[pk][0]} for pk in product_ids
+                ],
+                "categories": [
+                    {"id": pk, "name": self.categories[pk]} for pk in category_ids
+                ],
+            }
+
+
+index: Optional[Autocomplete] = None
+refresh_lock = threading.Lock()
+
+
+def get_version() -> int:
+    cache.add(VERSION_KEY, 0, timeout=None)
+    return cache.get(VERSION_KEY, 0)
+
+
+def change_key(version: int) -> str:
+    return f"autocomplete:change:{version}"
+
+
+def mark_changed(changes: List[str]) -> None:
+    # 버전을 바뀐 대상 수만큼 올리고, 새 버전 번호마다 바뀐 대상을 하나씩 남깁니다.
+    get_version()
+    version = cache.incr(VERSION_KEY, len(changes))
+    first = version - len(changes) + 1
+    cache.set_many(
+        {change_key(first + i): change for i, change in enumerate(changes)},
+        settings.AUTOCOMPLETE_CHANGE_TIMEOUT,
+    )
+
+
+def mark_changed_on_commit(changes: Iterable[str]) -> None:
+    changes = list(changes)
+    if changes:
+        transaction.on_commit(lambda: mark_changed(changes))
+
+
+def rebuild() -> Autocomplete:
+    global index
+    # 색인을 읽기 전의 버전을 기록해야 만드는 동안 바뀐 상품을 다음 갱신에서 놓치지 않습니다.
+    version = get_version()
+    index = Autocomplete.build(version)
+    metrics.inc("autocomplete_refreshes_total", kind="full")
+    return index
+
+
+def refresh() -> Autocomplete:
+    current = index
+    version = get_version()
+    if current is not None and current.version == version:
+        return current
+    with refresh_lock:
+        current = index
+        if current is None or version < current.version:
+            # 처음 만들거나, 캐시가 비워져서 버전이 되돌아간 경우
+            return rebuild()
+        if version - current.version > settings.AUTOCOMPLETE_MAX_CHANGES:
+            return rebuild()
+        versions = range(current.version + 1, version + 1)
+        found = cache.get_many([change_key(v) for v in versions])
+        missing = [v for v in versions if change_key(v) not in found]
+        if missing:
+            if any(change_key(v) in found for v in versions if v > missing[0]):
+                # 중간의 변경 기록이 만료되었습니다.
+                return rebuild()
+            # 다른 프로세스가 버전을 올린 직후 아직 변경 기록을 쓰지 못한 경우입니다. 기록된 곳까지만 반영합니다.
+            version = missing[0] - 1
+            if version == current.version:
+                return current
+        changes = [found[change_key(v)] for v in versions if v <= version]
+        current.apply_changes(version, changes)
+        metrics.inc("autocomplete_refreshes_total", kind="incremental")
+        return current
+
+
+def warm_up() -> None:
+    # 워커 기동 시 색인을 미리 만듭니다. DB에 접속할 수 없으면 첫 요청에서 만듭니다.
+    try:
+        refresh()
+    except DatabaseError:
+        logger.warning("자동완성 색인을 만들지 못했습니다.", exc_info=True)
+
+
+def search(query: str, limit: int) -> dict:
+    return refresh().search(query[: settings.AUTOCOMPLETE_MAX_QUERY_LENGTH], limit)
+
+
+@receiver(post_save, sender=Product)
+def mark_product_changed(sender, instance: Product, created: bool, **kwargs):
+    loaded_values = getattr(instance, "_loaded_values", None)
+    if (
+        created
+        or loaded_values is None
+        or any(
+            loaded_values.get(f) != getattr(instance, f)
+            for f in ("name", "status", "category_id")
+        )
+    ):
+        mark_changed_on_commit([f"product:{instance.pk}"])
+
+
+@receiver(post_delete, sender=Product)
+def mark_deleted_product(sender, instance: Product, **kwargs):
+    mark_changed_on_commit([f"product:{instance.pk}"])
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def mark_category_changed(sender, instance: Category, **kwargs):
+    mark_changed_on_commit([f"category:{instance.pk}"])
@@ -0,0 +1,239 @@
+import bisect
+import logging
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import F, Q, QuerySet, Value
+from django.db.models.functions import Greatest, Round
+from django.utils import timezone
+
+from mall import autocomplete, local_cache, metrics, page_cache
+from mall.models import BulkActionJob, Product
+
+# 관리자 대량 작업 실행기
+# 관리자 요청에서는 작업(BulkActionJob)만 만들고, 실제 변경은 작업 큐(tasks.run_bulk_action_job, 또는 run_bulk_actions 명령)에서
+# pk 순으로 BULK_ACTION_CHUNK_SIZE 건씩 나눠 청크마다 짧은 트랜잭션으로 처리합니다.
+# 한 번에 잡는 행 잠금이 청크 크기로 제한되고, 청크 사이마다 중단 요청을 확인합니다.
+# 별도 브로커 없이 DB의 작업 행(last_pk, updated_at)으로 진행상황과 이어서 처리할 위치를 관리합니다.
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BulkAction:
+    name: str
+    label: str
+    model: str  # app_label.model_name
+    # 청크의 pk 목록과 작업 인자를 받아 변경한 행 수를 반환합니다.
+    func: Callable[[List, dict], int]
+
+
+ACTIONS: Dict[str, BulkAction] = {}
+
+
+def register(name: str, label: str, model: str):
+    def decorator(func):
+        ACTIONS[name] = BulkAction(name, label, model, func)
+        return func
+
+    return decorator
+
+
+def update_products(pk_list: List, list_changed: bool, **changes) -> int:
+    count = Product.objects.filter(pk__in=pk_list).update(
+        updated_at=timezone.now(),
+        **changes,  # update()에서는 auto_now가 동작하지 않습니다.
+    )
+    # update()는 post_save 시그널이 없으므로 페이지 캐시를 직접 퍼지합니다. (mall/page_cache.py, mall/local_cache.py)
+    tags = [f"product:{pk}" for pk in pk_list]
+    if list_changed:
+        tags.append(page_cache.LIST_TAG)
+        autocomplete.mark_changed_on_commit(f"product:{pk}" for pk in pk_list)
+    page_cache.purge_on_commit(tags)
+    local_cache.product_cache.invalidate_on_commit()
+    return count
+
+
+def register_status_action(status: Product.Status) -> None:
+    def set_status(pk_list: List, params: dict) -> int:
+        return update_products(pk_list, list_changed=True, status=status)
+
+    name = f"product.{status.name.lower()}"
+    register(name, f"{status.label} 상태로 변경", "mall.product")(set_status)
+
+
+for status in Product.Status:
+    register_status_action(status)
+
+
+@register("product.change_price", "가격 변경", "mall.product")
+def change_product_price(pk_list: List, params: dict) -> int:
+    # params : {"percent": 10} (10% 인상) 또는 {"amount": -1000} (1000원 인하). 0원 아래로는 내려가지 않습니다.
+    if params.get("percent"):
+        price = Round(
+            F("price") * Value((100 + params["percent"]) / 100),
+            output_field=models.PositiveIntegerField(),
+        )
+    else:
+        price = F("price") + params.get("amount", 0)
+    price = Greatest(price, 0, output_field=models.PositiveIntegerField())
+    return update_products(pk_list, list_changed=False, price=price)
+
+
+def to_ranges(pk_iter: Iterable[int]) -> Tuple[List[List[int]], int]:
+    # 오름차순 pk를 연속 구간 [[처음, 마지막], ...]으로 묶습니다. (구간 목록, pk 수)
+    ranges: List[List[int]] = []
+    count = 0
+    for pk in pk_iter:
+        if ranges and ranges[-1][1] == pk - 1:
+            ranges[-1][1] = pk
+        else:
+            ranges.append([pk, pk])
+        count += 1
+    return ranges, count
+
+
+def get_chunk(ranges: List[List[int]], range_ends: List[int], last_pk: int, size: int):
+    # last_pk 다음부터 size 개의 pk. range_ends는 구간별 마지막 pk 목록입니다. (이진 탐색용)
+    pk_list: List[int] = []
+    index = bisect.bisect_left(range_ends, last_pk + 1)
+    while index < len(ranges) and len(pk_list) < size:
+        first, last = ranges[index]
+        first = max(first, last_pk + 1)
+        pk_list.extend(range(first, min(last, first + size - len(pk_list) - 1) + 1))
+        index += 1
+    return pk_list
+
+
+def create_job(
+    action_name: str, queryset: QuerySet, params: Optional[dict] = None, user=None
+) -> BulkActionJob:
+    action = ACTIONS[action_name]
+    # 대상은 관리자가 선택한 시점의 pk 구간으로 저장합니다. (pk 컬럼만 pk 순으로 나눠 읽습니다.)
+    target_ranges, total_count = to_ranges(
+        queryset.order_by("pk").values_list("pk", flat=True).iterator(chunk_size=10000)
+    )
+    return BulkActionJob.objects.create(
+        action=action_name,
+        params=params or {},
+        model=action.model,
+        target_ranges=target_ranges,
+        total_count=total_count,
+        created_by=user if user and user.is_authenticated else None,
+    )
+
+
+def load_job(pk: int) -> BulkActionJob:
+    # 대상 pk 구간은 실행기(run_job)에서만 읽습니다.
+    return BulkActionJob.objects.defer("target_ranges").get(pk=pk)
+
+
+def claim(job: BulkActionJob, resume: bool = False) -> bool:
+    # 같은 작업을 두 실행기가 동시에 처리하지 않도록 조건부 UPDATE로 가져갑니다.
+    # 진행중인 작업은 BULK_ACTION_STALE_SECONDS 동안 진행이 없었을 때만(실행하던 프로세스가 죽은 경우) 가져갑니다.
+    stale = timezone.now() - timedelta(seconds=settings.BULK_ACTION_STALE_SECONDS)
+    condition = Q(status=BulkActionJob.Status.PENDING)
+    if resume:
+        condition |= Q(status=BulkActionJob.Status.RUNNING, updated_at__lt=stale)
+    now = timezone.now()
+    claimed = (
+        BulkActionJob.objects.filter(condition, pk=job.pk).update(
+            status=BulkActionJob.Status.RUNNING, updated_at=now
+        )
+        == 1
+    )
+    if claimed:
+        BulkActionJob.objects.filter(pk=job.pk, started_at__isnull=True).update(
+            started_at=now
+        )
+    return claimed
+
+
+def release(job: BulkActionJob) -> None:
+    # 나눠서 실행하는 경우, 다음 실행이 바로 가져갈 수 있도록 대기 상태로 돌려둡니다. (진행 위치는 last_pk에 남아 있습니다.)
+    BulkActionJob.objects.filter(pk=job.pk, status=BulkActionJob.Status.RUNNING).update(
+        status=BulkActionJob.Status.PENDING, updated_at=timezone.now()
+    )
+
+
+def finish(job: BulkActionJob, status: str, error: str = "") -> None:
+    BulkActionJob.objects.filter(pk=job.pk).update(
+        status=status,
+        error=error,
+        finished_at=timezone.now(),
+        updated_at=timezone.now(),
+    )
+
+
+def run_job(
+    job: BulkActionJob,
+    chunk_size: Optional[int] = None,
+    resume: bool = False,
+    progress: Optional[Callable[[int], None]] = None,
+    time_limit: Optional[float] = None,
+) -> BulkActionJob:
+    # time_limit(초)을 넘기면 청크 사이에서 멈추고 대기 상태로 돌려둡니다. (작업 큐에서 나눠 실행할 때)
+    run_started = time.monotonic()
+    if not claim(job, resume=resume):
+        return load_job(job.pk)
+    chunk_size = chunk_size or settings.BULK_ACTION_CHUNK_SIZE
+    action = ACTIONS[job.action]
+    last_pk, target_ranges = BulkActionJob.objects.values_list(
+        "last_pk", "target_ranges"
+    ).get(pk=job.pk)
+    range_ends = [last for first, last in target_ranges]
+
+    try:
+        while True:
+            if BulkActionJob.objects.filter(pk=job.pk, cancel_requested=True).exists():
+                finish(job, BulkActionJob.Status.CANCELED)
+                break
+            started = time.monotonic()
+            with transaction.atomic():
+                pk_list = get_chunk(target_ranges, range_ends, last_pk, chunk_size)
+                if not pk_list:
+                    finish(job, BulkActionJob.Status.DONE)
+                    break
+                changed_count = action.func(pk_list, job.params)
+                last_pk = pk_list[-1]
+                BulkActionJob.objects.filter(pk=job.pk).update(
+                    last_pk=last_pk,
+                    processed_count=F("processed_count") + len(pk_list),
+                    changed_count=F("changed_count") + changed_count,
+                    updated_at=timezone.now(),
+                )
+            metrics.inc("bulk_action_rows_total", len(pk_list), action=job.action)
+            metrics.observe(
+                "bulk_action_chunk_seconds",
+                time.monotonic() - started,
+                action=job.action,
+            )
+            if progress:
+                progress(len(pk_list))
+            if time_limit is not None and time.monotonic() - run_started >= time_limit:
+                release(job)
+                break
+    except Exception as e:
+        logger.exception("대량 작업 %s 실패", job.pk)
+        finish(job, BulkActionJob.Status.FAILED, error=repr(e))
+
+    return load_job(job.pk)
+
+
+def get_throughput(job: BulkActionJob) -> Optional[float]:
+    # 초당 처리 건수
+    if not job.started_at or not job.processed_count:
+        return None
+    end = job.finished_at or job.updated_at
+    elapsed = (end - job.started_at).total_seconds()
+    return job.processed_count / elapsed if elapsed > 0 else None
+
+
+def get_remaining_seconds(job: BulkActionJob) -> Optional[float]:
+    throughput = get_throughput(job)
+    if job.is_finished or not throughput:
+        return None
+    return max(job.total_count - job.processed_count, 0) / throughput
@@ -0,0 +1,309 @@
+import logging
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, QuerySet
+from django.utils import timezone
+
+from mall import order_cache, sales
+from mall.models import (
+    CancellationItem,
+    CancellationJob,
+    Order,
+    OrderEvent,
+    OrderPayment,
+    PortonePaymentMeta,
+)
+from mall.portone import PortoneUnavailable, get_client
+
+if TYPE_CHECKING:
+    from mall.portone_client import PortoneClient
+
+# 대량 결제취소 엔진
+# 포트원 호출은 스레드 풀에서 제한된 개수만큼 동시에, 초당 호출 수를 제한해서 보내고,
+# DB 반영은 메인 스레드에서 배치 단위로 bulk_update 합니다. (스레드에서는 DB에 접근하지 않습니다.)
+logger = logging.getLogger(__name__)
+
+# 취소 가능한 주문 상태 (배송이 시작된 주문은 반품 절차를 따릅니다)
+CANCELABLE_ORDER_STATUSES = (Order.Status.PAID, Order.Status.PREPARED_PRODUCT)
+
+
+class RateLimiter:
+    # 스레드 간에 공유하는 초당 호출 수 제한 (토큰 버킷)
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.rate, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+@dataclass
+class CancelResult:
+    item: CancellationItem
+    status: str
+    meta: Optional[dict] = None
+    error: str = ""
+    attempts: int = 0
+
+
+def is_cancelable(payment: OrderPayment) -> bool:
+    return (
+        payment.is_paid_ok
+        and payment.pay_status == OrderPayment.PayStatus.PAID
+        and payment.order.status in CANCELABLE_ORDER_STATUSES
+    )
+
+
+def create_job(payment_qs: QuerySet, reason: str) -> CancellationJob:
+    with transaction.atomic():
+        job = CancellationJob.objects.create(reason=reason)
+        payment_id_iter = payment_qs.values_list("pk", flat=True).iterator(
+            chunk_size=1000
+        )
+        item_list = [
+            CancellationItem(job=job, payment_id=payment_id)
+            for payment_id in payment_id_iter
+        ]
+        CancellationItem.objects.bulk_create(item_list, batch_size=1000)
+        job.total_count = len(item_list)
+        job.save(update_fields=["total_count", "updated_at"])
+    return job
+
+
+def cancel_one(
+    api: "PortoneClient", limiter: RateLimiter, item: CancellationItem, reason: str
+) -> CancelResult:
+    # admin에서 이 모듈을 읽으므로 iamport는 실제로 취소를 실행할 때 import 합니다.
+    from iamport import Iamport
+
+    payment = item.payment
+    if not is_cancelable(payment):
+        return CancelResult(item, CancellationItem.Status.SKIPPED)
+
+    error = ""
+    attempts = 0
+    for attempts in range(1, settings.PORTONE_CANCEL_MAX_RETRIES + 2):
+        limiter.acquire()
+        try:
+            meta = api.cancel(reason, merchant_uid=payment.merchant_uid)
+            return CancelResult(
+                item, CancellationItem.Status.CANCELED, meta, attempts=attempts
+            )
+        except Iamport.ResponseError as e:
+            # 이전 실행에서 포트원 취소는 되었지만 DB 반영 전에 중단된 경우, 이미 취소된 결제로 응답합니다.
+            try:
+                meta = api.find(merchant_uid=payment.merchant_uid)
+            except (Iamport.ResponseError, Iamport.HttpError, PortoneUnavailable):
+                meta = {}
+            if meta.get("status") == "cancelled":
+                return CancelResult(
+                    item, CancellationItem.Status.CANCELED, meta, attempts=attempts
+                )
+            # 포트원이 거절한 취소(금액 불일치 등)는 재시도해도 같으므로 바로 실패 처리합니다.
+            return CancelResult(
+                item, CancellationItem.Status.FAILED, error=e.message, attempts=attempts
+            )
+        except (Iamport.HttpError, PortoneUnavailable) as e:
+            error = str(e)
+            time.sleep(random.uniform(0, min(5.0, 0.5 * (2**attempts))))
+    return CancelResult(
+        item, CancellationItem.Status.FAILED, error=error, attempts=attempts
+    )
+
+
+@transaction.atomic
+def apply_results(job: CancellationJob, result_list: List[CancelResult]) -> None:
+    now = timezone.now()
+    # 항목의 결제/주문은 포트원 호출 전에 읽은 값이라, 그 사이 배송 상태 반영이나 결제 재검증으로 바뀌었을 수 있습니다.
+    # 취소된 결제와 주문을 잠그고 다시 읽어서, 이벤트의 이전 상태와 매출 집계 부호를 현재 상태로 계산합니다.
+    payment_ids = [
+        result.item.payment_id
+        for result in result_list
+        if result.status == CancellationItem.Status.CANCELED
+    ]
+    payment_dict = {
+        payment.pk: payment
+        for payment in OrderPayment.objects.select_for_update()
+        .filter(pk__in=payment_ids)
+        .order_by("pk")
+    }
+    order_dict = {
+        order.pk: order
+        for order in Order.objects.select_for_update()
+        .filter(pk__in=[payment.order_id for payment in payment_dict.values()])
+        .order_by("pk")
+    }
+
+    payment_list = []
+    order_list = []
+    sales_dict = defaultdict(list)  # 매출 집계 부호: 주문 목록
+    event_list = []
+    meta_list = []
+    for result in result_list:
+        item = result.item
+        item.status = result.status
+        item.attempts += result.attempts
+        item.error = result.error
+        item.updated_at = now
+        if result.status != CancellationItem.Status.CANCELED:
+            continue
+
+        payment = payment_dict.get(item.payment_id)
+        order = payment and order_dict.get(payment.order_id)
+        if order is None:
+            item.status = CancellationItem.Status.FAILED
+            item.error = "포트원 취소 후 결제 또는 주문이 삭제되어 반영하지 못했습니다."
+            continue
+        payload = {"cancellation_job_id": job.pk, "reason": job.reason}
+        if payment.pay_status != OrderPayment.PayStatus.CANCELED:
+            event_list.append(
+                OrderEvent(
+                    event_type=OrderEvent.Type.PAYMENT_STATUS_CHANGED,
+                    order_id=order.pk,
+                    payment_id=payment.pk,
+                    from_status=payment.pay_status,
+                    to_status=OrderPayment.PayStatus.CANCELED,
+                    payload=payload,
+                )
+            )
+            payment.pay_status = OrderPayment.PayStatus.CANCELED
+            payment.is_paid_ok = False
+            payment_list.append(payment)
+        if result.meta:
+            meta_list.append(
+                PortonePaymentMeta(
+                    uid=payment.uid, data=PortonePaymentMeta.compress(result.meta)
+                )
+            )
+
+        if order.status == Order.Status.CANCELED:  # 다른 경로에서 이미 취소된 주문
+            continue
+        if order.status not in CANCELABLE_ORDER_STATUSES:
+            # 환불은 되었지만 그 사이 배송이 시작된 주문은 덮어쓰지 않고 담당자가 확인하도록 실패로 남깁니다.
+            item.status = CancellationItem.Status.FAILED
+            item.error = (
+                f"포트원 취소 후 주문 상태가 {order.get_status_display()}(으)로 "
+                f"바뀌어 주문은 취소하지 않았습니다."
+            )
+            continue
+        event_list.append(
+            OrderEvent(
+                event_type=OrderEvent.Type.ORDER_STATUS_CHANGED,
+                order_id=order.pk,
+                payment_id=payment.pk,
+                from_status=order.status,
+                to_status=Order.Status.CANCELED,
+                payload=payload,
+            )
+        )
+        sales_dict[sales.get_status_sign(order.status, Order.Status.CANCELED)].append(
+            order
+        )
+        order.status = Order.Status.CANCELED
+        order.updated_at = now  # bulk_update에서는 auto_now가 동작하지 않습니다.
+        order_list.append(order)
+
+    OrderPayment.objects.bulk_update(payment_list, ["pay_status", "is_paid_ok"])
+    Order.objects.bulk_update(order_list, ["status", "updated_at"])
+    order_cache.set_states_on_commit(
+        order_cache.make_state(order.pk, order.user_id, order.status, order.updated_at)
+        for order in order_list
+    )
+    for sign, sign_order_list in sales_dict.items():
+        sales.apply_order_sales(sign_order_list, sign)
+    OrderEvent.objects.bulk_create(event_list)
+    PortonePaymentMeta.objects.filter(uid__in=[m.uid for m in meta_list]).delete()
+    PortonePaymentMeta.objects.bulk_create(meta_list)
+    CancellationItem.objects.bulk_update(
+        [result.item for result in result_list],
+        ["status", "attempts", "error", "updated_at"],
+    )
+
+    counts = {status: 0 for status in CancellationItem.Status.values}
+    for result in result_list:
+        counts[result.item.status] += 1
+    CancellationJob.objects.filter(pk=job.pk).update(
+        canceled_count=F("canceled_count") + counts[CancellationItem.Status.CANCELED],
+        failed_count=F("failed_count") + counts[CancellationItem.Status.FAILED],
+        skipped_count=F("skipped_count") + counts[CancellationItem.Status.SKIPPED],
+        updated_at=now,
+    )
+
+
+def run_job(
+    job: CancellationJob,
+    workers: Optional[int] = None,
+    rate: Optional[float] = None,
+    batch_size: int = 100,
+    retry_failed: bool = False,
+    progress: Optional[Callable[[int], None]] = None,
+    time_limit: Optional[float] = None,
+) -> CancellationJob:
+    # 남아 있는 PENDING 항목만 처리하므로, 같은 작업을 다시 실행하면 중단된 지점부터 이어서 처리합니다.
+    # time_limit(초)을 넘기면 배치 사이에서 멈추고 진행중(RUNNING) 상태로 반환합니다. (작업 큐에서 나눠 실행할 때)
+    started = time.monotonic()
+    workers = workers or settings.PORTONE_CANCEL_WORKERS
+    limiter = RateLimiter(rate or settings.PORTONE_CANCEL_RATE)
+    api = get_client()
+
+    if retry_failed:
+        failed_qs = job.item_set.filter(status=CancellationItem.Status.FAILED)
+        failed_count = failed_qs.update(status=CancellationItem.Status.PENDING)
+        CancellationJob.objects.filter(pk=job.pk).update(
+            failed_count=F("failed_count") - failed_count
+        )
+    CancellationJob.objects.filter(pk=job.pk).update(
+        status=CancellationJob.Status.RUNNING, updated_at=timezone.now()
+    )
+
+    pending_qs = (
+        job.item_set.filter(status=CancellationItem.Status.PENDING)
+        .select_related("payment", "payment__order")
+        .order_by("pk")
+    )
+    last_pk = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            # 처리한 항목 다음부터 pk 순으로 읽어서, 실패로 남은 항목을 다시 읽지 않도록 합니다.
+            item_list = list(pending_qs.filter(pk__gt=last_pk)[:batch_size])
+            if not item_list:
+                break
+            last_pk = item_list[-1].pk
+            result_list = list(
+                executor.map(
+                    lambda item: cancel_one(api, limiter, item, job.reason), item_list
+                )
+            )
+            apply_results(job, result_list)
+            if progress:
+                progress(len(result_list))
+            if time_limit is not None and time.monotonic() - started >= time_limit:
+                job.refresh_from_db()
+                return job
+
+    CancellationJob.objects.filter(pk=job.pk).update(
+        status=CancellationJob.Status.DONE, updated_at=timezone.now()
+    )
+    job.refresh_from_db()
+    return job
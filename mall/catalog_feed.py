@@ -0,0 +1,249 @@
+import csv
+import gzip
+import json
+import logging
+import os
+import shutil
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlencode
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db.models import BigIntegerField, Count, F, Max, Value
+from django.db.models.functions import Floor
+from django.urls import reverse
+from django.utils import timezone
+
+from mall.models import Product
+
+# 사이트맵/상품 피드 생성
+# 상품을 pk 범위(CATALOG_FEED_SHARD_SIZE)별 조각(shard)으로 나눠, 조각마다 사이트맵 파일과 피드 조각 파일을 만듭니다.
+# 조각 안에서도 pk 순으로 batch_size 건씩 읽어 바로 gzip 파일에 쓰므로 상품 수와 상관없이 메모리 사용량이 일정합니다.
+#
+# 다시 만들 때는 조각별 (상품 수, 최근 updated_at)을 GROUP BY 한 번으로 읽어 지난 실행(manifest.json)과 비교하고,
+# 바뀐 조각만 다시 씁니다. 상품이 추가/수정되면 updated_at이, 삭제되면 상품 수가 바뀝니다.
+# 전체 피드(feeds/products.tsv.gz)는 조각 파일을 이어붙여 만듭니다. (gzip 파일은 이어붙여도 하나의 gzip으로 읽힙니다.)
+#
+# 파일은 CATALOG_FEED_ROOT에 만들고 /sitemap.xml, /sitemap-00001.xml.gz, /feeds/products.tsv.gz 로 서빙합니다.
+# (mysite.views.serve_catalog_file, 운영에서는 nginx가 직접 서빙하는 것을 권장합니다.)
+logger = logging.getLogger(__name__)
+
+SITEMAP_INDEX_NAME = "sitemap.xml"
+FEED_NAME = "feeds/products.tsv.gz"
+MANIFEST_NAME = "manifest.json"
+
+FEED_HEADER = ["id", "name", "price", "status", "photo_url", "link"]
+FEED_STATUS = "in_stock"  # 피드에는 판매중(ACTIVE) 상품만 들어갑니다.
+
+ROW_FIELDS = ["pk", "name", "price", "photo", "updated_at"]
+
+
+def sitemap_name(shard: int) -> str:
+    return f"sitemap-{shard:05d}.xml.gz"
+
+
+def feed_part_name(shard: int) -> str:
+    return f"feeds/parts/{shard:05d}.tsv.gz"
+
+
+@dataclass
+class FeedResult:
+    shard_count: int = 0
+    written_shards: List[int] = field(default_factory=list)
+    removed_shards: List[int] = field(default_factory=list)
+    product_count: int = 0  # 다시 쓴 조각의 상품 수
+
+
+@contextmanager
+def atomic_path(path: Path) -> Iterator[Path]:
+    # 임시 파일에 다 쓴 뒤 바꿔치기해서, 서빙 중인 파일이 쓰다 만 상태로 보이지 않도록 합니다.
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def get_shard_signatures(shard_size: int) -> Dict[int, list]:
+    # 상태와 상관없이 모든 상품으로 셉니다. (판매중지도 updated_at이 바뀌므로 알 수 있습니다.)
+    shard = Floor(F("pk") / Value(shard_size), output_field=BigIntegerField())
+    row_qs = (
+        Product.objects.order_by()
+        .annotate(shard=shard)
+        .values("shard")
+        .annotate(count=Count("pk"), updated_at=Max("updated_at"))
+    )
+    return {
+        int(row["shard"]): [row["count"], row["updated_at"].isoformat()]
+        for row in row_qs
+    }
+
+
+def iter_shard_rows(shard: int, shard_size: int, batch_size: int) -> Iterator[Tuple]:
+    row_qs = (
+        Product.objects.filter(
+            status=Product.Status.ACTIVE,
+            pk__gte=shard * shard_size,
+            pk__lt=(shard + 1) * shard_size,
+        )
+        .order_by("pk")
+        .values_list(*ROW_FIELDS)
+    )
+    last_pk = shard * shard_size - 1
+    while True:
+        row_list = list(row_qs.filter(pk__gt=last_pk)[:batch_size])
+        if not row_list:
+            return
+        yield from row_list
+        last_pk = row_list[-1][0]
+
+
+def get_links(base_url: str, name: str, photo: str) -> Tuple[str, str]:
+    # 상품 상세 화면이 없으므로 상품 이름으로 검색한 목록 화면을 링크로 씁니다.
+    link = f"{base_url}{reverse('mall:product_list')}?{urlencode({'query': name})}"
+    photo_url = f"{base_url}{default_storage.url(photo)}" if photo else ""
+    return link, photo_url
+
+
+def write_shard(root: Path, shard: int, shard_size: int, batch_size: int) -> int:
+    base_url = settings.CATALOG_FEED_BASE_URL.rstrip("/")
+    count = 0
+    with atomic_path(root / sitemap_name(shard)) as sitemap_path, atomic_path(
+        root / feed_part_name(shard)
+    ) as part_path:
+        with gzip.open(sitemap_path, "wt", encoding="utf-8") as sitemap, gzip.open(
+            part_path, "wt", encoding="utf-8", newline=""
+        ) as part:
+            sitemap.write(
+                '<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9" '
+                'xmlns:image="http://www.google.com/schemas/sitemap-image/1.1">\n'
+            )
+            writer = csv.writer(part, delimiter="\t", lineterminator="\n")
+            for pk, name, price, photo, updated_at in iter_shard_rows(
+                shard, shard_size, batch_size
+            ):
+                link, photo_url = get_links(base_url, name, photo)
+                sitemap.write(
+                    f"<url><loc>{escape(link)}</loc>"
+                    f"<lastmod>{updated_at.date().isoformat()}</lastmod>"
+                )
+                if photo_url:
+                    sitemap.write(
+                        f"<image:image><image:loc>{escape(photo_url)}</image:loc>"
+                        "</image:image>"
+                    )
+                sitemap.write("</url>\n")
+                writer.writerow([pk, name, price, FEED_STATUS, photo_url, link])
+                count += 1
+            sitemap.write("</urlset>\n")
+    return count
+
+
+def remove_shard(root: Path, shard: int) -> None:
+    (root / sitemap_name(shard)).unlink(missing_ok=True)
+    (root / feed_part_name(shard)).unlink(missing_ok=True)
+
+
+def write_sitemap_index(root: Path, shards: Dict[str, dict]) -> None:
+    base_url = settings.CATALOG_FEED_BASE_URL.rstrip("/")
+    with atomic_path(root / SITEMAP_INDEX_NAME) as path:
+        with path.open("w", encoding="utf-8") as f:
+            f.write(
+                '<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+            )
+            for shard, info in sorted(shards.items(), key=lambda x: int(x[0])):
+                if not info["count"]:
+                    continue
+                f.write(
+                    f"<sitemap><loc>{escape(base_url)}/{sitemap_name(int(shard))}</loc>"
+                    f"<lastmod>{info['lastmod']}</lastmod></sitemap>\n"
+                )
+            f.write("</sitemapindex>\n")
+
+
+def write_feed(root: Path, shards: Dict[str, dict]) -> None:
+    # 헤더를 gzip 하나로 쓰고, 조각 파일(gzip)을 다시 압축하지 않고 그대로 이어붙입니다.
+    header = "\t".join(FEED_HEADER) + "\n"
+    with atomic_path(root / FEED_NAME) as path:
+        with path.open("wb") as f:
+            f.write(gzip.compress(header.encode()))
+            for shard in sorted(int(shard) for shard in shards):
+                if not shards[str(shard)]["count"]:
+                    continue
+                with (root / feed_part_name(shard)).open("rb") as part:
+                    shutil.copyfileobj(part, f)
+
+
+def load_manifest(root: Path) -> dict:
+    try:
+        return json.loads((root / MANIFEST_NAME).read_text())
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def generate(
+    full: bool = False,
+    batch_size: int = 1000,
+    root: Optional[Path] = None,
+) -> FeedResult:
+    root = Path(root or settings.CATALOG_FEED_ROOT)
+    shard_size = settings.CATALOG_FEED_SHARD_SIZE
+    manifest = load_manifest(root)
+    if manifest.get("shard_size") != shard_size:
+        full = True
+    old_shards = {} if full else manifest.get("shards", {})
+
+    # 조각을 쓰기 전에 읽어야, 쓰는 동안 바뀐 상품이 다음 실행에서 다시 반영됩니다.
+    signatures = get_shard_signatures(shard_size)
+    result = FeedResult(shard_count=len(signatures))
+    shards = {}
+    for shard, signature in sorted(signatures.items()):
+        old = old_shards.get(str(shard))
+        if old is not None and old["signature"] == signature:
+            shards[str(shard)] = old
+            continue
+        count = write_shard(root, shard, shard_size, batch_size)
+        if not count:
+            remove_shard(root, shard)
+        shards[str(shard)] = {
+            "signature": signature,
+            "count": count,
+            "lastmod": timezone.now().date().isoformat(),
+        }
+        result.written_shards.append(shard)
+        result.product_count += count
+        logger.info("사이트맵/피드 조각 %d : 상품 %d개", shard, count)
+
+    if full:
+        # 지난 실행 기록을 쓰지 않았으므로 디스크에 남은 조각 파일로 지울 조각을 찾습니다.
+        old_shards = {
+            str(int(path.name[len("sitemap-") : -len(".xml.gz")])): {}
+            for path in root.glob("sitemap-*.xml.gz")
+        }
+    for shard in set(old_shards) - set(shards):
+        # 상품이 모두 삭제된 조각
+        remove_shard(root, int(shard))
+        result.removed_shards.append(int(shard))
+
+    if result.written_shards or result.removed_shards or full:
+        write_sitemap_index(root, shards)
+        write_feed(root, shards)
+    with atomic_path(root / MANIFEST_NAME) as path:
+        path.write_text(
+            json.dumps(
+                {
+                    "shard_size": shard_size,
+                    "generated_at": timezone.now().isoformat(),
+                    "shards": shards,
+                }
+            )
+        )
+    return result
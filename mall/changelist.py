@@ -0,0 +1,103 @@
+from typing import Optional
+
+from django.conf import settings
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ORDER_VAR, PAGE_VAR, ChangeList
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+# 수백만 건 테이블용 관리자 목록 화면
+# - 전체 COUNT(*) 대신 ADMIN_COUNT_LIMIT 건까지만 셉니다. 필터가 없으면 테이블 통계의 예상 건수를 함께 보여줍니다.
+# - 페이지 번호는 ADMIN_COUNT_LIMIT 건까지만 만들고, 그 뒤는 "다음" 링크(?after=<마지막 pk>)로
+#   pk 기준 keyset 이동을 합니다. OFFSET 없이 인덱스에서 바로 다음 행을 찾으므로 몇 페이지 뒤든 속도가 같습니다.
+
+AFTER_VAR = "after"
+
+
+def estimate_table_rows(model, using: str) -> Optional[int]:
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "mysql":
+            cursor.execute(
+                "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                [table],
+            )
+        elif connection.vendor == "postgresql":
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE relname = %s", [table]
+            )
+        else:
+            return None
+        row = cursor.fetchone()
+    # postgresql은 ANALYZE 전이면 -1 입니다.
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count_limit(self) -> int:
+        return settings.ADMIN_COUNT_LIMIT
+
+    @cached_property
+    def count(self) -> int:
+        # LIMIT을 건 서브쿼리로 세므로 결과가 아무리 많아도 count_limit 건만 읽습니다.
+        return self.object_list.order_by()[: self.count_limit].count()
+
+    @cached_property
+    def is_capped(self) -> bool:
+        return self.count >= self.count_limit
+
+    @cached_property
+    def estimated_count(self) -> Optional[int]:
+        qs = self.object_list
+        if not self.is_capped or qs.query.where:
+            return None
+        return estimate_table_rows(qs.model, qs.db)
+
+
+class KeysetChangeList(ChangeList):
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(AFTER_VAR, None)
+        return lookup_params
+
+    def is_keyset_ordering(self) -> bool:
+        # 컬럼 정렬을 고르지 않은 기본 정렬(-pk)일 때만 keyset 이동을 씁니다.
+        if ORDER_VAR in self.params:
+            return False
+        # 모델 Meta.ordering과 ChangeList가 덧붙이는 "-pk"가 중복으로 들어있을 수 있습니다.
+        return set(self.queryset.query.order_by) == {"-pk"}
+
+    def get_results(self, request):
+        self.keyset_after = None
+        self.keyset_first_url = self.keyset_next_url = None
+        keyset = self.is_keyset_ordering()
+
+        after = self.params.get(AFTER_VAR)
+        if after and keyset:
+            try:
+                self.keyset_after = self.lookup_opts.pk.to_python(after)
+            except ValidationError as e:
+                raise IncorrectLookupParameters(e) from e
+            # 선택 작업(actions)은 get_queryset()을 다시 호출하므로 이 조건 없이 전체 필터 결과에 적용됩니다.
+            self.queryset = self.queryset.filter(pk__lt=self.keyset_after)
+
+        super().get_results(request)
+
+        if not keyset:
+            return
+        if self.keyset_after is not None:
+            self.keyset_first_url = self.get_query_string(remove=[AFTER_VAR, PAGE_VAR])
+        has_next = self.page_num < self.paginator.num_pages or self.paginator.is_capped
+        if self.multi_page and not self.show_all and has_next:
+            self.result_list = list(self.result_list)
+            if self.result_list:
+                self.keyset_next_url = self.get_query_string(
+                    {AFTER_VAR: self.result_list[-1].pk}, remove=[PAGE_VAR]
+                )
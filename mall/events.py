@@ -0,0 +1,107 @@
+import json
+import logging
+import queue
+from datetime import timedelta
+from pathlib import Path
+from typing import Dict, List
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from mall.models import EventConsumerOffset, OrderEvent
+
+# OrderEvent outbox를 싱크별로 배치 단위로 전달하는 릴레이
+# 싱크마다 EventConsumerOffset에 마지막 전달 pk를 저장하므로, 재시작해도 이어서 전달합니다.
+# 오프셋은 전달이 끝난 뒤에 커밋하므로 최소 1회 전달(at-least-once)이고, 소비자는 이벤트 id로 중복을 걸러야 합니다.
+logger = logging.getLogger(__name__)
+
+
+class BaseSink:
+    def __init__(self, name: str, **options):
+        self.name = name
+
+    def publish(self, events: List[Dict]) -> None:
+        raise NotImplementedError
+
+
+class JsonlFileSink(BaseSink):
+    # 이벤트 1건을 JSON 한 줄로 파일 끝에 이어 씁니다. 외부 시스템은 tail -f 처럼 따라 읽으면 됩니다.
+    def __init__(self, name: str, path: str, **options):
+        super().__init__(name, **options)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def publish(self, events: List[Dict]) -> None:
+        with self.path.open("at", encoding="utf-8") as f:
+            for event in events:
+                f.write(json.dumps(event, ensure_ascii=False) + "\n")
+            f.flush()
+
+
+# 같은 프로세스 안에서 이벤트를 받아가는 소비자용 큐 (이름별로 하나씩)
+local_queues: Dict[str, queue.Queue] = {}
+
+
+class LocalQueueSink(BaseSink):
+    def __init__(self, name: str, maxsize: int = 0, **options):
+        super().__init__(name, **options)
+        self.queue = local_queues.setdefault(name, queue.Queue(maxsize=maxsize))
+
+    def publish(self, events: List[Dict]) -> None:
+        for event in events:
+            self.queue.put(event)
+
+
+def get_sinks() -> Dict[str, BaseSink]:
+    sinks = {}
+    for name, config in settings.ORDER_EVENT_SINKS.items():
+        sink_class = import_string(config["BACKEND"])
+        sinks[name] = sink_class(name, **config.get("OPTIONS", {}))
+    return sinks
+
+
+def relay_batch(sink: BaseSink, batch_size: int) -> int:
+    # 오토인크리먼트 pk는 커밋 순서와 다를 수 있어서, 방금 만들어진 이벤트는 건너뛰고 다음 배치에서 전달합니다.
+    # (늦게 커밋된 작은 pk 이벤트를 오프셋이 건너뛰어 버리는 것을 막기 위함)
+    visible_before = timezone.now() - timedelta(seconds=settings.ORDER_EVENT_RELAY_LAG)
+    with transaction.atomic():
+        # 같은 싱크를 여러 릴레이 프로세스가 동시에 처리하지 않도록 오프셋 행을 잠급니다.
+        offset, __ = EventConsumerOffset.objects.get_or_create(name=sink.name)
+        offset = EventConsumerOffset.objects.select_for_update().get(pk=offset.pk)
+        event_list = list(
+            OrderEvent.objects.filter(
+                pk__gt=offset.last_event_id, created_at__lte=visible_before
+            ).order_by("pk")[:batch_size]
+        )
+        if not event_list:
+            return 0
+        sink.publish([event.as_dict() for event in event_list])
+        offset.last_event_id = event_list[-1].pk
+        offset.save(update_fields=["last_event_id", "updated_at"])
+    return len(event_list)
+
+
+def relay(sinks: Dict[str, BaseSink], batch_size: int) -> Dict[str, int]:
+    # 싱크별로 밀린 이벤트가 없을 때까지 배치를 반복해서 전달하고, 싱크별 전달 건수를 반환합니다.
+    published = {}
+    for name, sink in sinks.items():
+        count = 0
+        while True:
+            try:
+                sent = relay_batch(sink, batch_size)
+            except Exception as e:
+                # 한 싱크의 장애가 다른 싱크 전달을 막지 않도록 하고, 다음 실행에서 이어서 전달합니다.
+                logger.error("이벤트 전달 실패 (%s): %s", name, e, exc_info=e)
+                break
+            count += sent
+            if sent < batch_size:
+                break
+        published[name] = count
+    return published
+
+
+def read_events(after_id: int, limit: int = 100) -> List[OrderEvent]:
+    # 외부 소비자가 직접 오프셋을 관리하며 이어 읽을 때 사용합니다. pk 인덱스 범위 조회입니다.
+    return list(OrderEvent.objects.filter(pk__gt=after_id).order_by("pk")[:limit])
@@ -0,0 +1,204 @@
+import csv
+import json
+import zlib
+from collections import defaultdict
+from typing import Dict, Iterator, List
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from mall.models import OrderedProduct, OrderPayment, PortonePaymentMeta
+
+# 회계용 주문 내보내기 (CSV/JSONL)
+# 주문을 pk 순으로 batch_size 만큼씩 읽고(keyset), 그 주문들의 주문상품/결제/결제 meta를 한 번씩 모아 읽어서
+# 한 배치 분량의 문자열만 만들어 내보냅니다. 전체 결과를 메모리에 올리지 않으므로 건수와 상관없이 메모리 사용량이 일정합니다.
+# (MySQL 드라이버는 iterator()를 써도 결과 전체를 클라이언트로 가져오기 때문에 pk 범위로 끊어서 읽습니다.)
+
+FORMATS = ("csv", "jsonl")
+
+ORDER_FIELDS = [
+    "pk",
+    "uid",
+    "user_id",
+    "user__username",
+    "status",
+    "total_amount",
+    "created_at",
+    "updated_at",
+]
+LINE_FIELDS = ["order_id", "product_id", "name", "price", "quantity"]
+PAYMENT_FIELDS = [
+    "order_id",
+    "uid",
+    "pay_method",
+    "pay_status",
+    "is_paid_ok",
+    "desired_amount",
+    "paid_amount",
+    "paid_at",
+    "pg_tid",
+]
+
+# CSV는 주문상품 1건당 1행이며, 주문의 마지막 결제 정보를 함께 적습니다.
+CSV_HEADER = [
+    "order_id",
+    "order_uid",
+    "user_id",
+    "username",
+    "order_status",
+    "total_amount",
+    "ordered_at",
+    "product_id",
+    "product_name",
+    "price",
+    "quantity",
+    "line_amount",
+    "merchant_uid",
+    "pay_status",
+    "is_paid_ok",
+    "paid_amount",
+    "paid_at",
+    "pg_tid",
+    "meta",
+]
+
+
+def iter_order_batches(order_qs: QuerySet, batch_size: int) -> Iterator[List[Dict]]:
+    order_qs = order_qs.order_by("pk").values(*ORDER_FIELDS)
+    last_pk = 0
+    while True:
+        order_list = list(order_qs.filter(pk__gt=last_pk)[:batch_size])
+        if not order_list:
+            return
+        last_pk = order_list[-1]["pk"]
+        order_ids = [order["pk"] for order in order_list]
+
+        line_dict = defaultdict(list)
+        for line in OrderedProduct.objects.filter(order_id__in=order_ids).values(
+            *LINE_FIELDS
+        ):
+            line_dict[line.pop("order_id")].append(line)
+
+        payment_list = list(
+            OrderPayment.objects.filter(order_id__in=order_ids)
+            .order_by("pk")
+            .values(*PAYMENT_FIELDS)
+        )
+        meta_dict = {
+            uid: PortonePaymentMeta.decompress(bytes(data))
+            for uid, data in PortonePaymentMeta.objects.filter(
+                uid__in=[payment["uid"] for payment in payment_list]
+            ).values_list("uid", "data")
+        }
+        payment_dict = defaultdict(list)
+        for payment in payment_list:
+            uid = payment.pop("uid")
+            payment["merchant_uid"] = str(uid)
+            payment["meta"] = meta_dict.get(uid, {})
+            payment_dict[payment.pop("order_id")].append(payment)
+
+        for order in order_list:
+            order["lines"] = line_dict[order["pk"]]
+            order["payments"] = payment_dict[order["pk"]]
+        yield order_list
+
+
+class Echo:
+    # csv.writer가 쓴 한 줄을 그대로 반환받기 위한 의사(pseudo) 버퍼
+    def write(self, value):
+        return value
+
+
+def iter_csv(order_qs: QuerySet, batch_size: int) -> Iterator[str]:
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_HEADER)
+    for order_list in iter_order_batches(order_qs, batch_size):
+        row_list = []
+        for order in order_list:
+            payment = order["payments"][-1] if order["payments"] else {}
+            payment_columns = [
+                payment.get("merchant_uid", ""),
+                payment.get("pay_status", ""),
+                payment.get("is_paid_ok", ""),
+                payment.get("paid_amount", ""),
+                payment["paid_at"].isoformat() if payment.get("paid_at") else "",
+                payment.get("pg_tid", ""),
+                json.dumps(payment.get("meta", {}), ensure_ascii=False),
+            ]
+            order_columns = [
+                order["pk"],
+                order["uid"].hex,
+                order["user_id"],
+                order["user__username"],
+                order["status"],
+                order["total_amount"],
+                order["created_at"].isoformat(),
+            ]
+            # 주문상품이 없는 주문도 빠지지 않도록 빈 행을 하나 씁니다.
+            for line in order["lines"] or [{}]:
+                line_columns = [
+                    line.get("product_id", ""),
+                    line.get("name", ""),
+                    line.get("price", ""),
+                    line.get("quantity", ""),
+                    line["price"] * line["quantity"] if line else "",
+                ]
+                row_list.append(
+                    writer.writerow(order_columns + line_columns + payment_columns)
+                )
+        yield "".join(row_list)
+
+
+def iter_jsonl(order_qs: QuerySet, batch_size: int) -> Iterator[str]:
+    # 주문 1건당 1줄이며 주문상품과 결제(meta 포함)를 중첩해서 담습니다.
+    for order_list in iter_order_batches(order_qs, batch_size):
+        yield "".join(
+            json.dumps(order, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n"
+            for order in order_list
+        )
+
+
+def iter_export(order_qs: QuerySet, fmt: str, batch_size: int = 500) -> Iterator[str]:
+    if fmt == "csv":
+        return iter_csv(order_qs, batch_size)
+    if fmt == "jsonl":
+        return iter_jsonl(order_qs, batch_size)
+    raise ValueError(f"지원하지 않는 형식입니다: {fmt}")
+
+
+def iter_encoded(chunks: Iterator[str], use_gzip: bool = False) -> Iterator[bytes]:
+    # gzip은 배치마다 압축한 만큼씩 내보내므로 압축 결과도 메모리에 쌓이지 않습니다.
+    compressor = zlib.compressobj(wbits=31) if use_gzip else None  # 31 : gzip 헤더 사용
+    for chunk in chunks:
+        data = chunk.encode("utf-8")
+        if compressor is None:
+            yield data
+            continue
+        compressed = compressor.compress(data)
+        if compressed:
+            yield compressed
+    if compressor is not None:
+        yield compressor.flush()
+
+
+def get_filename(fmt: str, use_gzip: bool = False) -> str:
+    filename = f"orders-{timezone.localtime():%Y%m%d-%H%M%S}.{fmt}"
+    return filename + ".gz" if use_gzip else filename
+
+
+def streaming_response(
+    order_qs: QuerySet, fmt: str, use_gzip: bool = False
+) -> StreamingHttpResponse:
+    content_type = {"csv": "text/csv", "jsonl": "application/x-ndjson"}[fmt]
+    response = StreamingHttpResponse(
+        iter_encoded(iter_export(order_qs, fmt), use_gzip),
+        content_type=(
+            "application/gzip" if use_gzip else f"{content_type}; charset=utf-8"
+        ),
+    )
+    response["Content-Disposition"] = (
+        f'attachment; filename="{get_filename(fmt, use_gzip)}"'
+    )
+    return response
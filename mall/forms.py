@@ -6,3 +6,28 @@ class CartProductForm(forms.ModelForm):
     class Meta:
         model = CartProduct
         fields = ["quantity"]
+
+
+class PriceChangeForm(forms.Form):
+    # 관리자 상품 가격 일괄 변경 (mall/bulk_actions.py change_product_price)
+    percent = forms.IntegerField(
+        label="변경 비율(%)",
+        required=False,
+        min_value=-99,
+        max_value=1000,
+        help_text="10 입력 시 10% 인상, -10 입력 시 10% 인하",
+    )
+    amount = forms.IntegerField(
+        label="변경 금액(원)",
+        required=False,
+        help_text="1000 입력 시 1000원 인상, -1000 입력 시 1000원 인하",
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if bool(cleaned_data.get("percent")) == bool(cleaned_data.get("amount")):
+            raise forms.ValidationError("변경 비율과 변경 금액 중 하나만 입력해주세요.")
+        return cleaned_data
+
+    def get_params(self) -> dict:
+        return {k: v for k, v in self.cleaned_data.items() if v}
@@ -0,0 +1,230 @@
+import csv
+import json
+from collections import defaultdict
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+from django.db import transaction
+from django.utils import timezone
+
+from mall import metrics, order_cache
+from mall.models import Order, OrderEvent
+
+# 물류센터 배송 상태 일괄 반영
+# 물류센터 파일(CSV/JSONL)의 행을 chunk_size 건씩 읽어서, 청크마다 한 트랜잭션으로
+#   1. 청크의 주문을 한 번에 잠그고 읽어 전이가 허용되는지 검사한 뒤
+#   2. (이전 상태, 변경 상태)별로 묶어 UPDATE 한 문장씩 실행하고
+#   3. 주문 이벤트(OrderEvent)를 bulk_create 합니다.
+# 파일은 한 줄씩 읽으므로 행 수와 상관없이 메모리 사용량이 청크 크기로 제한됩니다.
+# 배송 단계(PAID 이후)는 모두 매출에 잡히는 상태라서 매출 집계(mall/sales.py)는 바뀌지 않습니다.
+
+FORMATS = ("csv", "jsonl")
+
+# 배송 단계 순서. 앞 단계에서 뒤 단계로만 바꿀 수 있습니다. (물류센터가 중간 단계를 건너뛰고 보내는 경우 허용)
+FULFILLMENT_FLOW = [
+    Order.Status.PAID,
+    Order.Status.PREPARED_PRODUCT,
+    Order.Status.SHIPPED,
+    Order.Status.DELIVERED,
+]
+
+# 이벤트 payload에 함께 남기는 물류센터 값
+PAYLOAD_FIELDS = ("carrier", "tracking_number")
+
+
+def is_allowed(from_status: str, to_status: str) -> bool:
+    if from_status not in FULFILLMENT_FLOW or to_status not in FULFILLMENT_FLOW:
+        return False
+    return FULFILLMENT_FLOW.index(from_status) < FULFILLMENT_FLOW.index(to_status)
+
+
+@dataclass
+class Rejection:
+    line: int
+    order: str
+    reason: str
+
+    def as_dict(self) -> dict:
+        return {"line": self.line, "order": self.order, "reason": self.reason}
+
+
+@dataclass
+class TransitionResult:
+    updated_count: int = 0
+    unchanged_count: int = 0  # 이미 같은 상태 (같은 파일을 다시 보낸 경우)
+    rejected_count: int = 0
+    # (이전 상태, 변경 상태)별 변경 건수
+    transition_counts: Dict[Tuple[str, str], int] = field(
+        default_factory=lambda: defaultdict(int)
+    )
+
+    def as_dict(self) -> dict:
+        return {
+            "updated": self.updated_count,
+            "unchanged": self.unchanged_count,
+            "rejected": self.rejected_count,
+            "transitions": [
+                {"from": from_status, "to": to_status, "count": count}
+                for (from_status, to_status), count in self.transition_counts.items()
+            ],
+        }
+
+
+def decode_lines(byte_lines: Iterable[bytes]) -> Iterator[str]:
+    # UTF-8이 아닌 바이트는 대체 문자(U+FFFD)로 바꿔서, 요청 전체를 실패시키지 않고 해당 행만 거절합니다.
+    for line in byte_lines:
+        yield line.decode("utf-8-sig", errors="replace")
+
+
+def iter_rows(lines: Iterable[str], fmt: str) -> Iterator[Tuple[int, Optional[dict]]]:
+    # (줄 번호, 행) 을 하나씩 반환합니다. 읽을 수 없는 행은 None 으로 반환해서 거절 사유로 남깁니다.
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        for row in reader:
+            if any("\ufffd" in (value or "") for value in row.values()):
+                row = None
+            yield reader.line_num, row
+        return
+    for line_no, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = None if "\ufffd" in line else json.loads(line)
+        except ValueError:
+            row = None
+        yield line_no, row if isinstance(row, dict) else None
+
+
+def parse_order_key(row: dict):
+    # 주문은 주문번호(order_uid, 고객에게 보이는 번호) 또는 주문 id(order_id)로 지정합니다.
+    if row.get("order_uid"):
+        return "uid", UUID(str(row["order_uid"]))
+    return "pk", int(row["order_id"])
+
+
+def apply_chunk(
+    row_list: List[Tuple[int, Optional[dict]]],
+    result: TransitionResult,
+    reject: Callable[[Rejection], None],
+    source: str,
+) -> None:
+    parsed_list = []
+    for line_no, row in row_list:
+        if row is None:
+            reject(Rejection(line_no, "", "읽을 수 없는 행"))
+            continue
+        order_label = str(row.get("order_uid") or row.get("order_id") or "")
+        try:
+            key = parse_order_key(row)
+        except (KeyError, TypeError, ValueError):
+            reject(Rejection(line_no, order_label, "잘못된 주문번호"))
+            continue
+        parsed_list.append((line_no, row, order_label, key))
+
+    uid_list = [key[1] for *__, key in parsed_list if key[0] == "uid"]
+    pk_list = [key[1] for *__, key in parsed_list if key[0] == "pk"]
+    now = timezone.now()
+
+    with transaction.atomic():
+        # 청크의 주문을 한 번에 잠가서, 검사한 상태가 UPDATE 할 때까지 바뀌지 않도록 합니다.
+        order_dict = {}
+        for lookup, values in (("uid__in", uid_list), ("pk__in", pk_list)):
+            if not values:
+                continue
+            order_qs = Order.objects.select_for_update().filter(**{lookup: values})
+            for pk, uid, status, user_id in order_qs.values_list(
+                "pk", "uid", "status", "user_id"
+            ):
+                # 주문번호/주문 id 어느 쪽으로 찾아도 같은 [pk, 현재 상태, 주문자] 목록을 가리킵니다.
+                order = order_dict.setdefault(("pk", pk), [pk, status, user_id])
+                order_dict["uid", uid] = order
+
+        # 같은 주문이 청크에 여러 번 있으면 앞의 행부터 차례로 반영한 결과로 검사합니다.
+        from_status_dict = {}  # 주문 pk: 청크 처리 전 상태
+        event_list = []
+        for line_no, row, order_label, key in parsed_list:
+            order = order_dict.get(key)
+            to_status = row.get("status")
+            if order is None:
+                reject(Rejection(line_no, order_label, "주문 없음"))
+                continue
+            pk, status, __ = order
+            if to_status == status:
+                result.unchanged_count += 1
+                continue
+            if not is_allowed(status, to_status):
+                reject(
+                    Rejection(
+                        line_no,
+                        order_label,
+                        f"허용되지 않는 변경 {status} → {to_status}",
+                    )
+                )
+                continue
+            from_status_dict.setdefault(pk, status)
+            order[1] = to_status
+            payload = {"source": source}
+            payload.update(
+                (name, row[name]) for name in PAYLOAD_FIELDS if row.get(name)
+            )
+            event_list.append(
+                OrderEvent(
+                    event_type=OrderEvent.Type.ORDER_STATUS_CHANGED,
+                    order_id=pk,
+                    from_status=status,
+                    to_status=to_status,
+                    payload=payload,
+                )
+            )
+
+        group_dict = defaultdict(list)
+        for pk, from_status in from_status_dict.items():
+            to_status = order_dict["pk", pk][1]
+            group_dict[from_status, to_status].append(pk)
+        for (from_status, to_status), group_pk_list in group_dict.items():
+            # update()는 auto_now가 동작하지 않으므로 updated_at을 직접 지정합니다.
+            Order.objects.filter(pk__in=group_pk_list).update(
+                status=to_status, updated_at=now
+            )
+            result.transition_counts[from_status, to_status] += len(group_pk_list)
+            result.updated_count += len(group_pk_list)
+        OrderEvent.objects.bulk_create(event_list)
+        # update()는 시그널이 없으므로 주문내역 화면 캐시의 상태 값을 직접 갱신합니다.
+        changed_list = [order_dict["pk", pk] for pk in from_status_dict]
+        order_cache.set_states_on_commit(
+            order_cache.make_state(pk, user_id, status, now)
+            for pk, status, user_id in changed_list
+        )
+
+
+def apply_transitions(
+    rows: Iterable[Tuple[int, Optional[dict]]],
+    chunk_size: int = 1000,
+    reject: Optional[Callable[[Rejection], None]] = None,
+    source: str = "fulfillment",
+) -> TransitionResult:
+    result = TransitionResult()
+
+    def on_reject(rejection: Rejection) -> None:
+        result.rejected_count += 1
+        if reject:
+            reject(rejection)
+
+    rows = iter(rows)
+    while True:
+        row_list = list(islice(rows, chunk_size))
+        if not row_list:
+            break
+        updated, rejected = result.updated_count, result.rejected_count
+        apply_chunk(row_list, result, on_reject, source)
+        metrics.inc(
+            "fulfillment_rows_total", result.updated_count - updated, outcome="updated"
+        )
+        metrics.inc(
+            "fulfillment_rows_total",
+            result.rejected_count - rejected,
+            outcome="rejected",
+        )
+    return result
@@ -0,0 +1,178 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from mall import metrics
+from mall.models import Category, Product
+
+# 프로세스 메모리 조회 캐시
+# 거의 바뀌지 않는 분류(Category)와, 장바구니 담기에서 확인하는 상품 요약(상태/가격/이름)을
+# 워커 프로세스 메모리에 LRU로 두고 DB 조회 없이 꺼냅니다.
+#
+# 무효화
+# 캐시마다 공유 캐시에 버전 값을 두고, LOCAL_CACHE_VERSION_CHECK_INTERVAL 초마다 버전을 확인해서 바뀌었으면 모두 비웁니다.
+# 변경을 저장한 프로세스는 바로 비우고, 다른 워커는 확인 주기만큼 늦게 반영합니다.
+# 다른 워커에도 반영되려면 CACHE_URL로 공유 캐시(redis/memcached)를 지정해야 합니다.
+# 공유 캐시가 없어도(기본 locmem) 항목은 LOCAL_CACHE_MAX_AGE 초가 지나면 다시 읽으므로, 늦어도 그 시간 안에 반영됩니다.
+
+
+class LocalCache:
+    def __init__(self, name: str, maxsize: int):
+        self.name = name
+        self.maxsize = maxsize
+        self.version_key = f"local_cache:version:{name}"
+        # 키 → (값, 저장 시각)
+        self.entries: "OrderedDict[Hashable, Tuple[object, float]]" = OrderedDict()
+        self.version = None
+        self.checked_at = 0.0
+        self.lock = threading.Lock()
+
+    def clear(self, version) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.version = version
+            self.checked_at = time.monotonic()
+
+    def check_version(self) -> None:
+        if (
+            time.monotonic() - self.checked_at
+            < settings.LOCAL_CACHE_VERSION_CHECK_INTERVAL
+        ):
+            return
+        # 버전 키가 캐시에서 밀려난 경우에도 이전 버전과 겹치지 않도록 시각 값을 씁니다.
+        cache.add(self.version_key, time.time_ns(), timeout=None)
+        version = cache.get(self.version_key)
+        if version != self.version:
+            self.clear(version)
+        else:
+            self.checked_at = time.monotonic()
+
+    def get_many(
+        self, keys: Iterable[Hashable], loader: Callable[[List], Dict]
+    ) -> Dict[Hashable, object]:
+        # loader : 캐시에 없는 키 목록을 받아 {키: 값}을 반환합니다. 없는 키는 빼고 반환하며, 다음 조회에서 다시 읽습니다.
+        self.check_version()
+        found, missing = {}, []
+        now = time.monotonic()
+        expired = now - settings.LOCAL_CACHE_MAX_AGE
+        with self.lock:
+            version = self.version
+            for key in keys:
+                entry = self.entries.get(key)
+                if entry is not None and entry[1] >= expired:
+                    self.entries.move_to_end(key)
+                    found[key] = entry[0]
+                elif key not in missing:
+                    missing.append(key)
+        if found:
+            metrics.inc(
+                "local_cache_requests_total", len(found), cache=self.name, result="hit"
+            )
+        if not missing:
+            return found
+
+        metrics.inc(
+            "local_cache_requests_total", len(missing), cache=self.name, result="miss"
+        )
+        loaded = loader(missing)
+        with self.lock:
+            # 읽는 동안 무효화되었으면 이전 값일 수 있으므로 저장하지 않습니다.
+            if self.version == version:
+                for key, value in loaded.items():
+                    self.entries[key] = (value, now)
+                    self.entries.move_to_end(key)
+                while len(self.entries) > self.maxsize:
+                    self.entries.popitem(last=False)
+        found.update(loaded)
+        return found
+
+    def get(self, key: Hashable, loader: Callable[[List], Dict]) -> Optional[object]:
+        return self.get_many([key], loader).get(key)
+
+    def invalidate(self) -> None:
+        version = time.time_ns()
+        cache.set(self.version_key, version, timeout=None)
+        self.clear(version)
+
+    def invalidate_on_commit(self) -> None:
+        # 커밋 전에 비우면 다른 요청이 아직 커밋되지 않은 이전 값을 다시 읽어 둘 수 있습니다.
+        transaction.on_commit(self.invalidate)
+
+
+category_cache = LocalCache("category", maxsize=settings.LOCAL_CACHE_CATEGORY_SIZE)
+product_cache = LocalCache("product", maxsize=settings.LOCAL_CACHE_PRODUCT_SIZE)
+
+
+@dataclass(frozen=True)
+class ProductSnapshot:
+    pk: int
+    name: str
+    price: int
+    status: str
+    category_id: int
+
+    @property
+    def is_active(self) -> bool:
+        return self.status == Product.Status.ACTIVE
+
+
+def load_categories(keys: List) -> Dict:
+    # 키는 ("id", pk) 또는 ("name", 이름)입니다. 같은 인스턴스를 두 키로 저장합니다.
+    pk_list = [value for kind, value in keys if kind == "id"]
+    name_list = [value for kind, value in keys if kind == "name"]
+    loaded = {}
+    for category in Category.objects.filter(Q(pk__in=pk_list) | Q(name__in=name_list)):
+        loaded["id", category.pk] = loaded["name", category.name] = category
+    return loaded
+
+
+def get_categories(pk_list: Iterable[int]) -> Dict[int, Category]:
+    # 캐시된 인스턴스는 여러 요청이 같이 쓰므로 읽기 전용으로만 써주세요.
+    found = category_cache.get_many([("id", pk) for pk in pk_list], load_categories)
+    return {pk: category for (kind, pk), category in found.items() if kind == "id"}
+
+
+def get_category_by_name(name: str) -> Optional[Category]:
+    return category_cache.get(("name", name), load_categories)
+
+
+def attach_categories(products: Iterable[Product]) -> None:
+    # select_related("category") 대신 캐시된 분류를 상품에 붙여서 목록 쿼리의 조인을 없앱니다.
+    products = list(products)
+    categories = get_categories({product.category_id for product in products})
+    for product in products:
+        category = categories.get(product.category_id)
+        if category is not None:
+            product.category = category
+
+
+def load_products(pk_list: List) -> Dict:
+    product_qs = Product.objects.filter(pk__in=pk_list).values_list(
+        "pk", "name", "price", "status", "category_id"
+    )
+    return {row[0]: ProductSnapshot(*row) for row in product_qs}
+
+
+def get_product(pk: int) -> Optional[ProductSnapshot]:
+    return product_cache.get(pk, load_products)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_categories(sender, **kwargs):
+    category_cache.invalidate_on_commit()
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_products(sender, **kwargs):
+    product_cache.invalidate_on_commit()
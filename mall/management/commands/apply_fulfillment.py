@@ -0,0 +1,61 @@
+import csv
+import sys
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+from mall import fulfillment
+
+
+class Command(BaseCommand):
+    help = "Apply warehouse order status updates (CSV/JSONL) in bulk"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path",
+            help="물류센터 파일 경로 (- 이면 표준입력). 열: order_uid 또는 order_id, status",
+        )
+        parser.add_argument(
+            "--format", choices=fulfillment.FORMATS, help="생략하면 확장자로 정합니다."
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=settings.FULFILLMENT_CHUNK_SIZE
+        )
+        parser.add_argument(
+            "--rejects", help="거절된 행을 CSV로 저장할 경로 (생략하면 표준에러)"
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or ("jsonl" if path.endswith(".jsonl") else "csv")
+        if path == "-" and not options["format"]:
+            raise CommandError("표준입력을 읽을 때는 --format을 지정해주세요.")
+
+        rejects_path = options["rejects"]
+        input_file = (
+            open(path, encoding="utf-8-sig", errors="replace", newline="")
+            if path != "-"
+            else nullcontext(sys.stdin)
+        )
+        rejects_file = (
+            open(rejects_path, "w", encoding="utf-8", newline="")
+            if rejects_path
+            else nullcontext(sys.stderr)
+        )
+        with input_file as f, rejects_file as out:
+            writer = csv.writer(out)
+            writer.writerow(["line", "order", "reason"])
+            result = fulfillment.apply_transitions(
+                fulfillment.iter_rows(f, fmt),
+                chunk_size=options["chunk_size"],
+                reject=lambda r: writer.writerow([r.line, r.order, r.reason]),
+                source=f"file:{path}",
+            )
+
+        for (from_status, to_status), count in result.transition_counts.items():
+            self.stdout.write(f"{from_status} → {to_status}: {count}건")
+        self.stdout.write(
+            f"변경 {result.updated_count}건, 변경없음 {result.unchanged_count}건, "
+            f"거절 {result.rejected_count}건"
+        )
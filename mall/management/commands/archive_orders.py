@@ -0,0 +1,38 @@
+import time
+
+from django.conf import settings
+from django.core.management import BaseCommand
+
+from mall import archive
+
+
+class Command(BaseCommand):
+    help = "Move old delivered/canceled orders with their lines and payments to archive tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.ORDER_ARCHIVE_AFTER_DAYS,
+            help="이 기간(일) 동안 변경이 없던 종료 주문을 옮깁니다.",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=500, help="한 트랜잭션에서 옮길 주문 수"
+        )
+        parser.add_argument("--limit", type=int, help="이번 실행에서 옮길 최대 주문 수")
+        parser.add_argument(
+            "--loop", action="store_true", help="종료하지 않고 주기적으로 옮깁니다."
+        )
+        parser.add_argument("--interval", type=float, default=3600.0)
+
+    def handle(self, *args, **options):
+        while True:
+            count = archive.archive_orders(
+                days=options["days"],
+                batch_size=options["batch_size"],
+                limit=options["limit"],
+            )
+            self.stdout.write(f"주문 {count}건을 보관 테이블로 옮겼습니다.")
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,123 @@
+import random
+import statistics
+import time
+import tracemalloc
+
+from django.core.management import BaseCommand
+
+from mall.autocomplete import Autocomplete, get_keys
+from mall.models import Category, Product
+
+# 자동완성 색인 메모리/응답시간 측정
+# 상품 이름을 --products 개 만들어(--from-db 이면 DB의 판매중 상품으로) 색인을 만들고,
+# tracemalloc으로 잰 색인 크기를 상품 10만 개 기준으로 환산해서 보여줍니다.
+# 검색 시간은 상품 이름에서 뽑은 1~3글자 접두어와 자모 단위 접두어로 잽니다.
+
+WORDS = [
+    "사과",
+    "배",
+    "감귤",
+    "한라봉",
+    "딸기",
+    "청송",
+    "유기농",
+    "국산",
+    "닭가슴살",
+    "훈제",
+    "샐러드",
+    "우유",
+    "두유",
+    "견과류",
+    "믹스",
+    "선물세트",
+    "무농약",
+    "냉동",
+    "생수",
+    "커피",
+    "원두",
+    "드립백",
+    "녹차",
+    "홍차",
+    "쌀",
+    "현미",
+    "잡곡",
+    "김치",
+    "된장",
+    "고추장",
+    "premium",
+    "organic",
+]
+
+
+def make_name(rng: random.Random, index: int) -> str:
+    words = rng.sample(WORDS, rng.randint(2, 4))
+    return f"{' '.join(words)} {rng.choice(['1kg', '2kg', '500g', '10개입'])} {index}"
+
+
+class Command(BaseCommand):
+    help = "Measure autocomplete index memory (per 100k products) and lookup latency"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=100000)
+        parser.add_argument("--from-db", action="store_true")
+        parser.add_argument("--queries", type=int, default=2000)
+        parser.add_argument("--limit", type=int, default=8)
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        if options["from_db"]:
+            product_rows = list(
+                Product.objects.filter(status=Product.Status.ACTIVE)
+                .values_list("pk", "name", "category_id")
+                .order_by()
+            )
+            categories = dict(Category.objects.values_list("pk", "name"))
+        else:
+            product_rows = [
+                (pk, make_name(rng, pk), pk % 20 + 1)
+                for pk in range(1, options["products"] + 1)
+            ]
+            categories = {pk: f"분류 {pk}" for pk in range(1, 21)}
+        if not product_rows:
+            self.stdout.write("상품이 없습니다.")
+            return
+
+        # 상품 이름 문자열은 색인 밖(DB 결과)에서도 쓰므로 색인이 새로 만드는 객체만 잽니다.
+        # tracemalloc을 켜면 느려지므로 만드는 시간은 따로 잽니다.
+        started = time.perf_counter()
+        Autocomplete.from_rows(0, product_rows, categories)
+        build_seconds = time.perf_counter() - started
+        tracemalloc.start()
+        index = Autocomplete.from_rows(0, product_rows, categories)
+        index_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        prefix_list = []
+        for __ in range(options["queries"]):
+            name = rng.choice(product_rows)[1]
+            if rng.random() < 0.5:
+                prefix_list.append(name[: rng.randint(1, 3)])
+            else:
+                # 입력 중인 글자(자모 단위)와 두 번째 이후 단어로 찾는 경우
+                prefix_list.append(rng.choice(get_keys(name))[: rng.randint(1, 6)])
+        timings = []
+        for prefix in prefix_list:
+            started = time.perf_counter()
+            index.search(prefix, options["limit"])
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+
+        count = len(product_rows)
+        entries = len(index.name_index) + len(index.word_index)
+        self.stdout.write(
+            f"상품 {count:,}개, 색인 항목 {entries:,}개, 만드는 시간 {build_seconds:.2f}s"
+        )
+        self.stdout.write(
+            f"메모리 {index_bytes / 1024 / 1024:.1f}MB "
+            f"(상품 10만 개당 {index_bytes / count * 100000 / 1024 / 1024:.1f}MB)"
+        )
+        self.stdout.write(
+            f"검색 {len(timings)}회: 평균 {statistics.mean(timings):.3f}ms, "
+            f"p50 {timings[len(timings) // 2]:.3f}ms, "
+            f"p99 {timings[int(len(timings) * 0.99)]:.3f}ms, 최대 {timings[-1]:.3f}ms"
+        )
@@ -0,0 +1,166 @@
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+# 새 파이썬 프로세스에서 WSGI 앱을 띄우고 첫 요청을 처리할 때까지를 측정하는 스크립트
+# 현재 프로세스는 이미 Django를 읽었으므로 측정에 쓸 수 없습니다.
+# 운영 워커와 같이 mysite.wsgi를 import 하므로 기동 시 작업(자동완성 색인 등)도 측정에 포함됩니다.
+# URLconf와 뷰 모듈은 첫 요청에서 import 되므로, 로딩된 모듈은 첫 요청 응답 후에 수집합니다.
+CHILD_SCRIPT = """
+import json, resource, sys, time
+
+started = time.perf_counter()
+from mysite.wsgi import application
+
+boot = time.perf_counter() - started
+
+from wsgiref.util import setup_testing_defaults
+
+environ = {"REQUEST_METHOD": "GET", "PATH_INFO": sys.argv[1]}
+setup_testing_defaults(environ)
+status_list = []
+response = application(environ, lambda status, headers, exc_info=None: status_list.append(status))
+b"".join(response)
+response.close()
+first_request = time.perf_counter() - started
+loaded_modules = set(sys.modules)
+
+# 리눅스는 KB, macOS는 byte 단위입니다.
+max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == "darwin":
+    max_rss //= 1024
+
+print(json.dumps({
+    "boot": boot,
+    "first_request": first_request,
+    "status": status_list[0] if status_list else "",
+    "rss_kb": max_rss,
+    "loaded_modules": sorted(loaded_modules),
+}))
+"""
+
+# 첫 요청까지 import 여부를 보고하는 무거운 모듈
+WATCHED_MODULES = [
+    "iamport",
+    "requests",
+    "rest_framework",
+    "debug_toolbar",
+    "sorl.thumbnail",
+    "PIL.Image",
+    "mall_test",
+]
+
+IMPORTTIME_RE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+class Command(BaseCommand):
+    help = "Measure worker startup: import time, time to first served request, RSS"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default="/", help="첫 요청으로 보낼 경로")
+        parser.add_argument("--runs", type=int, default=5)
+        parser.add_argument(
+            "--top", type=int, default=15, help="import 시간 상위 패키지 출력 개수"
+        )
+        parser.add_argument("--max-first-request-ms", type=float)
+        parser.add_argument("--max-rss-mb", type=float)
+        parser.add_argument(
+            "--forbid",
+            action="append",
+            default=[],
+            help="첫 요청까지 import 되면 실패로 처리할 모듈 (복수 지정 가능)",
+        )
+        parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+
+    def run_child(self, path, importtime=False):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE)
+        command = [sys.executable]
+        if importtime:
+            command += ["-X", "importtime"]
+        command += ["-c", CHILD_SCRIPT, path]
+        completed = subprocess.run(
+            command,
+            env=env,
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+        )
+        if completed.returncode != 0:
+            raise CommandError(completed.stderr.strip().splitlines()[-1])
+        return json.loads(completed.stdout.strip().splitlines()[-1]), completed.stderr
+
+    def handle(self, *args, **options):
+        result_list = [
+            self.run_child(options["path"])[0] for _ in range(options["runs"])
+        ]
+
+        # -X importtime은 측정 자체에 오버헤드가 있으므로 별도 실행에서 수집합니다.
+        _, stderr = self.run_child(options["path"], importtime=True)
+        top_imports = []
+        for line in stderr.splitlines():
+            match = IMPORTTIME_RE.match(line)
+            # 들여쓰기가 없는 줄이 최상위 import 입니다.
+            if match and len(match.group(3)) == 1:
+                top_imports.append((match.group(4), int(match.group(2)) / 1000))
+        top_imports.sort(key=lambda row: row[1], reverse=True)
+
+        loaded_modules = set(result_list[0]["loaded_modules"])
+        report = {
+            "settings": settings.SETTINGS_MODULE,
+            "path": options["path"],
+            "status": result_list[0]["status"],
+            "runs": options["runs"],
+            "boot_ms": statistics.median(r["boot"] for r in result_list) * 1000,
+            "first_request_ms": statistics.median(
+                r["first_request"] for r in result_list
+            )
+            * 1000,
+            "rss_mb": statistics.median(r["rss_kb"] for r in result_list) / 1024,
+            "module_count": len(loaded_modules),
+            "watched_modules": {
+                name: name in loaded_modules for name in WATCHED_MODULES
+            },
+            "top_imports_ms": top_imports[: options["top"]],
+        }
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
+        else:
+            self.stdout.write(f"settings: {report['settings']}")
+            self.stdout.write(f"GET {report['path']} → {report['status']}")
+            self.stdout.write(f"기동(WSGI 앱 로딩): {report['boot_ms']:.1f} ms")
+            self.stdout.write(f"첫 요청 응답까지: {report['first_request_ms']:.1f} ms")
+            self.stdout.write(f"최대 RSS: {report['rss_mb']:.1f} MB")
+            self.stdout.write(f"첫 요청까지 로딩된 모듈 수: {report['module_count']}")
+            for name, loaded in report["watched_modules"].items():
+                self.stdout.write(f"  {name}: {'로딩됨' if loaded else '-'}")
+            self.stdout.write("import 시간 상위 패키지 (cumulative)")
+            for name, ms in report["top_imports_ms"]:
+                self.stdout.write(f"  {ms:8.1f} ms  {name}")
+
+        errors = []
+        # 에러 화면을 잰 결과는 비교할 수 없으므로 실패로 처리합니다. (예: collectstatic 없이 운영 설정으로 실행)
+        for status in {r["status"] for r in result_list}:
+            code = status.split(" ", 1)[0]
+            if not (code.isdigit() and 200 <= int(code) < 400):
+                errors.append(
+                    f"GET {options['path']} 응답이 {status or '없음'} 입니다."
+                )
+        max_first_request_ms = options["max_first_request_ms"]
+        if max_first_request_ms and report["first_request_ms"] > max_first_request_ms:
+            errors.append(
+                f"첫 요청 응답 시간 {report['first_request_ms']:.1f} ms > {max_first_request_ms} ms"
+            )
+        if options["max_rss_mb"] and report["rss_mb"] > options["max_rss_mb"]:
+            errors.append(f"RSS {report['rss_mb']:.1f} MB > {options['max_rss_mb']} MB")
+        for name in options["forbid"]:
+            if name in loaded_modules:
+                errors.append(f"첫 요청까지 {name} 모듈이 import 되었습니다.")
+        if errors:
+            raise CommandError("\n".join(errors))
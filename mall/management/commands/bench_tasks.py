@@ -0,0 +1,74 @@
+import multiprocessing
+import time
+
+from django.core.management import BaseCommand
+from django.db import connection, connections
+
+from mall.models import Task
+from mall.taskqueue import Worker, task
+
+# 작업 큐 처리량 측정
+# 빈 작업(bench_noop)을 --jobs 건 넣고 워커 프로세스 --processes 개가 모두 처리하는 데 걸린 시간을 잽니다.
+# 별도 큐(bench)를 쓰므로 운영 워커가 가져가지 않고, 측정이 끝나면 남은 작업을 지웁니다.
+# SKIP LOCKED 경로(MySQL 8/PostgreSQL)와 SQLite 경로는 성능이 크게 다르므로 운영과 같은 DB에서 측정해주세요.
+
+QUEUE = "bench"
+
+
+@task(name="bench_noop", queue=QUEUE)
+def bench_noop(index: int) -> None:
+    pass
+
+
+def run_worker(batch_size: int, result_queue) -> None:
+    worker = Worker(queues=[QUEUE], batch_size=batch_size, burst=True)
+    try:
+        result_queue.put(worker.run())
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Measure task queue throughput (jobs/sec) with several worker processes"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--jobs", type=int, default=20000)
+        parser.add_argument("--processes", type=int, default=4)
+        parser.add_argument("--batch-size", type=int, default=100)
+
+    def handle(self, *args, **options):
+        Task.objects.filter(queue=QUEUE).delete()
+
+        started = time.perf_counter()
+        bench_noop.enqueue_many({"index": i} for i in range(options["jobs"]))
+        enqueue_seconds = time.perf_counter() - started
+
+        context = multiprocessing.get_context("fork")
+        result_queue = context.Queue()
+        connections.close_all()
+        process_list = [
+            context.Process(
+                target=run_worker, args=(options["batch_size"], result_queue)
+            )
+            for _ in range(options["processes"])
+        ]
+        started = time.perf_counter()
+        for process in process_list:
+            process.start()
+        processed_list = [result_queue.get() for _ in process_list]
+        for process in process_list:
+            process.join()
+        run_seconds = time.perf_counter() - started
+
+        remaining = Task.objects.filter(queue=QUEUE).count()
+        Task.objects.filter(queue=QUEUE).delete()
+        processed = sum(processed_list)
+        self.stdout.write(f"DB: {connection.vendor}")
+        self.stdout.write(
+            f"enqueue: {options['jobs']}건 {enqueue_seconds:.2f}s "
+            f"({options['jobs'] / enqueue_seconds:,.0f} jobs/s)"
+        )
+        self.stdout.write(
+            f"run: {processed}건 {run_seconds:.2f}s ({processed / run_seconds:,.0f} jobs/s), "
+            f"프로세스별 {processed_list}, 남은 작업 {remaining}건"
+        )
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management import BaseCommand
+
+from mall import catalog_feed
+
+
+class Command(BaseCommand):
+    help = "Write sharded sitemaps and the gzip product feed, rewriting only changed shards"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="바뀌지 않은 조각까지 모두 다시 씁니다.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--loop", action="store_true", help="종료하지 않고 주기적으로 반영합니다."
+        )
+        parser.add_argument("--interval", type=float, default=600.0)
+
+    def handle(self, *args, **options):
+        full = options["full"]
+        while True:
+            result = catalog_feed.generate(full=full, batch_size=options["batch_size"])
+            self.stdout.write(
+                f"조각 {result.shard_count}개 중 {len(result.written_shards)}개를 다시 썼습니다. "
+                f"(상품 {result.product_count}개, 삭제된 조각 {len(result.removed_shards)}개)"
+            )
+            if not options["loop"]:
+                break
+            full = False
+            time.sleep(options["interval"])
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management import BaseCommand
+
+from mall import recommendations
+
+
+class Command(BaseCommand):
+    help = "Build frequently-bought-together product recommendations from paid orders"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="전체 주문으로 다시 계산합니다. (처음 실행할 때와 점수를 바로잡을 때)",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--loop", action="store_true", help="종료하지 않고 주기적으로 반영합니다."
+        )
+        parser.add_argument("--interval", type=float, default=60.0)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        if options["full"]:
+            product_count, pair_count = recommendations.rebuild(batch_size=batch_size)
+            self.stdout.write(
+                f"상품 {product_count}개, 상품 쌍 {pair_count}개로 추천을 다시 만들었습니다."
+            )
+
+        while True:
+            count = 0
+            while True:
+                applied = recommendations.update_incremental(batch_size)
+                count += applied
+                if applied < batch_size:
+                    break
+            if count:
+                self.stdout.write(f"주문 이벤트 {count}건을 반영했습니다.")
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,61 @@
+from django.core.management import BaseCommand, CommandError
+from tqdm import tqdm
+
+from mall.cancellation import create_job, run_job
+from mall.models import CancellationItem, CancellationJob, OrderPayment
+
+
+class Command(BaseCommand):
+    help = "Cancel many OrderPayments through PortOne (resumable)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--order-ids", type=int, nargs="+", default=[])
+        parser.add_argument("--payment-ids", type=int, nargs="+", default=[])
+        parser.add_argument("--reason", default="")
+        parser.add_argument(
+            "--job", type=int, help="중단된 작업을 남은 항목부터 다시 실행합니다."
+        )
+        parser.add_argument(
+            "--retry-failed", action="store_true", help="실패한 항목도 다시 시도합니다."
+        )
+        parser.add_argument("--workers", type=int, help="동시 호출 수")
+        parser.add_argument("--rate", type=float, help="초당 포트원 호출 수")
+        parser.add_argument("--batch-size", type=int, default=100)
+
+    def handle(self, *args, **options):
+        if options["job"]:
+            try:
+                job = CancellationJob.objects.get(pk=options["job"])
+            except CancellationJob.DoesNotExist:
+                raise CommandError(f"작업을 찾을 수 없습니다: {options['job']}")
+        else:
+            if not options["reason"]:
+                raise CommandError("--reason 을 지정해주세요.")
+            if not (options["order_ids"] or options["payment_ids"]):
+                raise CommandError("--order-ids 또는 --payment-ids 를 지정해주세요.")
+            # 결제완료된 결제시도만 취소 대상입니다.
+            payment_qs = OrderPayment.objects.filter(is_paid_ok=True)
+            if options["order_ids"]:
+                payment_qs = payment_qs.filter(order_id__in=options["order_ids"])
+            if options["payment_ids"]:
+                payment_qs = payment_qs.filter(pk__in=options["payment_ids"])
+            job = create_job(payment_qs, options["reason"])
+            self.stdout.write(f"작업 {job.pk} 생성: {job.total_count}건")
+
+        status_list = [CancellationItem.Status.PENDING]
+        if options["retry_failed"]:
+            status_list.append(CancellationItem.Status.FAILED)
+        remaining = job.item_set.filter(status__in=status_list).count()
+        with tqdm(total=remaining) as progress_bar:
+            job = run_job(
+                job,
+                workers=options["workers"],
+                rate=options["rate"],
+                batch_size=options["batch_size"],
+                retry_failed=options["retry_failed"],
+                progress=progress_bar.update,
+            )
+        self.stdout.write(
+            f"작업 {job.pk}: 취소 {job.canceled_count}건, 실패 {job.failed_count}건, "
+            f"제외 {job.skipped_count}건"
+        )
@@ -3,6 +3,7 @@ from django.core.management import BaseCommand
 import requests
 from dataclasses import dataclass
 from mall.models import Category, Product
+from mall.tasks import download_product_photo
 from tqdm import tqdm
 
 BASE_URL = "https://raw.githubusercontent.com/pyhub-kr/dump-data/main/django-shopping-with-iamport/"
@@ -21,6 +22,13 @@ class Item:
 class Command(BaseCommand):
     help = "Load products from JSON file"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--defer-photos",
+            action="store_true",
+            help="사진은 작업 큐(run_tasks --queue media)에서 내려받습니다.",
+        )
+
     def handle(self, *args, **options):
         json_url = BASE_URL + "product-list.json"
         item_dict_list = requests.get(json_url).json()
@@ -71,6 +79,10 @@ class Command(BaseCommand):
             )
             if is_created:  # 생성 되었을 경우에 값 지정 해서 save
                 photo_url = BASE_URL + item.photo_path
+                if options["defer_photos"]:
+                    # 여러 워커가 나눠서 동시에 내려받습니다.
+                    download_product_photo.enqueue(product_id=product.pk, url=photo_url)
+                    continue
                 filename = photo_url.rsplit("/", 1)[-1]
                 photo_data = requests.get(
                     photo_url
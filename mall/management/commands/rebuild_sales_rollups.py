@@ -0,0 +1,25 @@
+import datetime
+
+from django.core.management import BaseCommand
+
+from mall import sales
+
+
+class Command(BaseCommand):
+    help = "Rebuild daily product/category sales rollups from orders"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--since", type=datetime.date.fromisoformat, help="시작일 (YYYY-MM-DD)"
+        )
+        parser.add_argument(
+            "--until", type=datetime.date.fromisoformat, help="종료일 (YYYY-MM-DD)"
+        )
+
+    def handle(self, *args, **options):
+        product_count, category_count = sales.rebuild(
+            since=options["since"], until=options["until"]
+        )
+        self.stdout.write(
+            f"상품 집계 {product_count}건, 분류 집계 {category_count}건을 다시 만들었습니다."
+        )
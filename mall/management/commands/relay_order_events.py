@@ -0,0 +1,39 @@
+import time
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+from mall.events import get_sinks, relay
+
+
+class Command(BaseCommand):
+    help = "Publish OrderEvent outbox to configured sinks in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=settings.ORDER_EVENT_RELAY_BATCH_SIZE
+        )
+        parser.add_argument(
+            "--sink", action="append", help="전달할 싱크 이름 (복수 지정 가능)"
+        )
+        parser.add_argument(
+            "--loop", action="store_true", help="종료하지 않고 주기적으로 전달합니다."
+        )
+        parser.add_argument("--interval", type=float, default=1.0)
+
+    def handle(self, *args, **options):
+        sinks = get_sinks()
+        if options["sink"]:
+            unknown = set(options["sink"]) - set(sinks)
+            if unknown:
+                raise CommandError(f"알 수 없는 싱크: {', '.join(sorted(unknown))}")
+            sinks = {name: sinks[name] for name in options["sink"]}
+
+        while True:
+            published = relay(sinks, options["batch_size"])
+            for name, count in published.items():
+                if count:
+                    self.stdout.write(f"{name}: {count}건 전달")
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
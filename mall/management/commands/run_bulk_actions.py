@@ -0,0 +1,62 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from django.db.models import Q
+from django.utils import timezone
+from tqdm import tqdm
+
+from mall.bulk_actions import run_job
+from mall.models import BulkActionJob
+
+
+class Command(BaseCommand):
+    help = "Run pending admin bulk jobs and resume interrupted ones"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--job", type=int, help="지정한 작업만 실행합니다.")
+        parser.add_argument("--chunk-size", type=int, help="청크(트랜잭션)당 건수")
+        parser.add_argument(
+            "--loop", action="store_true", help="종료하지 않고 새 작업을 기다립니다."
+        )
+        parser.add_argument("--interval", type=float, default=5, help="대기 간격(초)")
+
+    def get_runnable_jobs(self):
+        # 대기 작업과, 실행하던 프로세스가 죽어 진행이 멈춘 작업
+        stale = timezone.now() - timedelta(seconds=settings.BULK_ACTION_STALE_SECONDS)
+        return (
+            BulkActionJob.objects.filter(
+                Q(status=BulkActionJob.Status.PENDING)
+                | Q(status=BulkActionJob.Status.RUNNING, updated_at__lt=stale)
+            )
+            .order_by("pk")
+            .defer("target_ranges")
+        )
+
+    def run(self, job, chunk_size):
+        remaining = max(job.total_count - job.processed_count, 0)
+        with tqdm(total=remaining, desc=f"작업 {job.pk}") as progress_bar:
+            job = run_job(
+                job, chunk_size=chunk_size, resume=True, progress=progress_bar.update
+            )
+        self.stdout.write(
+            f"작업 {job.pk}: {job.get_status_display()} "
+            f"(처리 {job.processed_count}건, 변경 {job.changed_count}건)"
+        )
+
+    def handle(self, *args, **options):
+        if options["job"]:
+            try:
+                job = BulkActionJob.objects.get(pk=options["job"])
+            except BulkActionJob.DoesNotExist:
+                raise CommandError(f"작업을 찾을 수 없습니다: {options['job']}")
+            self.run(job, options["chunk_size"])
+            return
+
+        while True:
+            for job in self.get_runnable_jobs():
+                self.run(job, options["chunk_size"])
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,66 @@
+import multiprocessing
+import signal
+
+from django.core.management import BaseCommand
+from django.db import connections
+
+from mall.taskqueue import Worker
+
+
+def run_worker(options: dict, stop_event) -> int:
+    # SIGTERM/SIGINT를 받으면 실행중인 배치까지만 마치고 종료합니다.
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *args: stop_event.set())
+    worker = Worker(
+        queues=options["queue"] or ["default"],
+        batch_size=options["batch_size"],
+        poll_interval=options["poll_interval"],
+        burst=options["burst"],
+    )
+    try:
+        return worker.run(should_stop=stop_event.is_set)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Run queued tasks with one or more worker processes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--queue", action="append", help="처리할 큐 (복수 지정 가능, 기본 default)"
+        )
+        parser.add_argument("--processes", type=int, default=1, help="워커 프로세스 수")
+        parser.add_argument(
+            "--batch-size", type=int, default=50, help="한 번에 가져갈 작업 수"
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="대기 작업이 없을 때 대기(초)",
+        )
+        parser.add_argument(
+            "--burst", action="store_true", help="대기 작업을 모두 처리하면 종료합니다."
+        )
+
+    def handle(self, *args, **options):
+        # fork 방식이라 리눅스/맥 전용입니다. 부모의 DB 연결을 자식이 함께 쓰지 않도록 먼저 닫습니다.
+        context = multiprocessing.get_context("fork")
+        stop_event = context.Event()
+        if options["processes"] == 1:
+            count = run_worker(options, stop_event)
+            self.stdout.write(f"작업 {count}건을 처리했습니다.")
+            return
+
+        connections.close_all()
+        process_list = [
+            context.Process(target=run_worker, args=(options, stop_event))
+            for _ in range(options["processes"])
+        ]
+        for process in process_list:
+            process.start()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *args: stop_event.set())
+        for process in process_list:
+            process.join()
@@ -0,0 +1,61 @@
+import sqlite3
+import time
+from collections import deque
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the SQLite primary into SQLite replicas with a simulated replication lag"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lag", type=float, default=2.0, help="복제 지연(초)")
+        parser.add_argument("--interval", type=float, default=0.5)
+        parser.add_argument(
+            "--once", action="store_true", help="지연 없이 한 번만 복사합니다."
+        )
+
+    def handle(self, *args, **options):
+        # 로컬 개발용: primary 스냅샷을 lag 초 동안 들고 있다가 복제본 파일에 덮어써서
+        # 실제 복제 지연 상황(방금 쓴 주문이 복제본에 없음)을 재현합니다.
+        alias_list = ["default"] + settings.DATABASE_REPLICAS
+        for alias in alias_list:
+            if connections[alias].vendor != "sqlite":
+                raise CommandError(f"{alias} 데이터베이스가 SQLite가 아닙니다.")
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError("REPLICA_DATABASE_URLS 가 지정되지 않았습니다.")
+
+        primary_path = settings.DATABASES["default"]["NAME"]
+        if options["once"]:
+            self.apply(self.take_snapshot(primary_path))
+            return
+
+        snapshot_queue = deque()
+        while True:
+            now = time.monotonic()
+            snapshot_queue.append((now, self.take_snapshot(primary_path)))
+            # lag 초 이전에 찍어둔 스냅샷 중 가장 최근 것을 복제본에 반영합니다.
+            ready = None
+            while snapshot_queue and snapshot_queue[0][0] <= now - options["lag"]:
+                if ready is not None:
+                    ready.close()
+                ready = snapshot_queue.popleft()[1]
+            if ready is not None:
+                self.apply(ready)
+            time.sleep(options["interval"])
+
+    def take_snapshot(self, primary_path) -> sqlite3.Connection:
+        snapshot = sqlite3.connect(":memory:")
+        with sqlite3.connect(primary_path) as primary:
+            primary.backup(snapshot)
+        return snapshot
+
+    def apply(self, snapshot: sqlite3.Connection) -> None:
+        for alias in settings.DATABASE_REPLICAS:
+            with sqlite3.connect(settings.DATABASES[alias]["NAME"]) as replica:
+                snapshot.backup(replica)
+        snapshot.close()
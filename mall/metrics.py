@@ -0,0 +1,379 @@
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import uuid4
+
+from django.conf import settings
+
+# 프로메테우스 텍스트 포맷으로 내보내는 가벼운 메트릭 레지스트리
+# 기록은 프로세스 메모리의 dict만 갱신하고, METRICS_DIR가 지정되어 있으면 METRICS_FLUSH_INTERVAL마다
+# 프로세스별 스냅샷 파일(<pid>-<토큰>.json)로 내려씁니다. /metrics 에서는 모든 프로세스의 파일을 합산해서 보여주므로
+# gunicorn 워커가 여러 개여도 하나의 값으로 수집됩니다.
+# 종료된 프로세스의 파일은 카운터/히스토그램만 dead.json에 더한 뒤 지웁니다. (종료 시 atexit, 또는 /metrics 에서 발견했을 때)
+# 그래서 워커가 재시작되어도 파일이 쌓이지 않고, 카운터가 줄어들지 않으며, 게이지에는 살아있는 프로세스만 남습니다.
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+QUEUE_LAG_BUCKETS = (0.1, 0.5, 1, 5, 10, 30, 60, 300, 900)
+
+COUNTER = "counter"
+GAUGE = "gauge"
+HISTOGRAM = "histogram"
+
+# 메트릭 이름 → (종류, 설명, 히스토그램 버킷)
+METRICS: Dict[str, Tuple[str, str, Tuple]] = {
+    "mall_view_requests_total": (COUNTER, "View requests by view and status", ()),
+    "mall_view_latency_seconds": (HISTOGRAM, "View latency", LATENCY_BUCKETS),
+    "mall_view_db_queries": (
+        HISTOGRAM,
+        "DB queries per view request",
+        QUERY_COUNT_BUCKETS,
+    ),
+    "portone_requests_total": (
+        COUNTER,
+        "PortOne API calls by endpoint and outcome",
+        (),
+    ),
+    "portone_latency_seconds": (
+        HISTOGRAM,
+        "PortOne API call latency including retries",
+        LATENCY_BUCKETS,
+    ),
+    "portone_retries_total": (COUNTER, "PortOne API retries by endpoint", ()),
+    "portone_circuit_trips_total": (COUNTER, "PortOne circuit breaker trips", ()),
+    "page_cache_requests_total": (
+        COUNTER,
+        "Anonymous page cache lookups by view and result (hit/miss/stale/bypass)",
+        (),
+    ),
+    "page_cache_purges_total": (COUNTER, "Page cache tag purges by tag type", ()),
+    "autocomplete_refreshes_total": (
+        COUNTER,
+        "Autocomplete index refreshes by kind (full/incremental)",
+        (),
+    ),
+    "local_cache_requests_total": (
+        COUNTER,
+        "In-process lookup cache keys by cache and result (hit/miss)",
+        (),
+    ),
+    "order_detail_cache_requests_total": (
+        COUNTER,
+        "Finalized order detail cache lookups by result (hit/miss/bypass)",
+        (),
+    ),
+    "api_query_budget_exceeded_total": (
+        COUNTER,
+        "JSON API requests that ran more queries than the view budget",
+        (),
+    ),
+    "bulk_action_rows_total": (COUNTER, "Rows processed by admin bulk jobs", ()),
+    "bulk_action_chunk_seconds": (
+        HISTOGRAM,
+        "Admin bulk job chunk transaction duration",
+        LATENCY_BUCKETS,
+    ),
+    "task_runs_total": (COUNTER, "Queued task runs by task and outcome", ()),
+    "task_duration_seconds": (HISTOGRAM, "Queued task run time", LATENCY_BUCKETS),
+    "task_queue_lag_seconds": (
+        HISTOGRAM,
+        "Delay between a task's scheduled time and its start",
+        QUEUE_LAG_BUCKETS,
+    ),
+    "rate_limited_total": (COUNTER, "Requests rejected by rate limit scope", ()),
+    "waiting_room_requests_total": (
+        COUNTER,
+        "Checkout waiting room requests by result",
+        (),
+    ),
+    "fulfillment_rows_total": (
+        COUNTER,
+        "Warehouse status update rows by outcome",
+        (),
+    ),
+    "portone_circuit_open": (
+        GAUGE,
+        "Number of worker processes whose PortOne circuit is open",
+        (),
+    ),
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.pid = os.getpid()
+        # pid가 재사용되어도 이전 프로세스의 파일을 덮어쓰지 않도록 프로세스마다 토큰을 붙입니다.
+        self.file_name = f"{self.pid}-{uuid4().hex[:8]}.json"
+        self.flushed = False
+        self.counters: Dict[Tuple[str, LabelKey], float] = {}
+        self.gauges: Dict[Tuple[str, LabelKey], float] = {}
+        # (이름, 라벨) → [버킷별 개수..., +Inf 버킷 개수, 합계, 건수]
+        self.histograms: Dict[Tuple[str, LabelKey], List[float]] = {}
+        self.last_flush = time.monotonic()
+
+    def _check_fork(self):
+        # gunicorn --preload 처럼 fork된 워커는 부모의 값을 물려받으므로 새로 시작합니다.
+        if self.pid != os.getpid():
+            self.reset()
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        key = (name, label_key(labels))
+        with self._lock:
+            self._check_fork()
+            self.counters[key] = self.counters.get(key, 0) + value
+        self.maybe_flush()
+
+    def set_gauge(self, name: str, value: float, **labels) -> None:
+        key = (name, label_key(labels))
+        with self._lock:
+            self._check_fork()
+            self.gauges[key] = value
+        self.maybe_flush()
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        buckets = METRICS[name][2]
+        key = (name, label_key(labels))
+        with self._lock:
+            self._check_fork()
+            row = self.histograms.get(key)
+            if row is None:
+                row = self.histograms[key] = [0] * (len(buckets) + 3)
+            # 값이 들어갈 첫 버킷에만 더하고, 누적은 내보낼 때 계산합니다.
+            row[bisect_left(buckets, value)] += 1
+            row[-2] += value
+            row[-1] += 1
+        self.maybe_flush()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "pid": self.pid,
+                "counters": [[n, list(l), v] for (n, l), v in self.counters.items()],
+                "gauges": [[n, list(l), v] for (n, l), v in self.gauges.items()],
+                "histograms": [
+                    [n, list(l), list(row)] for (n, l), row in self.histograms.items()
+                ],
+            }
+
+    def maybe_flush(self, force: bool = False) -> None:
+        metrics_dir = settings.METRICS_DIR
+        if not metrics_dir:
+            return
+        now = time.monotonic()
+        if not force and now - self.last_flush < settings.METRICS_FLUSH_INTERVAL:
+            return
+        self.last_flush = now
+        with self._lock:
+            self._check_fork()
+        path = Path(metrics_dir) / self.file_name
+        tmp_path = path.with_suffix(".tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if not self.flushed:
+                # 같은 pid를 쓰던 종료된 프로세스의 파일 (pid 재사용)
+                self.flushed = True
+                fold_dead_files(
+                    other
+                    for other in path.parent.glob(f"{self.pid}-*.json")
+                    if other.name != self.file_name
+                )
+            tmp_path.write_text(json.dumps(self.snapshot()))
+            os.replace(
+                tmp_path, path
+            )  # 읽는 쪽이 반쯤 쓰인 파일을 보지 않도록 원자적으로 교체
+        except OSError as e:
+            logger.warning("메트릭 파일 저장 실패: %s", e)
+
+    def close(self) -> None:
+        # 프로세스 종료 시 마지막 값을 dead.json에 더하고 파일을 지웁니다.
+        metrics_dir = settings.METRICS_DIR
+        if not metrics_dir or self.pid != os.getpid():
+            return
+        self.maybe_flush(force=True)
+        try:
+            fold_dead_files([Path(metrics_dir) / self.file_name])
+        except OSError as e:
+            logger.warning("메트릭 파일 정리 실패: %s", e)
+
+
+registry = Registry()
+inc = registry.inc
+observe = registry.observe
+set_gauge = registry.set_gauge
+atexit.register(registry.close)
+
+DEAD_FILE_NAME = "dead.json"  # 종료된 프로세스들의 카운터/히스토그램 합계 (pid 0)
+
+
+def is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def read_snapshot(path: Path) -> Optional[Dict]:
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def fold_dead_files(paths: Iterable[Path]) -> None:
+    # 여러 프로세스가 동시에 정리하지 않도록 파일 잠금을 잡고 dead.json에 더한 뒤 파일을 지웁니다.
+    import fcntl
+
+    paths = list(paths)
+    if not paths:
+        return
+    metrics_dir = paths[0].parent
+    with (metrics_dir / ".lock").open("a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        dead_path = metrics_dir / DEAD_FILE_NAME
+        dead = read_snapshot(dead_path) or {}
+        counters = {(n, label_key(dict(l))): v for n, l, v in dead.get("counters", [])}
+        histograms = {
+            (n, label_key(dict(l))): row for n, l, row in dead.get("histograms", [])
+        }
+        folded = []
+        for path in paths:
+            snapshot = read_snapshot(path)
+            if snapshot is None:  # 다른 프로세스가 이미 정리한 파일
+                continue
+            for name, labels, value in snapshot["counters"]:
+                key = (name, label_key(dict(labels)))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, row in snapshot["histograms"]:
+                merged = histograms.setdefault(
+                    (name, label_key(dict(labels))), [0] * len(row)
+                )
+                for i, value in enumerate(row):
+                    merged[i] += value
+            folded.append(path)
+        if not folded:
+            return
+        tmp_path = dead_path.with_suffix(".tmp")
+        tmp_path.write_text(
+            json.dumps(
+                {
+                    "pid": 0,
+                    "counters": [[n, list(l), v] for (n, l), v in counters.items()],
+                    "gauges": [],
+                    "histograms": [
+                        [n, list(l), row] for (n, l), row in histograms.items()
+                    ],
+                }
+            )
+        )
+        os.replace(tmp_path, dead_path)
+        for path in folded:
+            path.unlink(missing_ok=True)
+
+
+def collect_snapshots() -> List[Dict]:
+    with registry._lock:
+        registry._check_fork()
+    snapshots = [registry.snapshot()]
+    metrics_dir = settings.METRICS_DIR
+    if not metrics_dir or not Path(metrics_dir).is_dir():
+        return snapshots
+    dead_paths = []
+    for path in Path(metrics_dir).glob("*.json"):
+        snapshot = read_snapshot(path)
+        if snapshot is None:
+            continue
+        if snapshot["pid"] == registry.pid:
+            continue  # 현재 프로세스는 메모리의 최신값을 사용
+        if path.name != DEAD_FILE_NAME and not is_alive(snapshot["pid"]):
+            # 종료 처리 없이 죽은 프로세스(SIGKILL 등)의 파일
+            dead_paths.append(path)
+            continue
+        snapshots.append(snapshot)
+    if dead_paths:
+        try:
+            fold_dead_files(dead_paths)
+        except OSError as e:
+            logger.warning("종료된 프로세스의 메트릭 파일 정리 실패: %s", e)
+        # 정리 전후로 읽은 값이 섞이지 않도록 dead.json을 다시 읽어 합칩니다.
+        snapshots = [s for s in snapshots if s["pid"] != 0]
+        dead = read_snapshot(Path(metrics_dir) / DEAD_FILE_NAME)
+        if dead is not None:
+            snapshots.append(dead)
+    return snapshots
+
+
+def format_labels(labels: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (
+        '{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"'))
+        for k, v in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def render() -> str:
+    # 종료된 워커의 카운터/히스토그램은 누적값이므로 합산에 포함하고, 게이지는 살아있는 프로세스만 합산합니다.
+    counters: Dict[Tuple[str, LabelKey], float] = {}
+    gauges: Dict[Tuple[str, LabelKey], float] = {}
+    histograms: Dict[Tuple[str, LabelKey], List[float]] = {}
+    for snapshot in collect_snapshots():
+        for name, labels, value in snapshot["counters"]:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            counters[key] = counters.get(key, 0) + value
+        # 종료된 프로세스의 파일은 collect_snapshots에서 정리되므로 게이지는 살아있는 프로세스의 값입니다.
+        for name, labels, value in snapshot["gauges"]:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            gauges[key] = gauges.get(key, 0) + value
+        for name, labels, row in snapshot["histograms"]:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            merged = histograms.setdefault(key, [0] * len(row))
+            for i, value in enumerate(row):
+                merged[i] += value
+
+    lines = []
+    for name, (metric_type, help_text, buckets) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        if metric_type == HISTOGRAM:
+            for (n, labels), row in sorted(histograms.items()):
+                if n != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(buckets, row):
+                    cumulative += count
+                    lines.append(
+                        f"{name}_bucket{format_labels(labels, ('le', str(bound)))} {cumulative}"
+                    )
+                lines.append(
+                    f"{name}_bucket{format_labels(labels, ('le', '+Inf'))} {row[-1]}"
+                )
+                lines.append(f"{name}_sum{format_labels(labels)} {row[-2]}")
+                lines.append(f"{name}_count{format_labels(labels)} {row[-1]}")
+        else:
+            values = counters if metric_type == COUNTER else gauges
+            for (n, labels), value in sorted(values.items()):
+                if n == name:
+                    lines.append(f"{name}{format_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
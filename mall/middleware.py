@@ -0,0 +1,42 @@
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+
+from mall import metrics
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+# 뷰별 요청 수, 응답 시간, DB 쿼리 수를 메트릭으로 기록합니다.
+# 쿼리 수는 execute_wrapper로 정수만 증가시키므로 요청당 오버헤드는 무시할 수준입니다.
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        query_counter = QueryCounter()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            # 복제본(replica)으로 간 쿼리도 포함되도록 모든 DB 연결에 래퍼를 겁니다.
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(query_counter))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        # url 패턴이 없는 요청(404 등)은 라벨 폭증을 막기 위해 하나로 묶습니다.
+        match = request.resolver_match
+        view = match.view_name if match else "unmatched"
+        if view == "metrics":
+            return response
+        metrics.inc("mall_view_requests_total", view=view, status=response.status_code)
+        metrics.observe("mall_view_latency_seconds", elapsed, view=view)
+        metrics.observe("mall_view_db_queries", query_counter.count, view=view)
+        return response
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.9 on 2026-10-19 18:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mall", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="orderpayment",
+            name="pay_status",
+            field=models.CharField(
+                choices=[
+                    ("ready", "결제 준비"),
+                    ("paid", "결제 완료"),
+                    ("canceled", "결제 취소"),
+                    ("failed", "결제 실패"),
+                    ("pending", "검증 대기"),
+                ],
+                default="ready",
+                max_length=20,
+                verbose_name="결제상태",
+            ),
+        ),
+    ]
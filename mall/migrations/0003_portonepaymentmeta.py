@@ -0,0 +1,106 @@
+# Generated by Django 4.2.9 on 2026-10-19 18:39
+
+import datetime
+import json
+import uuid
+import zlib
+
+from django.db import migrations, models
+
+
+# 기존 orderpayment.meta JSON을 압축해서 PortonePaymentMeta로 옮기고, 조회용 컬럼을 채웁니다.
+def move_meta_to_side_table(apps, schema_editor):
+    OrderPayment = apps.get_model("mall", "OrderPayment")
+    PortonePaymentMeta = apps.get_model("mall", "PortonePaymentMeta")
+
+    payment_qs = OrderPayment.objects.exclude(meta={}).only(
+        "pk", "uid", "meta", "paid_amount", "paid_at", "pg_tid"
+    )
+    for payment in payment_qs.iterator(chunk_size=1000):
+        meta = payment.meta
+        PortonePaymentMeta.objects.update_or_create(
+            uid=payment.uid,
+            defaults={
+                "data": zlib.compress(
+                    json.dumps(meta, ensure_ascii=False, separators=(",", ":")).encode()
+                )
+            },
+        )
+        paid_at = meta.get("paid_at")
+        payment.paid_amount = meta.get("amount")
+        payment.paid_at = (
+            datetime.datetime.fromtimestamp(paid_at, tz=datetime.timezone.utc)
+            if paid_at
+            else None
+        )
+        payment.pg_tid = meta.get("pg_tid") or ""
+        payment.save(update_fields=["paid_amount", "paid_at", "pg_tid"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mall", "0002_alter_orderpayment_pay_status"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PortonePaymentMeta",
+            fields=[
+                (
+                    "uid",
+                    models.UUIDField(
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="쇼핑몰 결제내역",
+                    ),
+                ),
+                (
+                    "data",
+                    models.BinaryField(verbose_name="포트원 결제내역 (zlib 압축 JSON)"),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "포트원 결제내역",
+                "verbose_name_plural": "포트원 결제내역",
+            },
+        ),
+        migrations.AddField(
+            model_name="orderpayment",
+            name="paid_amount",
+            field=models.PositiveIntegerField(
+                blank=True, editable=False, null=True, verbose_name="실 결제 금액"
+            ),
+        ),
+        migrations.AddField(
+            model_name="orderpayment",
+            name="paid_at",
+            field=models.DateTimeField(
+                blank=True, editable=False, null=True, verbose_name="결제 시각"
+            ),
+        ),
+        migrations.AddField(
+            model_name="orderpayment",
+            name="pg_tid",
+            field=models.CharField(
+                blank=True, editable=False, max_length=100, verbose_name="PG사 거래번호"
+            ),
+        ),
+        migrations.RunPython(move_meta_to_side_table, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name="orderpayment",
+            name="meta",
+        ),
+        migrations.AlterField(
+            model_name="orderpayment",
+            name="uid",
+            field=models.UUIDField(
+                default=uuid.uuid4,
+                editable=False,
+                unique=True,
+                verbose_name="쇼핑몰 결제내역",
+            ),
+        ),
+    ]
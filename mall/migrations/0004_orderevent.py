@@ -0,0 +1,82 @@
+# Generated by Django 4.2.9 on 2026-10-19 18:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mall", "0003_portonepaymentmeta"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EventConsumerOffset",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100, unique=True)),
+                ("last_event_id", models.BigIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="OrderEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "event_type",
+                    models.CharField(
+                        choices=[
+                            ("order.status_changed", "주문 상태 변경"),
+                            ("payment.status_changed", "결제 상태 변경"),
+                        ],
+                        max_length=50,
+                        verbose_name="이벤트 종류",
+                    ),
+                ),
+                (
+                    "order_id",
+                    models.BigIntegerField(db_index=True, verbose_name="주문 id"),
+                ),
+                (
+                    "payment_id",
+                    models.BigIntegerField(
+                        blank=True, null=True, verbose_name="결제 id"
+                    ),
+                ),
+                (
+                    "from_status",
+                    models.CharField(
+                        blank=True, max_length=20, verbose_name="이전 상태"
+                    ),
+                ),
+                (
+                    "to_status",
+                    models.CharField(max_length=20, verbose_name="변경 상태"),
+                ),
+                ("payload", models.JSONField(blank=True, default=dict)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "verbose_name": "주문 이벤트",
+                "verbose_name_plural": "주문 이벤트",
+                "ordering": ["pk"],
+            },
+        ),
+    ]
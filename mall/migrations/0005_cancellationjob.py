@@ -0,0 +1,124 @@
+# Generated by Django 4.2.9 on 2026-10-19 18:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mall", "0004_orderevent"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CancellationJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("reason", models.CharField(max_length=200, verbose_name="취소 사유")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "대기"),
+                            ("running", "진행중"),
+                            ("done", "완료"),
+                        ],
+                        default="pending",
+                        max_length=20,
+                        verbose_name="진행상태",
+                    ),
+                ),
+                (
+                    "total_count",
+                    models.PositiveIntegerField(default=0, verbose_name="전체 건수"),
+                ),
+                (
+                    "canceled_count",
+                    models.PositiveIntegerField(default=0, verbose_name="취소 건수"),
+                ),
+                (
+                    "failed_count",
+                    models.PositiveIntegerField(default=0, verbose_name="실패 건수"),
+                ),
+                (
+                    "skipped_count",
+                    models.PositiveIntegerField(default=0, verbose_name="제외 건수"),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "결제취소 작업",
+                "verbose_name_plural": "결제취소 작업",
+                "ordering": ["-pk"],
+            },
+        ),
+        migrations.CreateModel(
+            name="CancellationItem",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "대기"),
+                            ("canceled", "취소완료"),
+                            ("failed", "실패"),
+                            ("skipped", "제외"),
+                        ],
+                        default="pending",
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveSmallIntegerField(
+                        default=0, verbose_name="시도 횟수"
+                    ),
+                ),
+                ("error", models.TextField(blank=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "job",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="item_set",
+                        to="mall.cancellationjob",
+                    ),
+                ),
+                (
+                    "payment",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="mall.orderpayment",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["job", "status"], name="mall_cancel_job_id_bda0b2_idx"
+                    )
+                ],
+            },
+        ),
+    ]
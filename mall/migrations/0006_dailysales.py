@@ -0,0 +1,92 @@
+# Generated by Django 4.2.9 on 2026-10-19 19:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mall", "0005_cancellationjob"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyProductSales",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(verbose_name="판매일")),
+                (
+                    "quantity",
+                    models.BigIntegerField(default=0, verbose_name="판매수량"),
+                ),
+                ("revenue", models.BigIntegerField(default=0, verbose_name="매출")),
+                (
+                    "product",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="mall.product",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "일별 상품 매출",
+                "verbose_name_plural": "일별 상품 매출",
+                "ordering": ["-date", "-revenue"],
+            },
+        ),
+        migrations.CreateModel(
+            name="DailyCategorySales",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(verbose_name="판매일")),
+                (
+                    "quantity",
+                    models.BigIntegerField(default=0, verbose_name="판매수량"),
+                ),
+                ("revenue", models.BigIntegerField(default=0, verbose_name="매출")),
+                (
+                    "category",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="mall.category",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "일별 분류 매출",
+                "verbose_name_plural": "일별 분류 매출",
+                "ordering": ["-date", "-revenue"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="dailyproductsales",
+            constraint=models.UniqueConstraint(
+                fields=("date", "product"), name="unique_daily_product"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="dailycategorysales",
+            constraint=models.UniqueConstraint(
+                fields=("date", "category"), name="unique_daily_category"
+            ),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.9 on 2026-10-19 19:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mall", "0006_dailysales"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="order",
+            name="created_at",
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name="product",
+            name="created_at",
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name="product",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddIndex(
+            model_name="orderpayment",
+            index=models.Index(
+                fields=["pay_status", "is_paid_ok"],
+                name="mall_orderp_pay_sta_cdad5c_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="orderpayment",
+            index=models.Index(
+                fields=["paid_at"], name="mall_orderp_paid_at_c5ccd6_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,105 @@
+# Generated by Django 4.2.9 on 2026-10-19 19:10
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("mall", "0007_admin_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BulkActionJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("action", models.CharField(max_length=100, verbose_name="작업")),
+                (
+                    "params",
+                    models.JSONField(
+                        blank=True, default=dict, verbose_name="작업 인자"
+                    ),
+                ),
+                ("model", models.CharField(max_length=100, verbose_name="대상 모델")),
+                ("query", models.BinaryField(verbose_name="대상 쿼리")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "대기"),
+                            ("running", "진행중"),
+                            ("done", "완료"),
+                            ("canceled", "중단"),
+                            ("failed", "실패"),
+                        ],
+                        db_index=True,
+                        default="pending",
+                        max_length=20,
+                        verbose_name="진행상태",
+                    ),
+                ),
+                (
+                    "total_count",
+                    models.PositiveIntegerField(default=0, verbose_name="전체 건수"),
+                ),
+                (
+                    "processed_count",
+                    models.PositiveIntegerField(default=0, verbose_name="처리 건수"),
+                ),
+                (
+                    "changed_count",
+                    models.PositiveIntegerField(default=0, verbose_name="변경 건수"),
+                ),
+                (
+                    "last_pk",
+                    models.BigIntegerField(default=0, verbose_name="마지막 처리 pk"),
+                ),
+                (
+                    "cancel_requested",
+                    models.BooleanField(default=False, verbose_name="중단 요청"),
+                ),
+                ("error", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "started_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="시작 시각"
+                    ),
+                ),
+                (
+                    "finished_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="종료 시각"
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "created_by",
+                    models.ForeignKey(
+                        blank=True,
+                        db_constraint=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "대량 작업",
+                "verbose_name_plural": "대량 작업",
+                "ordering": ["-pk"],
+            },
+        ),
+    ]
@@ -0,0 +1,100 @@
+# Generated by Django 4.2.9 on 2026-10-19 19:13
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mall", "0008_bulkactionjob"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Task",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100, verbose_name="작업 이름")),
+                (
+                    "kwargs",
+                    models.JSONField(
+                        blank=True, default=dict, verbose_name="작업 인자"
+                    ),
+                ),
+                (
+                    "queue",
+                    models.CharField(
+                        default="default", max_length=50, verbose_name="큐"
+                    ),
+                ),
+                (
+                    "priority",
+                    models.SmallIntegerField(default=0, verbose_name="우선순위"),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("queued", "대기"),
+                            ("running", "실행중"),
+                            ("failed", "실패"),
+                        ],
+                        default="queued",
+                        max_length=20,
+                        verbose_name="진행상태",
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveSmallIntegerField(
+                        default=0, verbose_name="시도 횟수"
+                    ),
+                ),
+                (
+                    "max_attempts",
+                    models.PositiveSmallIntegerField(
+                        default=5, verbose_name="최대 시도 횟수"
+                    ),
+                ),
+                (
+                    "run_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, verbose_name="실행 예정 시각"
+                    ),
+                ),
+                (
+                    "locked_by",
+                    models.CharField(
+                        blank=True, max_length=100, verbose_name="실행 워커"
+                    ),
+                ),
+                (
+                    "locked_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="실행 시작 시각"
+                    ),
+                ),
+                ("last_error", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "verbose_name": "작업 큐",
+                "verbose_name_plural": "작업 큐",
+                "indexes": [
+                    models.Index(
+                        fields=["status", "queue", "-priority", "run_at"],
+                        name="mall_task_claim_idx",
+                    )
+                ],
+            },
+        ),
+    ]
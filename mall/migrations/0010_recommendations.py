@@ -0,0 +1,95 @@
+# Generated by Django 4.2.9 on 2026-10-19 19:17
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mall", "0009_task"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductRecommendation",
+            fields=[
+                (
+                    "product",
+                    models.OneToOneField(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="recommendation",
+                        serialize=False,
+                        to="mall.product",
+                    ),
+                ),
+                (
+                    "order_count",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="구매한 주문 수"
+                    ),
+                ),
+                (
+                    "neighbors",
+                    models.JSONField(
+                        blank=True, default=list, verbose_name="함께 구매한 상품"
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "상품 추천",
+                "verbose_name_plural": "상품 추천",
+            },
+        ),
+        migrations.CreateModel(
+            name="ProductPairCount",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "count",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="함께 구매한 주문 수"
+                    ),
+                ),
+                (
+                    "other",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="mall.product",
+                    ),
+                ),
+                (
+                    "product",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="mall.product",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "상품 동시구매 횟수",
+                "verbose_name_plural": "상품 동시구매 횟수",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="productpaircount",
+            constraint=models.UniqueConstraint(
+                fields=("product", "other"), name="unique_product_pair"
+            ),
+        ),
+    ]
@@ -0,0 +1,200 @@
+# Generated by Django 4.2.9 on 2026-10-19 19:20
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("mall", "0010_recommendations"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedOrder",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("uid", models.UUIDField(editable=False)),
+                ("total_amount", models.PositiveIntegerField(verbose_name="결제금액")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("requested", "주문요청"),
+                            ("failed_payment", "결제실패"),
+                            ("paid", "결제완료"),
+                            ("prepared_product", "상품준비중"),
+                            ("shipped", "배송중"),
+                            ("delivered", "배송완료"),
+                            ("canceled", "주문취소"),
+                        ],
+                        max_length=20,
+                        verbose_name="진행상태",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(db_index=True)),
+                ("updated_at", models.DateTimeField()),
+                (
+                    "archived_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="보관 시각"),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "보관 주문",
+                "verbose_name_plural": "보관 주문",
+                "ordering": ["-pk"],
+            },
+        ),
+        migrations.CreateModel(
+            name="ArchivedOrderPayment",
+            fields=[
+                (
+                    "uid",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        unique=True,
+                        verbose_name="쇼핑몰 결제내역",
+                    ),
+                ),
+                ("name", models.CharField(max_length=200, verbose_name="결제명")),
+                (
+                    "desired_amount",
+                    models.PositiveIntegerField(
+                        editable=False, verbose_name="결제 금액"
+                    ),
+                ),
+                (
+                    "buyer_name",
+                    models.CharField(
+                        editable=False, max_length=100, verbose_name="구매자 이름"
+                    ),
+                ),
+                (
+                    "buyer_email",
+                    models.EmailField(
+                        editable=False, max_length=254, verbose_name="구매자 이메일"
+                    ),
+                ),
+                (
+                    "pay_method",
+                    models.CharField(
+                        choices=[("card", "신용카드")],
+                        default="card",
+                        max_length=20,
+                        verbose_name="결제수단",
+                    ),
+                ),
+                (
+                    "pay_status",
+                    models.CharField(
+                        choices=[
+                            ("ready", "결제 준비"),
+                            ("paid", "결제 완료"),
+                            ("canceled", "결제 취소"),
+                            ("failed", "결제 실패"),
+                            ("pending", "검증 대기"),
+                        ],
+                        default="ready",
+                        max_length=20,
+                        verbose_name="결제상태",
+                    ),
+                ),
+                (
+                    "is_paid_ok",
+                    models.BooleanField(
+                        db_index=True,
+                        default=False,
+                        editable=False,
+                        verbose_name="결제성공 여부",
+                    ),
+                ),
+                (
+                    "paid_amount",
+                    models.PositiveIntegerField(
+                        blank=True,
+                        editable=False,
+                        null=True,
+                        verbose_name="실 결제 금액",
+                    ),
+                ),
+                (
+                    "paid_at",
+                    models.DateTimeField(
+                        blank=True, editable=False, null=True, verbose_name="결제 시각"
+                    ),
+                ),
+                (
+                    "pg_tid",
+                    models.CharField(
+                        blank=True,
+                        editable=False,
+                        max_length=100,
+                        verbose_name="PG사 거래번호",
+                    ),
+                ),
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                (
+                    "order",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="orderpayment_set",
+                        to="mall.archivedorder",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "보관 결제내역",
+                "verbose_name_plural": "보관 결제내역",
+            },
+        ),
+        migrations.CreateModel(
+            name="ArchivedOrderedProduct",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("name", models.CharField(max_length=100, verbose_name="상품명")),
+                ("price", models.PositiveIntegerField(verbose_name="상품가격")),
+                ("quantity", models.PositiveIntegerField(verbose_name="수량")),
+                ("created_at", models.DateTimeField()),
+                ("updated_at", models.DateTimeField()),
+                (
+                    "order",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="orderedproduct_set",
+                        to="mall.archivedorder",
+                    ),
+                ),
+                (
+                    "product",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="mall.product",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="archivedorder",
+            index=models.Index(
+                fields=["user", "-id"], name="mall_archiv_user_id_a355c7_idx"
+            ),
+        ),
+    ]
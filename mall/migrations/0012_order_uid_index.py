@@ -0,0 +1,19 @@
+# Generated by Django 4.2.9 on 2026-10-19 19:22
+
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mall", "0011_order_archive"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="order",
+            name="uid",
+            field=models.UUIDField(db_index=True, default=uuid.uuid4, editable=False),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.9 on 2026-10-19 19:53
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def fail_unfinished_jobs(apps, schema_editor):
+    # 저장된 쿼리(pickle)는 더 이상 읽지 않으므로, 끝나지 않은 작업은 실패 처리합니다. 관리자 화면에서 다시 실행해주세요.
+    BulkActionJob = apps.get_model("mall", "BulkActionJob")
+    BulkActionJob.objects.filter(status__in=["pending", "running"]).update(
+        status="failed",
+        error="대상 저장 방식 변경으로 중단되었습니다. 다시 실행해주세요.",
+        finished_at=timezone.now(),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mall", "0012_order_uid_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(fail_unfinished_jobs, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name="bulkactionjob",
+            name="query",
+        ),
+        migrations.AddField(
+            model_name="bulkactionjob",
+            name="target_pks",
+            field=models.JSONField(default=list, verbose_name="대상 pk 목록"),
+        ),
+    ]
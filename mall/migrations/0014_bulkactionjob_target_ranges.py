@@ -0,0 +1,51 @@
+# Generated by Django 4.2.9 on 2026-10-19 21:10
+
+from django.db import migrations, models
+
+
+def to_ranges(pk_list):
+    ranges = []
+    for pk in pk_list:
+        if ranges and ranges[-1][1] == pk - 1:
+            ranges[-1][1] = pk
+        else:
+            ranges.append([pk, pk])
+    return ranges
+
+
+def convert_target_pks(apps, schema_editor):
+    BulkActionJob = apps.get_model("mall", "BulkActionJob")
+    for job in BulkActionJob.objects.only("pk", "target_pks").iterator():
+        BulkActionJob.objects.filter(pk=job.pk).update(
+            target_ranges=to_ranges(sorted(job.target_pks))
+        )
+
+
+def convert_target_ranges(apps, schema_editor):
+    BulkActionJob = apps.get_model("mall", "BulkActionJob")
+    for job in BulkActionJob.objects.only("pk", "target_ranges").iterator():
+        BulkActionJob.objects.filter(pk=job.pk).update(
+            target_pks=[
+                pk for first, last in job.target_ranges for pk in range(first, last + 1)
+            ]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mall", "0013_bulkactionjob_target_pks"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="bulkactionjob",
+            name="target_ranges",
+            field=models.JSONField(default=list, verbose_name="대상 pk 구간 목록"),
+        ),
+        migrations.RunPython(convert_target_pks, convert_target_ranges),
+        migrations.RemoveField(
+            model_name="bulkactionjob",
+            name="target_pks",
+        ),
+    ]
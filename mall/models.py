@@ -1,18 +1,23 @@
+import datetime
+import json
 import logging
+import zlib
 from functools import cached_property
-from typing import List
+from typing import List, Optional
+from uuid import UUID
 
 
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import MinValueValidator
 from django.db.models import UniqueConstraint, QuerySet
 from uuid import uuid4
 
 from django.http import Http404
 from django.urls import reverse
+from django.utils import timezone
 from accounts.models import User
-from mysite import settings
-from iamport import Iamport
+
+from mall.portone import PortoneUnavailable, get_client
 
 # 현재 소스파일이 mall/models.py 경로의 파일이니까
 # __name__은 "mall.models" 문자열을 표현합니다.
@@ -55,13 +60,22 @@ class Product(models.Model):
     # 이 두 필드는 추후에 추가했는데 필수필드 이기에 1회용 디폴트 값 지정이 필요해서
     # 1번 누르고 timezone.now 입력하였음
     created_at = models.DateTimeField(
-        auto_now_add=True
+        auto_now_add=True, db_index=True
     )  # 생성시간 자동으로 지금 만들어주는 필드
-    updated_at = models.DateTimeField(auto_now=True)  # 수정 시간 자동으로
+    updated_at = models.DateTimeField(
+        auto_now=True, db_index=True
+    )  # 수정 시간 자동으로
 
     def __str__(self):
         return f"<{self.pk}> {self.name}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # 저장 시 목록 구성이 바뀌었는지 비교할 수 있도록 DB에서 읽은 값을 기억합니다. (mall/page_cache.py)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
     class Meta:
         verbose_name = verbose_name_plural = "상품"
         # 정렬은 하나의 기준으로 이루어져야 하기 때문에 매번 view단에서 쿼리셋에 정렬 지정하기보단 모델에서 정렬
@@ -115,7 +129,8 @@ class Order(models.Model):
         DELIVERED = "delivered", "배송완료"
         CANCELED = "canceled", "주문취소"
 
-    uid = models.UUIDField(default=uuid4, editable=False)
+    # 고객에게 보이는 주문번호. 물류센터 연동(mall/fulfillment.py)이 주문번호로 주문을 찾으므로 인덱스를 둡니다.
+    uid = models.UUIDField(default=uuid4, editable=False, db_index=True)
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -134,7 +149,7 @@ class Order(models.Model):
         through="OrderedProduct",
         blank=False,
     )
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     # 반환값의 타입은 Order입니다. 반환값 타입 지정하는 코드 부분은 Order 클래스 정의가 마무리되기 전에 수행되므로
@@ -146,6 +161,48 @@ class Order(models.Model):
     def get_absolute_url(self) -> str:
         return reverse("order_detail", args=[self.pk])
 
+    # 변경할 상태별로 허용하는 이전 상태 (목록에 없는 상태로의 변경은 제한하지 않습니다.)
+    # 결제 재검증(웹훅, 작업 재시도, 결제 확인 화면 새로고침)이 이미 배송 단계로 넘어간 주문을 결제완료로 되돌리지 않도록 합니다.
+    STATUS_TRANSITIONS = {
+        Status.PAID: (Status.REQUESTED, Status.FAILED_PAYMENT),
+        Status.FAILED_PAYMENT: (Status.REQUESTED,),
+    }
+
+    # 주문 상태는 이 메서드로만 변경해서, 같은 트랜잭션 안에서 OrderEvent가 함께 기록되도록 합니다.
+    # 허용하지 않는 전이이면 아무것도 바꾸지 않고 False를 반환합니다.
+    def change_status(
+        self, status: str, payment_id: Optional[int] = None, **payload
+    ) -> bool:
+        from mall import sales
+
+        with transaction.atomic():
+            # 웹훅과 결제 완료 리다이렉트가 동시에 들어와도 매출이 두 번 집계되지 않도록
+            # 행을 잠그고 현재 상태를 다시 읽습니다.
+            from_status = (
+                Order.objects.select_for_update()
+                .values_list("status", flat=True)
+                .get(pk=self.pk)
+            )
+            allowed = self.STATUS_TRANSITIONS.get(status)
+            if allowed is not None and from_status not in allowed:
+                self.status = from_status
+                return False
+            self.status = status
+            self.save(update_fields=["status", "updated_at"])
+            if from_status != status:
+                OrderEvent.objects.create(
+                    event_type=OrderEvent.Type.ORDER_STATUS_CHANGED,
+                    order_id=self.pk,
+                    payment_id=payment_id,
+                    from_status=from_status,
+                    to_status=status,
+                    payload=payload,
+                )
+                sales.apply_order_sales(
+                    [self], sales.get_status_sign(from_status, status)
+                )
+        return True
+
     # status 필드가 REQUESTED, FAILED_PAYMENT 일 때 에만 결제를 허용
     def can_pay(self) -> bool:
         return self.status in (self.Status.REQUESTED, self.Status.FAILED_PAYMENT)
@@ -215,6 +272,39 @@ class OrderedProduct(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
 
+# 포트원 결제 세부내역(meta)은 크고 조회할 일이 드물어서 결제 테이블과 분리해 압축 저장합니다.
+# 결제 테이블에는 조회에 쓰는 필드만 남겨서 테이블이 버퍼 풀에 올라갈 만큼 작게 유지합니다.
+# 결제 모델의 uid(merchant_uid)를 기본키로 쓰기 때문에 AbstractPortonePayment를 상속한 어떤 모델에서도 사용할 수 있습니다.
+class PortonePaymentMeta(models.Model):
+    uid = models.UUIDField("쇼핑몰 결제내역", primary_key=True, editable=False)
+    data = models.BinaryField("포트원 결제내역 (zlib 압축 JSON)")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @staticmethod
+    def compress(meta: dict) -> bytes:
+        return zlib.compress(
+            json.dumps(meta, ensure_ascii=False, separators=(",", ":")).encode()
+        )
+
+    @staticmethod
+    def decompress(data: bytes) -> dict:
+        return json.loads(zlib.decompress(data))
+
+    @classmethod
+    def load(cls, uid: UUID) -> dict:
+        data = cls.objects.filter(uid=uid).values_list("data", flat=True).first()
+        if data is None:
+            return {}
+        return cls.decompress(bytes(data))
+
+    @classmethod
+    def store(cls, uid: UUID, meta: dict) -> None:
+        cls.objects.update_or_create(uid=uid, defaults={"data": cls.compress(meta)})
+
+    class Meta:
+        verbose_name = verbose_name_plural = "포트원 결제내역"
+
+
 # abstract 클래스는 마이그레이션시에 테이블을 생성하지 않습니다.
 # 단지 상속하기 위한 목적으로만 사용됩니다.
 
@@ -232,12 +322,14 @@ class AbstractPortonePayment(models.Model):
         PAID = "paid", "결제 완료"
         CANCELED = "canceled", "결제 취소"
         FAILED = "failed", "결제 실패"
+        # 포트원 장애로 검증하지 못한 상태. 포트원 선택지는 아니고, 다음 검증 때 실제 상태로 갱신됩니다.
+        PENDING = "pending", "검증 대기"
 
-    # 포트원 결제 새부 내역을 meta 필드로 저장
-    # models.JSONField는 리스트, 사전 자료구조 뿐만 아니라 복잡한 형태의 JSON 데이터를 저장할 수 있습니다.
-    meta = models.JSONField("포트원 결제내역", default=dict, editable=False)
-    # 결제 식별자 필드
-    uid = models.UUIDField("쇼핑몰 결제내역", default=uuid4, editable=False)
+    # 포트원 결제 세부 내역(meta)은 PortonePaymentMeta 테이블에 압축 저장하고, 접근할 때 지연 로딩합니다.
+    # 결제 식별자 필드. 포트원과 웹훅이 merchant_uid로 참조하므로 인덱스를 둡니다.
+    uid = models.UUIDField(
+        "쇼핑몰 결제내역", default=uuid4, editable=False, unique=True
+    )
     # 결제명
     name = models.CharField("결제명", max_length=200)
     # 결제 금액
@@ -259,28 +351,86 @@ class AbstractPortonePayment(models.Model):
     is_paid_ok = models.BooleanField(
         "결제성공 여부", default=False, db_index=True, editable=False
     )
+    # meta 중에서 조회에 사용하는 값만 컬럼으로 저장합니다.
+    paid_amount = models.PositiveIntegerField(
+        "실 결제 금액", null=True, blank=True, editable=False
+    )
+    paid_at = models.DateTimeField("결제 시각", null=True, blank=True, editable=False)
+    pg_tid = models.CharField(
+        "PG사 거래번호", max_length=100, blank=True, editable=False
+    )
+
+    # 아직 불러오지 않은 meta는 None, 저장이 필요한 meta는 _portone_meta_dirty가 True
+    # (장고 모델은 _meta 속성을 이미 사용하므로 다른 이름을 씁니다.)
+    _portone_meta: Optional[dict] = None
+    _portone_meta_dirty = False
+
+    @property
+    def meta(self) -> dict:
+        if self._portone_meta is None:
+            self._portone_meta = PortonePaymentMeta.load(self.uid)
+        return self._portone_meta
+
+    @meta.setter
+    def meta(self, value: dict) -> None:
+        self._portone_meta = value
+        self._portone_meta_dirty = True
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if self._portone_meta_dirty:
+                PortonePaymentMeta.store(self.uid, self._portone_meta)
+                self._portone_meta_dirty = False
 
     @property
     def merchant_uid(self) -> str:
         # 이렇게 str 변환을 하면 하이픈(-)이 포함된 uuid 문자열이 됩니다.
         return str(self.uid)
 
+    # 포트원/웹훅이 전달한 merchant_uid로 결제내역을 찾습니다. uid 인덱스를 타서 단건 조회로 끝납니다.
+    @classmethod
+    def get_by_merchant_uid(cls, merchant_uid: str):
+        try:
+            uid = UUID(merchant_uid)  # 하이픈 유무와 상관없이 변환됩니다.
+        except (
+            AttributeError,
+            TypeError,
+            ValueError,
+        ):  # 문자열이 아닌 값(숫자 등) 포함
+            raise cls.DoesNotExist(f"잘못된 merchant_uid 입니다: {merchant_uid}")
+        return cls.objects.get(uid=uid)
+
     # meta 내역을 갱신하고, pay_status 필드와 is_paid_ok 필드에 반영하는 메서드 구현이 필요 update 구현
 
     # 그냥 property만 이용하면 호출될 때 마다 iamport 인스턴스를 계속 만드는데
     # cached_property를 이용하면 self.api 속성 두번 째 접근부터는 메서드가 호출되지 않고, 캐싱된 iamport 인스턴스를 활용합니다.
+    # 타임아웃/재시도/서킷 브레이커가 적용된 클라이언트 (mall/portone.py)
     @cached_property
     def api(self):
-        return Iamport(
-            imp_key=settings.PORTONE_API_KEY, imp_secret=settings.PORTONE_API_SECRET
-        )
+        return get_client()
 
-    def update(self):
+    @property
+    def is_pending(self) -> bool:
+        return self.pay_status == self.PayStatus.PENDING
+
+    def update(self, commit=True):
         # self.api.find를 통해 결제내역 조회
         # 반환값을 결제 세부내역을 받으니, self.meta 필드에 반영합니다.
         # iamport-rest-client를 활용한 API 호출시에 2개의 예외가 발생할 수 있는데
+        # iamport는 import 비용이 커서 실제로 결제 API를 호출할 때 불러옵니다. (mall/portone.py 참고)
+        from iamport import Iamport
+
         try:
             self.meta = self.api.find(merchant_uid=self.merchant_uid)
+        except PortoneUnavailable as e:
+            # 포트원 장애 시에는 기다리지 않고 검증 대기로 표시만 해두고, 이후 재검증에서 갱신합니다.
+            logger.warning("결제 검증 보류 (%s): %s", self.merchant_uid, e)
+            self.pay_status = self.PayStatus.PENDING
+            self.is_paid_ok = False
+            if commit:
+                self.save()
+            return
         except (Iamport.ResponseError, Iamport.HttpError) as e:
             # 예외가 발생하면 예외를 잡아서 에러메세지와 예외정보를 지정하고,
             # Http404 에러를 발생시키겠습니다.
@@ -291,10 +441,21 @@ class AbstractPortonePayment(models.Model):
         self.pay_status = self.meta[
             "status"
         ]  # 예외가 발생하지 않는다면 이 값을 그대로 반영
+        self.paid_amount = self.meta.get("amount")
+        # 포트원은 결제 시각을 유닉스 타임스탬프로 주고, 미결제일 때는 0을 줍니다.
+        paid_at = self.meta.get("paid_at")
+        self.paid_at = (
+            datetime.datetime.fromtimestamp(paid_at, tz=datetime.timezone.utc)
+            if paid_at
+            else None
+        )
+        self.pg_tid = self.meta.get("pg_tid") or ""
 
         # Iamport 인스턴스에 is_paid 메서드를 지원하고 있습니다.
         # API 호출하지 않고 결제완료 여부를 판단해줌
         self.is_paid_ok = self.api.is_paid(self.desired_amount, response=self.meta)
+        if commit:
+            self.save()
 
     class Meta:
         abstract = True
@@ -306,19 +467,43 @@ class AbstractPortonePayment(models.Model):
 class OrderPayment(AbstractPortonePayment):  # 상속 받았음
     order = models.ForeignKey(Order, on_delete=models.CASCADE, db_constraint=False)
 
-    def update(self):
-        super().update()
+    def update(self, commit=True):
+        from_pay_status = self.pay_status
+        # 포트원 조회(타임아웃/재시도로 수 초가 걸릴 수 있음)는 트랜잭션 밖에서 하고,
+        # 결제/주문 상태 변경과 이벤트 기록만 하나의 트랜잭션으로 묶습니다.
+        super().update(commit=False)
+        with transaction.atomic():
+            self.apply_update(from_pay_status, commit)
+
+    def apply_update(self, from_pay_status: str, commit: bool) -> None:
+        if commit:
+            self.save()
+        if commit and from_pay_status != self.pay_status:
+            OrderEvent.objects.create(
+                event_type=OrderEvent.Type.PAYMENT_STATUS_CHANGED,
+                order_id=self.order_id,
+                payment_id=self.pk,
+                from_status=from_pay_status,
+                to_status=self.pay_status,
+                payload={
+                    "merchant_uid": self.merchant_uid,
+                    "is_paid_ok": self.is_paid_ok,
+                    "paid_amount": self.paid_amount,
+                },
+            )
         if self.is_paid_ok:  # 완료라면
-            self.order.status = Order.Status.PAID
-            self.order.save()
+            self.order.change_status(Order.Status.PAID, payment_id=self.pk)
             # 다수의 결제시도
-            self.order.orderpayment_set.exclude(pk=self.pk).delete()
+            other_payment_qs = self.order.orderpayment_set.exclude(pk=self.pk)
+            PortonePaymentMeta.objects.filter(
+                uid__in=other_payment_qs.values("uid")
+            ).delete()
+            other_payment_qs.delete()
         elif self.pay_status in (
             self.PayStatus.CANCELED,
             self.PayStatus.FAILED,
         ):  # 두 가지 상태중 하나일 때
-            self.order.status = Order.Status.FAILED_PAYMENT
-            self.order.save()
+            self.order.change_status(Order.Status.FAILED_PAYMENT, payment_id=self.pk)
 
     # order 인자로부터 OrderPayment를 생성해서 반환하겠습니다.
     @classmethod
@@ -332,3 +517,344 @@ class OrderPayment(AbstractPortonePayment):  # 상속 받았음
             buyer_name=order.user.get_full_name() or order.user.username,
             buyer_email=order.user.email,
         )
+
+    class Meta:
+        # 관리자 목록 필터(결제상태, 결제여부, 결제시각)용 인덱스
+        indexes = [
+            models.Index(fields=["pay_status", "is_paid_ok"]),
+            models.Index(fields=["paid_at"]),
+        ]
+
+
+# 주문/결제 상태 변경 이력을 쌓는 추가 전용(append-only) 이벤트 로그
+# 상태 변경과 같은 트랜잭션에서 기록되고, 이 테이블 자체가 outbox 역할을 합니다.
+# 배송/분석 등 외부 시스템은 테이블을 폴링하지 않고 pk(오프셋) 이후의 이벤트만 이어서 읽습니다. (mall/events.py)
+class OrderEvent(models.Model):
+    class Type(models.TextChoices):
+        ORDER_STATUS_CHANGED = "order.status_changed", "주문 상태 변경"
+        PAYMENT_STATUS_CHANGED = "payment.status_changed", "결제 상태 변경"
+
+    event_type = models.CharField("이벤트 종류", max_length=50, choices=Type.choices)
+    # 주문/결제가 삭제되어도 이벤트는 남아야 하므로 외래키 대신 id만 저장합니다.
+    order_id = models.BigIntegerField("주문 id", db_index=True)
+    payment_id = models.BigIntegerField("결제 id", null=True, blank=True)
+    from_status = models.CharField("이전 상태", max_length=20, blank=True)
+    to_status = models.CharField("변경 상태", max_length=20)
+    payload = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            raise ValueError("OrderEvent는 수정할 수 없습니다. (append-only)")
+        super().save(*args, **kwargs)
+
+    def as_dict(self) -> dict:
+        return {
+            "id": self.pk,
+            "event_type": self.event_type,
+            "order_id": self.order_id,
+            "payment_id": self.payment_id,
+            "from_status": self.from_status,
+            "to_status": self.to_status,
+            "payload": self.payload,
+            "created_at": self.created_at.isoformat(),
+        }
+
+    class Meta:
+        verbose_name = verbose_name_plural = "주문 이벤트"
+        ordering = ["pk"]
+
+
+# 싱크(소비자)별로 마지막으로 전달한 이벤트 pk를 저장합니다.
+class EventConsumerOffset(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+    last_event_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} - {self.last_event_id}"
+
+
+# 대량 결제취소 작업. 작업 단위로 취소 대상 결제를 CancellationItem에 먼저 저장해두고 처리하므로,
+# 도중에 프로세스가 죽어도 남은 PENDING 항목부터 다시 이어서 처리할 수 있습니다. (mall/cancellation.py)
+class CancellationJob(models.Model):
+    class Status(models.TextChoices):
+        PENDING = "pending", "대기"
+        RUNNING = "running", "진행중"
+        DONE = "done", "완료"
+
+    reason = models.CharField("취소 사유", max_length=200)
+    status = models.CharField(
+        "진행상태", max_length=20, choices=Status.choices, default=Status.PENDING
+    )
+    total_count = models.PositiveIntegerField("전체 건수", default=0)
+    canceled_count = models.PositiveIntegerField("취소 건수", default=0)
+    failed_count = models.PositiveIntegerField("실패 건수", default=0)
+    skipped_count = models.PositiveIntegerField("제외 건수", default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"<{self.pk}> {self.reason} ({self.get_status_display()})"
+
+    class Meta:
+        verbose_name = verbose_name_plural = "결제취소 작업"
+        ordering = ["-pk"]
+
+
+class CancellationItem(models.Model):
+    class Status(models.TextChoices):
+        PENDING = "pending", "대기"
+        CANCELED = "canceled", "취소완료"
+        FAILED = "failed", "실패"
+        SKIPPED = "skipped", "제외"  # 결제완료 상태가 아니라서 취소 대상이 아님
+
+    job = models.ForeignKey(
+        CancellationJob,
+        on_delete=models.CASCADE,
+        db_constraint=False,
+        related_name="item_set",
+    )
+    payment = models.ForeignKey(
+        OrderPayment, on_delete=models.CASCADE, db_constraint=False
+    )
+    status = models.CharField(
+        max_length=20, choices=Status.choices, default=Status.PENDING
+    )
+    attempts = models.PositiveSmallIntegerField("시도 횟수", default=0)
+    error = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["job", "status"]),
+        ]
+
+
+# 관리자 대량 작업(상태 일괄 변경, 가격 변경 등)을 작업 큐에서 청크 단위로 처리하는 작업
+# 선택한 대상은 연속된 pk 구간 목록으로 저장하므로 "전체 선택"처럼 수십만 건이어도 몇 개의 구간으로 끝나고,
+# 처리한 마지막 pk를 기록하면서 pk 순으로 나눠 처리하므로 중단되면 마지막 pk 다음부터 이어서 처리합니다. (mall/bulk_actions.py)
+class BulkActionJob(models.Model):
+    class Status(models.TextChoices):
+        PENDING = "pending", "대기"
+        RUNNING = "running", "진행중"
+        DONE = "done", "완료"
+        CANCELED = "canceled", "중단"
+        FAILED = "failed", "실패"
+
+    action = models.CharField("작업", max_length=100)
+    params = models.JSONField("작업 인자", default=dict, blank=True)
+    model = models.CharField("대상 모델", max_length=100)  # app_label.model_name
+    # 작업을 만들 때의 대상 행 pk 구간 [[처음 pk, 마지막 pk], ...] (오름차순, 양 끝 포함)
+    # 쿼리 대신 pk를 저장하므로 배포(모델/장고 버전 변경) 후에도 그대로 이어서 처리합니다.
+    # 목록/진행상황 화면에서는 읽지 않도록 defer("target_ranges") 합니다.
+    target_ranges = models.JSONField("대상 pk 구간 목록", default=list)
+    status = models.CharField(
+        "진행상태",
+        max_length=20,
+        choices=Status.choices,
+        default=Status.PENDING,
+        db_index=True,
+    )
+    total_count = models.PositiveIntegerField("전체 건수", default=0)
+    processed_count = models.PositiveIntegerField("처리 건수", default=0)
+    changed_count = models.PositiveIntegerField("변경 건수", default=0)
+    last_pk = models.BigIntegerField("마지막 처리 pk", default=0)
+    cancel_requested = models.BooleanField("중단 요청", default=False)
+    error = models.TextField(blank=True)
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_constraint=False,
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField("시작 시각", null=True, blank=True)
+    finished_at = models.DateTimeField("종료 시각", null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"<{self.pk}> {self.action} ({self.get_status_display()})"
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (
+            self.Status.DONE,
+            self.Status.CANCELED,
+            self.Status.FAILED,
+        )
+
+    class Meta:
+        verbose_name = verbose_name_plural = "대량 작업"
+        ordering = ["-pk"]
+
+
+# 일별 매출 집계(rollup) 테이블
+# 주문이 결제완료(PAID)가 될 때 더하고, 취소/결제실패로 바뀌면 뺍니다. (mall/sales.py)
+# 관리자 매출 화면은 주문/주문상품 테이블을 읽지 않고 이 테이블만 읽습니다.
+# 집계가 어긋났을 때는 rebuild_sales_rollups 명령으로 주문 데이터에서 다시 계산합니다.
+class DailyProductSales(models.Model):
+    date = models.DateField("판매일")
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, db_constraint=False)
+    quantity = models.BigIntegerField("판매수량", default=0)
+    revenue = models.BigIntegerField("매출", default=0)
+
+    class Meta:
+        verbose_name = verbose_name_plural = "일별 상품 매출"
+        ordering = ["-date", "-revenue"]
+        constraints = [
+            UniqueConstraint(fields=["date", "product"], name="unique_daily_product"),
+        ]
+
+
+class DailyCategorySales(models.Model):
+    date = models.DateField("판매일")
+    category = models.ForeignKey(
+        Category, on_delete=models.CASCADE, db_constraint=False
+    )
+    quantity = models.BigIntegerField("판매수량", default=0)
+    revenue = models.BigIntegerField("매출", default=0)
+
+    class Meta:
+        verbose_name = verbose_name_plural = "일별 분류 매출"
+        ordering = ["-date", "-revenue"]
+        constraints = [
+            UniqueConstraint(fields=["date", "category"], name="unique_daily_category"),
+        ]
+
+
+# DB 기반 작업 큐 (mall/taskqueue.py)
+# 요청 안에서 처리하기 느린 일(결제 재검증, 썸네일 생성, 사진 다운로드 등)을 이 테이블에 넣어두면
+# run_tasks 워커가 가져가서 실행합니다. 성공한 작업은 바로 삭제하고, 재시도를 모두 실패한 작업만 남깁니다.
+class Task(models.Model):
+    class Status(models.TextChoices):
+        QUEUED = "queued", "대기"
+        RUNNING = "running", "실행중"
+        FAILED = "failed", "실패"
+
+    name = models.CharField("작업 이름", max_length=100)
+    kwargs = models.JSONField("작업 인자", default=dict, blank=True)
+    queue = models.CharField("큐", max_length=50, default="default")
+    priority = models.SmallIntegerField("우선순위", default=0)  # 클수록 먼저 실행
+    status = models.CharField(
+        "진행상태", max_length=20, choices=Status.choices, default=Status.QUEUED
+    )
+    attempts = models.PositiveSmallIntegerField("시도 횟수", default=0)
+    max_attempts = models.PositiveSmallIntegerField("최대 시도 횟수", default=5)
+    run_at = models.DateTimeField("실행 예정 시각", default=timezone.now)
+    locked_by = models.CharField("실행 워커", max_length=100, blank=True)
+    locked_at = models.DateTimeField("실행 시작 시각", null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"<{self.pk}> {self.name} ({self.get_status_display()})"
+
+    class Meta:
+        verbose_name = verbose_name_plural = "작업 큐"
+        indexes = [
+            # 워커가 가져갈 작업을 찾는 조건/정렬 순서와 같게 둡니다.
+            models.Index(
+                fields=["status", "queue", "-priority", "run_at"],
+                name="mall_task_claim_idx",
+            ),
+        ]
+
+
+# 함께 많이 구매한 상품 추천 (mall/recommendations.py, build_recommendations 명령)
+# 매출에 잡히는 주문(결제완료 이후)에서 두 상품이 같은 주문에 담긴 횟수입니다.
+# 상품별로 바로 읽을 수 있도록 (A, B), (B, A) 양방향으로 저장합니다.
+class ProductPairCount(models.Model):
+    product = models.ForeignKey(
+        Product, on_delete=models.CASCADE, db_constraint=False, related_name="+"
+    )
+    other = models.ForeignKey(
+        Product, on_delete=models.CASCADE, db_constraint=False, related_name="+"
+    )
+    count = models.PositiveIntegerField("함께 구매한 주문 수", default=0)
+
+    class Meta:
+        verbose_name = verbose_name_plural = "상품 동시구매 횟수"
+        constraints = [
+            UniqueConstraint(fields=["product", "other"], name="unique_product_pair"),
+        ]
+
+
+# 상품별 추천 결과. 장바구니 화면은 이 테이블만 읽습니다.
+class ProductRecommendation(models.Model):
+    product = models.OneToOneField(
+        Product,
+        on_delete=models.CASCADE,
+        db_constraint=False,
+        primary_key=True,
+        related_name="recommendation",
+    )
+    order_count = models.PositiveIntegerField("구매한 주문 수", default=0)
+    # 점수가 높은 순서의 [상품 id, 점수] 목록 (최대 RECOMMENDATION_TOP_K개)
+    neighbors = models.JSONField("함께 구매한 상품", default=list, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = verbose_name_plural = "상품 추천"
+
+
+# 보관(cold) 주문 테이블 (mall/archive.py, archive_orders 명령)
+# 오래된 배송완료/취소 주문을 주문상품/결제시도와 함께 같은 pk로 옮겨서, 운영(hot) 테이블 크기를 일정하게 유지합니다.
+# 옮긴 값을 그대로 보존해야 하므로 auto_now/auto_now_add 없이 원래 시각을 저장합니다.
+class ArchivedOrder(models.Model):
+    is_archived = True  # 템플릿에서 보관 주문 여부를 구분합니다.
+
+    id = models.BigIntegerField(primary_key=True)
+    uid = models.UUIDField(editable=False)
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, db_constraint=False, related_name="+"
+    )
+    total_amount = models.PositiveIntegerField("결제금액")
+    status = models.CharField("진행상태", max_length=20, choices=Order.Status.choices)
+    created_at = models.DateTimeField(db_index=True)
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField("보관 시각", auto_now_add=True)
+
+    def __str__(self):
+        return f"<{self.pk}> {self.uid}"
+
+    class Meta:
+        verbose_name = verbose_name_plural = "보관 주문"
+        ordering = ["-pk"]
+        indexes = [
+            models.Index(fields=["user", "-id"]),  # 주문내역 화면
+        ]
+
+
+class ArchivedOrderedProduct(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    # Order와 같은 이름(orderedproduct_set)으로 접근하도록 해서 템플릿을 함께 씁니다.
+    order = models.ForeignKey(
+        ArchivedOrder,
+        on_delete=models.CASCADE,
+        db_constraint=False,
+        related_name="orderedproduct_set",
+    )
+    product = models.ForeignKey(
+        Product, on_delete=models.CASCADE, db_constraint=False, related_name="+"
+    )
+    name = models.CharField("상품명", max_length=100)
+    price = models.PositiveIntegerField("상품가격")
+    quantity = models.PositiveIntegerField("수량")
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+
+# 결제 세부내역(meta)은 uid로 PortonePaymentMeta에 그대로 남아 있으므로 옮기지 않습니다.
+class ArchivedOrderPayment(AbstractPortonePayment):
+    id = models.BigIntegerField(primary_key=True)
+    order = models.ForeignKey(
+        ArchivedOrder,
+        on_delete=models.CASCADE,
+        db_constraint=False,
+        related_name="orderpayment_set",
+    )
+
+    class Meta:
+        verbose_name = verbose_name_plural = "보관 결제내역"
@@ -0,0 +1,132 @@
+import hashlib
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseNotModified
+from django.shortcuts import render
+
+from mall import metrics
+from mall.models import Order
+from mall.page_cache import fill_csrf_token, set_cache_headers
+from mall.sales import COUNTED_ORDER_STATUSES
+
+# 주문내역(order_detail) 화면 캐시
+# 결제가 끝난 주문(결제완료 이후/취소)은 주문상품이 더 이상 바뀌지 않고 상태만 바뀝니다.
+# 그래서 주문별로 현재 상태(state: 주인, 상태, 변경시각)를 캐시에 두고, 렌더링한 화면은
+# "사용자 + 주문 pk + 상태 + 변경시각" 키로 저장합니다. 캐시가 맞으면 DB를 읽지 않고 화면을 돌려줍니다.
+#
+# 무효화는 상태가 바뀔 때만 일어납니다. 상태를 바꾸는 곳(Order.save, 배송 상태 일괄 반영, 대량 결제취소)에서
+# 커밋 후 state를 새 값으로 덮어쓰면, 이전 상태의 화면 키는 더 이상 읽히지 않고 만료됩니다.
+# 화면을 렌더링한 요청은 state를 add로만 저장하므로, 렌더링 중에 바뀐 상태를 이전 값으로 덮어쓰지 않습니다.
+# 보관 테이블(mall/archive.py)로 옮겨도 상태/변경시각이 같으므로 캐시가 그대로 쓰입니다.
+
+FINAL_ORDER_STATUSES = (*COUNTED_ORDER_STATUSES, Order.Status.CANCELED)
+
+
+def state_key(pk: int) -> str:
+    return f"order_detail:state:{pk}"
+
+
+def page_key(user_id, pk: int, status: str, updated_at: int) -> str:
+    return f"order_detail:page:{user_id}:{pk}:{status}:{updated_at}"
+
+
+def make_state(pk: int, user_id, status: str, updated_at) -> dict:
+    # 변경시각은 마이크로초 정수로 저장해서 키에 그대로 씁니다.
+    return {
+        "pk": pk,
+        "user_id": user_id,
+        "status": status,
+        "updated_at": int(updated_at.timestamp() * 1_000_000),
+    }
+
+
+def set_states(states: Iterable[dict]) -> None:
+    cache.set_many(
+        {state_key(state["pk"]): state for state in states},
+        settings.ORDER_DETAIL_CACHE_TIMEOUT,
+    )
+
+
+def set_states_on_commit(states: Iterable[dict]) -> None:
+    # 커밋 전에 바꾸면 다른 요청이 아직 커밋되지 않은 이전 상태로 화면을 다시 캐시할 수 있습니다.
+    states = list(states)
+    if states:
+        transaction.on_commit(lambda: set_states(states))
+
+
+def is_cacheable_request(request) -> bool:
+    # 화면에 메시지가 나오는 요청은 캐시하지 않습니다. (메시지는 한 번만 보여야 합니다.)
+    return request.method in ("GET", "HEAD") and not get_messages(request)
+
+
+def get_cached_response(request, pk: int) -> Optional[HttpResponse]:
+    if not is_cacheable_request(request):
+        metrics.inc("order_detail_cache_requests_total", result="bypass")
+        return None
+    state = cache.get(state_key(pk))
+    entry = None
+    if (
+        state is not None
+        and state["user_id"] == request.user.pk
+        and state["status"] in FINAL_ORDER_STATUSES
+    ):
+        entry = cache.get(
+            page_key(request.user.pk, pk, state["status"], state["updated_at"])
+        )
+    if entry is None:
+        metrics.inc("order_detail_cache_requests_total", result="miss")
+        return None
+
+    metrics.inc("order_detail_cache_requests_total", result="hit")
+    if request.headers.get("If-None-Match") == entry["etag"]:
+        return set_cache_headers(HttpResponseNotModified(), entry["etag"], "HIT")
+    response = HttpResponse(entry["content"], content_type=entry["content_type"])
+    fill_csrf_token(request, response)
+    return set_cache_headers(response, entry["etag"], "HIT")
+
+
+def render_order(request, order, template_name: str, context: dict) -> HttpResponse:
+    # 결제가 끝난 주문이면 렌더링한 화면을 저장합니다. (CSRF 토큰 자리는 mall/page_cache.py 처럼 비워둡니다.)
+    if order.status not in FINAL_ORDER_STATUSES or not is_cacheable_request(request):
+        return render(request, template_name, context)
+
+    request.page_cache_storing = True
+    try:
+        response = render(request, template_name, context)
+    finally:
+        request.page_cache_storing = False
+
+    state = make_state(order.pk, order.user_id, order.status, order.updated_at)
+    etag = f'"{hashlib.md5(response.content).hexdigest()}"'
+    timeout = settings.ORDER_DETAIL_CACHE_TIMEOUT
+    cache.set(
+        page_key(order.user_id, order.pk, state["status"], state["updated_at"]),
+        {
+            "content": response.content,
+            "content_type": response["Content-Type"],
+            "etag": etag,
+        },
+        timeout,
+    )
+    cache.add(state_key(order.pk), state, timeout)
+    fill_csrf_token(request, response)
+    return set_cache_headers(response, etag, "MISS")
+
+
+@receiver(post_save, sender=Order)
+def update_order_state(sender, instance: Order, created: bool, **kwargs):
+    # change_status와 관리자 화면의 수정이 모두 save()를 거칩니다.
+    if not created:
+        set_states_on_commit(
+            [
+                make_state(
+                    instance.pk, instance.user_id, instance.status, instance.updated_at
+                )
+            ]
+        )
@@ -0,0 +1,222 @@
+import hashlib
+import time
+from functools import wraps
+from typing import Callable, Dict, Iterable, Optional
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseNotModified
+from django.middleware.csrf import get_token
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+from mall import metrics
+from mall.models import Category, Product
+
+# 비로그인 사용자용 전체 페이지 캐시
+# 상품 목록/루트 페이지는 비로그인 사용자에게는 query, page 값이 같으면 모두 같은 화면이므로
+# 렌더링된 HTML을 캐시에 두고 쿼리셋/페이지네이터 count/템플릿 렌더링을 건너뜁니다.
+#
+# 태그 기반 퍼지
+# 캐시된 페이지는 화면에 나온 상품/분류를 태그(product:<pk>, category:<pk>, product_list)로 기억합니다.
+# 태그마다 버전 값을 캐시에 두고 페이지를 저장할 때의 태그 버전을 함께 저장해서, 읽을 때 버전이 바뀐 페이지는 버립니다.
+# 상품 가격이 바뀌면 그 상품이 나온 페이지만, 목록 구성(이름/상태/추가/삭제)이 바뀌면 모든 목록 페이지가 무효화됩니다.
+# 퍼지가 다른 워커에도 반영되려면 CACHE_URL로 공유 캐시(redis/memcached)를 지정해야 합니다.
+
+# 캐시에 저장하는 HTML에는 요청한 사용자의 CSRF 토큰 대신 이 값을 넣고, 응답할 때마다 요청자의 토큰으로 바꿉니다.
+CSRF_PLACEHOLDER = "__page_cache_csrf_token__"
+
+LIST_TAG = "product_list"
+
+
+def csrf_placeholder(request):
+    # TEMPLATES context_processors에 등록합니다. 장고 기본 csrf 컨텍스트보다 나중에 적용되어 값을 덮어씁니다.
+    if getattr(request, "page_cache_storing", False):
+        return {"csrf_token": CSRF_PLACEHOLDER}
+    return {}
+
+
+def tag_version_key(tag: str) -> str:
+    return f"page_cache:tag:{tag}"
+
+
+def get_tag_versions(tags: Iterable[str]) -> Dict[str, int]:
+    keys = {tag_version_key(tag): tag for tag in tags}
+    found = cache.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    for key in missing:
+        # 버전 키가 캐시에서 밀려난 경우에도 이전 페이지와 버전이 겹치지 않도록 시각 값을 씁니다.
+        cache.add(key, time.time_ns(), timeout=None)
+    if missing:
+        found.update(cache.get_many(missing))
+    return {keys[key]: version for key, version in found.items()}
+
+
+def purge_tags(tags: Iterable[str]) -> None:
+    tags = set(tags)
+    cache.set_many({tag_version_key(tag): time.time_ns() for tag in tags}, timeout=None)
+    for tag in tags:
+        metrics.inc("page_cache_purges_total", tag=tag.split(":", 1)[0])
+
+
+def purge_on_commit(tags: Iterable[str]) -> None:
+    # 커밋 전에 퍼지하면 다른 요청이 아직 커밋되지 않은 이전 데이터로 페이지를 다시 캐시할 수 있습니다.
+    tags = list(tags)
+    transaction.on_commit(lambda: purge_tags(tags))
+
+
+def is_cacheable_request(request) -> bool:
+    if request.method not in ("GET", "HEAD"):
+        return False
+    # 세션 쿠키가 없으면 비로그인 사용자입니다. 메시지 쿠키가 있으면 화면에 메시지가 나오므로 제외합니다.
+    return (
+        settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and "messages" not in request.COOKIES
+    )
+
+
+def normalize_params(request, params: Dict[str, str]) -> Optional[str]:
+    # params : 허용할 파라미터 이름 → 기본값. 기본값과 같거나 빈 값은 키에서 제외합니다.
+    # 허용하지 않은 파라미터가 있으면 None을 반환해서 캐시를 사용하지 않습니다.
+    # (페이지 링크에 현재 URL의 파라미터가 그대로 들어가므로 다른 요청과 공유할 수 없습니다.)
+    if set(request.GET) - set(params):
+        return None
+    normalized = []
+    for name, default in sorted(params.items()):
+        values = request.GET.getlist(name)
+        if len(values) > 1:
+            return None
+        value = values[0] if values else ""
+        if value and value != default:
+            normalized.append((name, value))
+    return urlencode(normalized)
+
+
+def product_list_tags(response) -> list:
+    tags = [LIST_TAG]
+    for product in response.context_data["object_list"]:
+        tags += [f"product:{product.pk}", f"category:{product.category_id}"]
+    return tags
+
+
+def set_cache_headers(response, etag: str, state: str):
+    response["ETag"] = etag
+    response["X-Page-Cache"] = state
+    # 로그인하면 같은 URL이라도 다른 화면이므로 쿠키별로 구분하고, 브라우저에는 짧게만 캐시합니다.
+    patch_vary_headers(response, ["Cookie"])
+    patch_cache_control(
+        response, private=True, max_age=settings.PAGE_CACHE_BROWSER_MAX_AGE
+    )
+    return response
+
+
+def fill_csrf_token(request, response):
+    # 저장된 HTML의 CSRF 자리에 요청자의 토큰을 넣습니다. (토큰 쿠키도 이때 발급됩니다.)
+    response.content = response.content.replace(
+        CSRF_PLACEHOLDER.encode(), get_token(request).encode()
+    )
+    return response
+
+
+def cache_anonymous_page(
+    view_name: str,
+    params: Optional[Dict[str, str]] = None,
+    tags: Optional[Callable] = None,
+):
+    params = params or {}
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            normalized = normalize_params(request, params)
+            if normalized is None or not is_cacheable_request(request):
+                metrics.inc(
+                    "page_cache_requests_total", view=view_name, result="bypass"
+                )
+                return view_func(request, *args, **kwargs)
+
+            digest = hashlib.md5(f"{args}{kwargs}?{normalized}".encode()).hexdigest()
+            key = f"page_cache:page:{view_name}:{digest}"
+            entry = cache.get(key)
+            if entry is not None and get_tag_versions(entry["tags"]) == entry["tags"]:
+                metrics.inc("page_cache_requests_total", view=view_name, result="hit")
+                if request.headers.get("If-None-Match") == entry["etag"]:
+                    return set_cache_headers(
+                        HttpResponseNotModified(), entry["etag"], "HIT"
+                    )
+                response = HttpResponse(
+                    entry["content"], content_type=entry["content_type"]
+                )
+                fill_csrf_token(request, response)
+                return set_cache_headers(response, entry["etag"], "HIT")
+
+            result = "miss" if entry is None else "stale"
+            metrics.inc("page_cache_requests_total", view=view_name, result=result)
+            # 목록 태그 버전은 렌더링 전에 읽어서, 렌더링 중에 일어난 변경이 캐시에 묻히지 않도록 합니다.
+            list_versions = get_tag_versions([LIST_TAG]) if tags else {}
+            # TemplateResponse는 render() 할 때 컨텍스트 프로세서가 실행되므로 렌더링이 끝날 때까지 켜둡니다.
+            request.page_cache_storing = True
+            try:
+                response = view_func(request, *args, **kwargs)
+                page_tags = []
+                if hasattr(response, "render"):
+                    if tags:
+                        page_tags = tags(response)
+                    response.render()
+            finally:
+                request.page_cache_storing = False
+            if response.streaming:
+                return response
+            if response.status_code != 200:
+                return fill_csrf_token(request, response)
+
+            tag_versions = get_tag_versions(page_tags)
+            tag_versions.update(list_versions)
+            etag = f'"{hashlib.md5(response.content).hexdigest()}"'
+            cache.set(
+                key,
+                {
+                    "content": response.content,
+                    "content_type": response["Content-Type"],
+                    "tags": tag_versions,
+                    "etag": etag,
+                },
+                settings.PAGE_CACHE_TIMEOUT,
+            )
+            fill_csrf_token(request, response)
+            return set_cache_headers(response, etag, "MISS")
+
+        return wrapper
+
+    return decorator
+
+
+# 목록 구성(검색 결과, 정렬, 노출 여부)에 영향을 주는 필드
+LIST_FIELDS = ("name", "status")
+
+
+@receiver(post_save, sender=Product)
+def purge_product(sender, instance: Product, created: bool, **kwargs):
+    tags = [f"product:{instance.pk}"]
+    loaded_values = getattr(instance, "_loaded_values", None)
+    if (
+        created
+        or loaded_values is None
+        or any(loaded_values.get(f) != getattr(instance, f) for f in LIST_FIELDS)
+    ):
+        tags.append(LIST_TAG)
+    purge_on_commit(tags)
+
+
+@receiver(post_delete, sender=Product)
+def purge_deleted_product(sender, instance: Product, **kwargs):
+    purge_on_commit([f"product:{instance.pk}", LIST_TAG])
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def purge_category(sender, instance: Category, **kwargs):
+    purge_on_commit([f"category:{instance.pk}"])
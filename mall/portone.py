@@ -0,0 +1,152 @@
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, Optional
+
+from django.conf import settings
+
+from mall import metrics
+
+if TYPE_CHECKING:
+    from mall.portone_client import PortoneClient
+
+# 포트원 API 호출을 감싸는 장애 대응 계층
+# 포트원이 느려지면 모든 워커가 응답을 기다리며 묶여서 결제와 상관없는 상품 목록 페이지까지 멈춥니다.
+# 그래서 모든 포트원 호출에 타임아웃, 재시도 예산 안에서의 지터 재시도, 서킷 브레이커를 적용합니다.
+logger = logging.getLogger(__name__)
+
+
+class PortoneUnavailable(Exception):
+    """서킷이 열려 있거나 재시도를 모두 소진해서 포트원 응답을 받지 못했을 때 발생합니다."""
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        # 연속 실패가 failure_threshold 횟수에 이르면 서킷을 열고,
+        # 연 뒤 reset_timeout(초)이 지나면 시험 호출 1건을 허용합니다.
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failure_count = 0
+        self.trip_count = 0  # 서킷이 열린 누적 횟수 (모니터링용)
+        self.opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at >= self.reset_timeout:
+                    # 반열림 상태에서는 시험 호출 1건만 통과시키고 결과에 따라 닫거나 다시 엽니다.
+                    self.state = self.HALF_OPEN
+                    return True
+                return False
+            # HALF_OPEN: 이미 시험 호출이 진행 중이므로 나머지는 바로 실패 처리
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != self.CLOSED:
+                metrics.set_gauge("portone_circuit_open", 0)
+            self.state = self.CLOSED
+            self.failure_count = 0
+            self.opened_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failure_count += 1
+            if (
+                self.state == self.HALF_OPEN
+                or self.failure_count >= self.failure_threshold
+            ):
+                if self.state != self.OPEN:
+                    self.trip_count += 1
+                    metrics.inc("portone_circuit_trips_total")
+                    metrics.set_gauge("portone_circuit_open", 1)
+                    logger.warning(
+                        "포트원 서킷 브레이커가 열렸습니다. (연속 실패 %d회)",
+                        self.failure_count,
+                    )
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "failure_count": self.failure_count,
+                "trip_count": self.trip_count,
+            }
+
+
+class RetryBudget:
+    # 호출 1건마다 ratio 만큼 토큰이 쌓이고, 재시도 1회마다 토큰 1개를 씁니다.
+    # 장애 상황에서 재시도가 전체 호출량의 ratio 비율을 넘지 않도록 막아서 재시도 폭풍을 방지합니다.
+    def __init__(self, ratio: float, min_tokens: float, max_tokens: float):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = min_tokens
+        self.exhausted_count = 0  # 예산이 없어 재시도를 포기한 횟수 (모니터링용)
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        with self._lock:
+            self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            self.exhausted_count += 1
+            return False
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "tokens": round(self.tokens, 2),
+                "exhausted_count": self.exhausted_count,
+            }
+
+
+# 브레이커와 재시도 예산은 프로세스 전역으로 공유합니다.
+# 결제 인스턴스마다 따로 두면 장애를 감지하지 못하고 모든 요청이 타임아웃까지 기다리게 됩니다.
+breaker = CircuitBreaker(
+    failure_threshold=settings.PORTONE_BREAKER_FAILURE_THRESHOLD,
+    reset_timeout=settings.PORTONE_BREAKER_RESET_TIMEOUT,
+)
+retry_budget = RetryBudget(
+    ratio=settings.PORTONE_RETRY_BUDGET_RATIO,
+    min_tokens=settings.PORTONE_RETRY_BUDGET_MIN_TOKENS,
+    max_tokens=settings.PORTONE_RETRY_BUDGET_MAX_TOKENS,
+)
+
+
+def get_status() -> Dict:
+    return {
+        "breaker": breaker.snapshot(),
+        "retry_budget": retry_budget.snapshot(),
+    }
+
+
+def endpoint_label(path: str) -> str:
+    # payments/find/<merchant_uid> 처럼 식별자가 들어간 경로는 라벨 종류가 폭증하지 않도록 :id로 바꿉니다.
+    segments = [s for s in path.split("/") if s][:3]
+    return "/".join(
+        ":id" if any(c.isdigit() for c in segment) else segment for segment in segments
+    )
+
+
+def get_client() -> "PortoneClient":
+    # iamport와 requests는 import 비용이 커서 결제 API를 처음 호출할 때 불러옵니다.
+    # 결제와 상관없는 페이지만 처리하는 워커는 이 모듈들을 읽지 않고 기동합니다.
+    from mall.portone_client import PortoneClient
+
+    return PortoneClient(
+        imp_key=settings.PORTONE_API_KEY, imp_secret=settings.PORTONE_API_SECRET
+    )
@@ -0,0 +1,118 @@
+import logging
+import random
+import time
+from typing import Callable
+
+import requests
+from django.conf import settings
+from iamport import Iamport
+
+from mall import metrics
+from mall.portone import PortoneUnavailable, breaker, endpoint_label, retry_budget
+
+# iamport-rest-client 기반 포트원 클라이언트
+logger = logging.getLogger("mall.portone")
+
+
+class TimeoutSession(requests.Session):
+    # iamport 라이브러리는 timeout 인자 없이 요청을 보내므로 세션 단에서 기본 타임아웃을 지정합니다.
+    def __init__(self, timeout):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+def outcome_label(e: Exception) -> str:
+    if isinstance(e, PortoneUnavailable):
+        return "unavailable"
+    if isinstance(e, Iamport.ResponseError):
+        return "response_error"
+    if isinstance(e, Iamport.HttpError):
+        return "http_error"
+    return "error"
+
+
+def is_retryable(e: Exception) -> bool:
+    # 네트워크 오류와 5xx 응답만 재시도합니다.
+    # ResponseError(결제내역 없음 등)는 포트원이 정상 응답한 것이니 재시도하지 않습니다.
+    if isinstance(e, (requests.Timeout, requests.ConnectionError)):
+        return True
+    return isinstance(e, Iamport.HttpError) and (e.code or 0) >= 500
+
+
+class PortoneClient(Iamport):
+    def __init__(self, imp_key, imp_secret, **kwargs):
+        super().__init__(imp_key, imp_secret, **kwargs)
+        # 어댑터 자체 재시도(max_retries=3)는 타임아웃을 3배로 늘리므로 끄고, 재시도는 call에서 관리합니다.
+        self.requests_session = TimeoutSession(
+            timeout=(
+                settings.PORTONE_CONNECT_TIMEOUT,
+                settings.PORTONE_READ_TIMEOUT,
+            )
+        )
+
+    def call(self, func: Callable, url: str, *args):
+        endpoint = endpoint_label(url[len(self.imp_url) :])
+        if not breaker.allow_request():
+            metrics.inc("portone_requests_total", endpoint=endpoint, outcome="open")
+            raise PortoneUnavailable("포트원 서킷이 열려 있습니다.")
+
+        started = time.perf_counter()
+        try:
+            result = self._call_with_retry(func, endpoint, url, *args)
+        except Exception as e:
+            outcome = outcome_label(e)
+            raise
+        else:
+            outcome = "success"
+            return result
+        finally:
+            metrics.inc("portone_requests_total", endpoint=endpoint, outcome=outcome)
+            metrics.observe(
+                "portone_latency_seconds",
+                time.perf_counter() - started,
+                endpoint=endpoint,
+            )
+
+    def _call_with_retry(self, func: Callable, endpoint: str, *args):
+        retry_budget.deposit()
+        attempt = 0
+        while True:
+            try:
+                result = func(*args)
+            except Exception as e:
+                if not is_retryable(e):
+                    breaker.record_success()  # 포트원은 응답했으므로 장애로 보지 않습니다.
+                    raise
+                breaker.record_failure()
+                attempt += 1
+                if (
+                    attempt > settings.PORTONE_MAX_RETRIES
+                    or not breaker.allow_request()
+                    or not retry_budget.withdraw()
+                ):
+                    logger.error("포트원 호출 실패: %s", e)
+                    raise PortoneUnavailable(str(e)) from e
+                # full jitter: 0 ~ base * 2^attempt 사이에서 무작위로 대기해서 재시도가 몰리지 않게 합니다.
+                backoff = min(
+                    settings.PORTONE_RETRY_BACKOFF_MAX,
+                    settings.PORTONE_RETRY_BACKOFF_BASE * (2**attempt),
+                )
+                metrics.inc("portone_retries_total", endpoint=endpoint)
+                time.sleep(random.uniform(0, backoff))
+            else:
+                breaker.record_success()
+                return result
+
+    # 토큰 발급을 포함한 모든 API 호출이 _get/_post/_delete를 거치므로 이 세 곳만 감싸면 됩니다.
+    def _get(self, url, payload=None):
+        return self.call(super()._get, url, payload)
+
+    def _post(self, url, payload=None):
+        return self.call(super()._post, url, payload)
+
+    def _delete(self, url):
+        return self.call(super()._delete, url)
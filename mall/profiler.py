@@ -0,0 +1,145 @@
+import contextvars
+import json
+import logging
+import random
+import re
+import time
+from collections import Counter, deque
+from contextlib import ExitStack
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db import connections
+from django.template.base import Template
+from django.utils import timezone
+
+# 운영 환경에서도 켜둘 수 있는 샘플링 프로파일러
+# PROFILER_SAMPLE_RATE 비율의 요청만 SQL 수/시간, 중복 쿼리(N+1), 템플릿 렌더링 시간, 전체 응답 시간을 기록합니다.
+# 샘플링되지 않은 요청은 random() 한 번과 contextvar 조회 외에는 하는 일이 없습니다.
+
+# 최근 샘플을 보관하는 프로세스별 링 버퍼 (관리자 화면에서 조회)
+samples: deque = deque(maxlen=settings.PROFILER_RING_SIZE)
+
+current_profile: contextvars.ContextVar = contextvars.ContextVar(
+    "current_profile", default=None
+)
+
+log_handler: Optional[RotatingFileHandler] = None
+
+# 리터럴만 다른 같은 모양의 쿼리를 하나로 묶기 위한 정규식
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+IN_LIST_RE = re.compile(r"\(\s*(?:\?\s*,\s*)+\?\s*\)")
+
+
+def fingerprint(sql: str) -> str:
+    sql = STRING_RE.sub("?", sql)
+    sql = NUMBER_RE.sub("?", sql)
+    sql = sql.replace("%s", "?")
+    return IN_LIST_RE.sub("(...)", sql)
+
+
+class Profile:
+    def __init__(self):
+        self.query_count = 0
+        self.query_time = 0.0
+        self.fingerprints: Counter = Counter()
+        self.template_time = 0.0
+        self.template_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.query_time += time.perf_counter() - started
+            self.query_count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    def duplicates(self) -> List[Dict]:
+        return [
+            {"sql": sql, "count": count}
+            for sql, count in self.fingerprints.most_common()
+            if count > 1
+        ]
+
+
+original_template_render = Template._render
+
+
+def profiled_template_render(self, context):
+    profile = current_profile.get()
+    if profile is None:
+        return original_template_render(self, context)
+    # extends/include 로 중첩된 렌더링은 바깥 템플릿 시간에 포함되므로 최상위만 측정합니다.
+    profile.template_depth += 1
+    started = time.perf_counter()
+    try:
+        return original_template_render(self, context)
+    finally:
+        profile.template_depth -= 1
+        if profile.template_depth == 0:
+            profile.template_time += time.perf_counter() - started
+
+
+def write_log(sample: Dict) -> None:
+    global log_handler
+    if not settings.PROFILER_LOG_PATH:
+        return
+    if log_handler is None:
+        path = Path(settings.PROFILER_LOG_PATH)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        log_handler = RotatingFileHandler(
+            path,
+            maxBytes=settings.PROFILER_LOG_MAX_BYTES,
+            backupCount=settings.PROFILER_LOG_BACKUP_COUNT,
+            encoding="utf-8",
+        )
+    log_handler.emit(
+        logging.makeLogRecord({"msg": json.dumps(sample, ensure_ascii=False)})
+    )
+
+
+class ProfilerMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = settings.PROFILER_SAMPLE_RATE
+        # 샘플링을 끈 경우에는 템플릿 렌더링 함수도 교체하지 않아서 오버헤드가 전혀 없습니다.
+        if self.sample_rate > 0:
+            Template._render = profiled_template_render
+
+    def __call__(self, request):
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        profile = Profile()
+        token = current_profile.set(profile)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                # 복제본(replica)으로 간 쿼리도 포함되도록 모든 DB 연결에 래퍼를 겁니다.
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(profile))
+                response = self.get_response(request)
+        finally:
+            current_profile.reset(token)
+        elapsed = time.perf_counter() - started
+
+        match = request.resolver_match
+        sample = {
+            "time": timezone.now().isoformat(timespec="seconds"),
+            "method": request.method,
+            "path": request.path,
+            "view": match.view_name if match else "",
+            "status": response.status_code,
+            "total_ms": round(elapsed * 1000, 2),
+            "query_count": profile.query_count,
+            "query_ms": round(profile.query_time * 1000, 2),
+            "template_ms": round(profile.template_time * 1000, 2),
+            "duplicates": profile.duplicates(),
+        }
+        samples.append(sample)
+        write_log(sample)
+        return response
@@ -0,0 +1,104 @@
+import math
+import time
+from functools import wraps
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from mall import metrics
+
+# 캐시 기반 토큰 버킷 요청 제한
+# 워커 프로세스끼리 상태를 공유해야 하므로 버킷을 캐시에 둡니다. (운영에서는 CACHE_URL로 redis/memcached를 지정해주세요.
+# locmem 캐시는 프로세스마다 따로 세고, 파일 캐시의 incr는 원자적이지 않아서 테스트용으로만 씁니다.)
+#
+# 토큰 버킷과 같은 결과를 내는 GCRA 방식으로, 키마다 "버킷이 다시 가득 차는 시각(TAT, ms)" 하나만 저장합니다.
+# 요청마다 incr 한 번으로 TAT을 토큰 1개 간격만큼 미루고, TAT이 지금보다 burst 개 간격 넘게 앞서 있으면 거절합니다.
+# 비교 후 저장(CAS)이 필요 없어서 여러 프로세스가 동시에 요청해도 토큰이 두 번 쓰이지 않습니다.
+# (오래 쉬었던 버킷의 TAT을 현재 시각으로 당길 때만 동시 요청 몇 개가 더 허용될 수 있습니다.)
+
+
+def get_client_ip(request) -> str:
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def get_user_id(request) -> Optional[str]:
+    # request.user는 사용자 조회 쿼리를 실행하므로, 세션(캐시)에 저장된 로그인 사용자 id만 읽습니다.
+    return request.session.get(SESSION_KEY)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate  # 초당 채워지는 토큰 수
+        self.burst = burst  # 한 번에 쓸 수 있는 최대 토큰 수
+        self.interval_ms = 1000 / rate
+        self.window_ms = self.interval_ms * burst
+        # 이 시간 동안 요청이 없으면 버킷이 가득 찬 것과 같으므로 키가 사라져도 됩니다.
+        self.timeout = math.ceil(self.window_ms / 1000) + 1
+
+    def consume(self, key: str) -> Tuple[bool, float]:
+        # (허용 여부, 다시 시도할 수 있을 때까지 남은 초)
+        cache_key = f"ratelimit:{key}"
+        now_ms = int(time.time() * 1000)
+        cost = int(self.interval_ms)
+        cache.add(cache_key, now_ms, timeout=self.timeout)
+        try:
+            tat = cache.incr(cache_key, cost)
+        except ValueError:  # add와 incr 사이에 키가 만료된 경우
+            tat = now_ms + cost
+            cache.set(cache_key, tat, timeout=self.timeout)
+
+        if tat - cost < now_ms:
+            # 쉬는 동안 지난 시각에 머물러 있던 TAT을 현재 시각으로 당깁니다.
+            tat = now_ms + cost
+            cache.set(cache_key, tat, timeout=self.timeout)
+        if tat - now_ms <= self.window_ms:
+            return True, 0.0
+
+        # 거절한 요청은 토큰을 쓰지 않은 것으로 되돌리고, 계속 두드리는 동안 키가 만료되지 않도록 연장합니다.
+        cache.decr(cache_key, cost)
+        cache.touch(cache_key, self.timeout)
+        return False, (tat - now_ms - self.window_ms) / 1000
+
+
+def get_bucket(scope: str, factor: float = 1) -> TokenBucket:
+    rate, burst = settings.RATE_LIMITS[scope]
+    return TokenBucket(rate * factor, max(int(burst * factor), 1))
+
+
+def check(request, scope: str) -> Tuple[bool, float]:
+    # 로그인 사용자별 한도와, 여러 계정을 쓰는 봇을 막기 위한 IP별 한도(RATE_LIMIT_IP_FACTOR 배)를 함께 검사합니다.
+    checks = [(f"{scope}:ip:{get_client_ip(request)}", settings.RATE_LIMIT_IP_FACTOR)]
+    user_id = get_user_id(request)
+    if user_id is not None:
+        checks.insert(0, (f"{scope}:user:{user_id}", 1))
+    for key, factor in checks:
+        allowed, retry_after = get_bucket(scope, factor).consume(key)
+        if not allowed:
+            return False, retry_after
+    return True, 0.0
+
+
+def rate_limit(scope: str):
+    # 뷰(로그인 확인, DB 조회)보다 먼저 실행되도록 login_required 보다 바깥에 붙입니다.
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            allowed, retry_after = check(request, scope)
+            if not allowed:
+                metrics.inc("rate_limited_total", scope=scope)
+                retry_after = math.ceil(retry_after)
+                response = HttpResponse(
+                    f"요청이 너무 많습니다. {retry_after}초 후 다시 시도해주세요.",
+                    status=429,
+                    content_type="text/plain; charset=utf-8",
+                )
+                response["Retry-After"] = str(retry_after)
+                return response
+            return view_func(request, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
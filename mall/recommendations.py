@@ -0,0 +1,294 @@
+import heapq
+import math
+from collections import Counter, defaultdict
+from datetime import timedelta
+from itertools import permutations
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from mall import local_cache
+from mall.models import (
+    ArchivedOrder,
+    ArchivedOrderedProduct,
+    EventConsumerOffset,
+    Order,
+    OrderedProduct,
+    OrderEvent,
+    Product,
+    ProductPairCount,
+    ProductRecommendation,
+)
+from mall.sales import COUNTED_ORDER_STATUSES, get_status_sign
+
+# 함께 많이 구매한 상품 추천
+# 매출에 잡히는 주문의 상품 묶음(장바구니)에서 상품 쌍별 동시구매 횟수를 세고,
+# 상품별로 점수가 높은 RECOMMENDATION_TOP_K개만 ProductRecommendation에 저장합니다.
+# 점수는 코사인 유사도 count(A, B) / sqrt(count(A) * count(B)) 이라서, 모든 주문에 담기는 인기 상품이 추천을 독차지하지 않습니다.
+# - rebuild : 전체 주문으로 다시 계산합니다. (build_recommendations --full)
+# - update_incremental : 주문 이벤트(OrderEvent)를 이어 읽어 결제완료/취소된 주문만 더하고 뺍니다.
+#   바뀐 상품의 추천만 다시 계산하므로, 다른 상품 추천의 점수는 다음 rebuild 전까지 근사치입니다.
+
+OFFSET_NAME = "recommendations"
+
+# 상품이 너무 많이 담긴 주문(도매성 주문 등)은 쌍의 수가 제곱으로 늘고 추천에도 의미가 적어서 제외합니다.
+MAX_BASKET_SIZE = 50
+
+
+def iter_baskets(batch_size: int) -> Iterator[Set[int]]:
+    # 주문 pk 순으로 batch_size 건씩 끊어 읽습니다. (MySQL 드라이버는 iterator()도 결과를 모두 받아두기 때문)
+    # 보관된 주문(mall/archive.py)도 함께 읽습니다.
+    for order_model, line_model in (
+        (Order, OrderedProduct),
+        (ArchivedOrder, ArchivedOrderedProduct),
+    ):
+        pk_qs = (
+            order_model.objects.filter(status__in=COUNTED_ORDER_STATUSES)
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+        last_pk = 0
+        while True:
+            pk_list = list(pk_qs.filter(pk__gt=last_pk)[:batch_size])
+            if not pk_list:
+                break
+            yield from get_baskets(pk_list, line_model).values()
+            last_pk = pk_list[-1]
+
+
+def get_baskets(
+    order_ids: Iterable[int], line_model=OrderedProduct
+) -> Dict[int, Set[int]]:
+    baskets = defaultdict(set)
+    row_qs = line_model.objects.filter(order_id__in=order_ids).values_list(
+        "order_id", "product_id"
+    )
+    for order_id, product_id in row_qs:
+        baskets[order_id].add(product_id)
+    return baskets
+
+
+def count_pairs(
+    signed_baskets: Iterable[Tuple[Set[int], int]]
+) -> Tuple[Counter, Counter]:
+    # 상품별 주문 수와 (A, B) 쌍별 동시구매 횟수를 sign 만큼 더합니다.
+    order_counts, pair_counts = Counter(), Counter()
+    for basket, sign in signed_baskets:
+        if len(basket) > MAX_BASKET_SIZE:
+            continue
+        for product_id in basket:
+            order_counts[product_id] += sign
+        for pair in permutations(basket, 2):
+            pair_counts[pair] += sign
+    return order_counts, pair_counts
+
+
+def get_neighbors(
+    product_id: int, pair_counts: Dict[int, int], order_counts: Dict[int, int]
+) -> List[list]:
+    # pair_counts : 상품 product_id와 함께 구매한 {상품 id: 횟수}
+    count = order_counts.get(product_id, 0)
+    scored = (
+        (other_id, co_count / math.sqrt(count * order_counts[other_id]))
+        for other_id, co_count in pair_counts.items()
+        if co_count >= settings.RECOMMENDATION_MIN_COUNT
+        and count > 0
+        and order_counts.get(other_id, 0) > 0
+    )
+    top = heapq.nlargest(settings.RECOMMENDATION_TOP_K, scored, key=lambda x: x[1])
+    return [[other_id, round(score, 4)] for other_id, score in top]
+
+
+def lock_offset() -> EventConsumerOffset:
+    # rebuild와 update_incremental이 동시에 실행되지 않도록 오프셋 행을 잠급니다. (트랜잭션 안에서 호출)
+    offset, __ = EventConsumerOffset.objects.get_or_create(name=OFFSET_NAME)
+    return EventConsumerOffset.objects.select_for_update().get(pk=offset.pk)
+
+
+@transaction.atomic
+def rebuild(batch_size: int = 1000) -> Tuple[int, int]:
+    offset = lock_offset()
+    # 이 시점까지의 이벤트는 다시 계산에 포함되므로, 이후의 이벤트부터 update_incremental이 반영합니다.
+    offset.last_event_id = OrderEvent.objects.aggregate(max_id=Max("pk"))["max_id"] or 0
+
+    order_counts, pair_counts = count_pairs(
+        (basket, 1) for basket in iter_baskets(batch_size)
+    )
+    neighbor_pairs = defaultdict(dict)
+    for (product_id, other_id), co_count in pair_counts.items():
+        neighbor_pairs[product_id][other_id] = co_count
+
+    # 한 트랜잭션에서 바꾸므로, 장바구니 화면에는 이전 추천 또는 새 추천만 보입니다.
+    ProductPairCount.objects.all().delete()
+    ProductRecommendation.objects.all().delete()
+    ProductPairCount.objects.bulk_create(
+        (
+            ProductPairCount(product_id=product_id, other_id=other_id, count=co_count)
+            for (product_id, other_id), co_count in pair_counts.items()
+        ),
+        batch_size=1000,
+    )
+    ProductRecommendation.objects.bulk_create(
+        (
+            ProductRecommendation(
+                product_id=product_id,
+                order_count=count,
+                neighbors=get_neighbors(
+                    product_id, neighbor_pairs[product_id], order_counts
+                ),
+            )
+            for product_id, count in order_counts.items()
+        ),
+        batch_size=1000,
+    )
+    offset.save(update_fields=["last_event_id", "updated_at"])
+    return len(order_counts), len(pair_counts)
+
+
+def apply_deltas(order_deltas: Counter, pair_deltas: Counter) -> Set[int]:
+    # 오프셋 행을 잠근 상태에서만 호출되므로, 읽고 고쳐 쓰는 동안 다른 갱신이 끼어들지 않습니다.
+    changed_ids = {product_id for product_id, delta in order_deltas.items() if delta}
+    changed_ids |= {pair[0] for pair, delta in pair_deltas.items() if delta}
+
+    pair_dict = {
+        (pair.product_id, pair.other_id): pair
+        for pair in ProductPairCount.objects.filter(product_id__in=changed_ids)
+    }
+    to_create, to_update, to_delete = [], [], []
+    for (product_id, other_id), delta in pair_deltas.items():
+        pair = pair_dict.get((product_id, other_id))
+        if pair is None:
+            if delta > 0:
+                to_create.append(
+                    ProductPairCount(
+                        product_id=product_id, other_id=other_id, count=delta
+                    )
+                )
+        elif pair.count + delta > 0:
+            pair.count += delta
+            to_update.append(pair)
+        else:
+            to_delete.append(pair.pk)
+    ProductPairCount.objects.filter(pk__in=to_delete).delete()
+    ProductPairCount.objects.bulk_update(to_update, ["count"], batch_size=1000)
+    ProductPairCount.objects.bulk_create(to_create, batch_size=1000)
+
+    recommendation_dict = ProductRecommendation.objects.in_bulk(changed_ids)
+    to_create, to_update = [], []
+    for product_id in changed_ids:
+        delta = order_deltas.get(product_id, 0)
+        recommendation = recommendation_dict.get(product_id)
+        if recommendation is None:
+            to_create.append(
+                ProductRecommendation(product_id=product_id, order_count=max(delta, 0))
+            )
+        else:
+            recommendation.order_count = max(recommendation.order_count + delta, 0)
+            to_update.append(recommendation)
+    ProductRecommendation.objects.bulk_update(
+        to_update, ["order_count"], batch_size=1000
+    )
+    ProductRecommendation.objects.bulk_create(to_create, batch_size=1000)
+    return changed_ids
+
+
+def refresh_neighbors(product_ids: Set[int]) -> None:
+    neighbor_pairs = defaultdict(dict)
+    pair_qs = ProductPairCount.objects.filter(product_id__in=product_ids).values_list(
+        "product_id", "other_id", "count"
+    )
+    for product_id, other_id, co_count in pair_qs:
+        neighbor_pairs[product_id][other_id] = co_count
+
+    related_ids = set(product_ids)
+    for pairs in neighbor_pairs.values():
+        related_ids.update(pairs)
+    order_counts = dict(
+        ProductRecommendation.objects.filter(product_id__in=related_ids).values_list(
+            "product_id", "order_count"
+        )
+    )
+
+    recommendation_list = list(
+        ProductRecommendation.objects.filter(product_id__in=product_ids)
+    )
+    now = timezone.now()
+    for recommendation in recommendation_list:
+        recommendation.neighbors = get_neighbors(
+            recommendation.product_id,
+            neighbor_pairs[recommendation.product_id],
+            order_counts,
+        )
+        recommendation.updated_at = (
+            now  # bulk_update()에서는 auto_now가 동작하지 않습니다.
+        )
+    ProductRecommendation.objects.bulk_update(
+        recommendation_list, ["neighbors", "updated_at"], batch_size=1000
+    )
+
+
+def update_incremental(batch_size: int) -> int:
+    # 커밋이 늦은 이벤트를 건너뛰지 않도록 이벤트 릴레이(mall/events.py)와 같은 지연을 둡니다.
+    visible_before = timezone.now() - timedelta(seconds=settings.ORDER_EVENT_RELAY_LAG)
+    with transaction.atomic():
+        offset = lock_offset()
+        event_list = list(
+            OrderEvent.objects.filter(
+                pk__gt=offset.last_event_id,
+                event_type=OrderEvent.Type.ORDER_STATUS_CHANGED,
+                created_at__lte=visible_before,
+            ).order_by("pk")[:batch_size]
+        )
+        if not event_list:
+            return 0
+
+        # 같은 배치에서 결제완료 후 바로 취소된 주문은 더하고 빼서 0이 됩니다.
+        sign_dict = Counter()
+        for event in event_list:
+            sign_dict[event.order_id] += get_status_sign(
+                event.from_status, event.to_status
+            )
+        baskets = get_baskets(
+            [order_id for order_id, sign in sign_dict.items() if sign]
+        )
+        order_deltas, pair_deltas = count_pairs(
+            (basket, sign_dict[order_id]) for order_id, basket in baskets.items()
+        )
+        changed_ids = apply_deltas(order_deltas, pair_deltas)
+        if changed_ids:
+            refresh_neighbors(changed_ids)
+
+        offset.last_event_id = event_list[-1].pk
+        offset.save(update_fields=["last_event_id", "updated_at"])
+    return len(event_list)
+
+
+def get_recommended_products(product_ids: Iterable[int], limit: int) -> List[Product]:
+    # 장바구니 상품들의 추천 목록을 한 번에 읽어 점수를 합치고, 이미 담긴 상품은 뺍니다.
+    product_ids = set(product_ids)
+    if not product_ids or limit <= 0:
+        return []
+    scores = Counter()
+    neighbors_qs = ProductRecommendation.objects.filter(
+        product_id__in=product_ids
+    ).values_list("neighbors", flat=True)
+    for neighbors in neighbors_qs:
+        for other_id, score in neighbors:
+            if other_id not in product_ids:
+                scores[other_id] += score
+    if not scores:
+        return []
+
+    # 판매중이 아닌 상품은 건너뛰어야 하므로 여유있게 읽습니다.
+    candidate_ids = [other_id for other_id, __ in scores.most_common(limit * 3)]
+    product_dict = Product.objects.filter(status=Product.Status.ACTIVE).in_bulk(
+        candidate_ids
+    )
+    product_list = [
+        product_dict[other_id] for other_id in candidate_ids if other_id in product_dict
+    ][:limit]
+    local_cache.attach_categories(product_list)
+    return product_list
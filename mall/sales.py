@@ -0,0 +1,194 @@
+import datetime
+from collections import defaultdict
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import DateTimeField, F, OuterRef, QuerySet, Subquery, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from mall.models import (
+    ArchivedOrderedProduct,
+    ArchivedOrderPayment,
+    DailyCategorySales,
+    DailyProductSales,
+    Order,
+    OrderedProduct,
+    OrderPayment,
+)
+
+# 일별 매출 집계 테이블 갱신
+# 주문이 매출에 잡히는 상태(COUNTED_ORDER_STATUSES)로 들어가면 더하고, 빠져나가면(취소/결제실패) 뺍니다.
+# 판매일은 결제 시각(paid_at)의 날짜이고, 결제 시각이 없으면 주문 생성 시각을 씁니다.
+# 취소 시에도 같은 규칙으로 날짜를 구하므로, 원래 판매일의 집계에서 빠집니다.
+
+COUNTED_ORDER_STATUSES = (
+    Order.Status.PAID,
+    Order.Status.PREPARED_PRODUCT,
+    Order.Status.SHIPPED,
+    Order.Status.DELIVERED,
+)
+
+Totals = Dict[Tuple[datetime.date, int], list]
+
+
+def is_counted(status: str) -> bool:
+    return status in COUNTED_ORDER_STATUSES
+
+
+def get_status_sign(from_status: str, to_status: str) -> int:
+    # 집계에 더할지(1), 뺄지(-1), 그대로 둘지(0)
+    return int(is_counted(to_status)) - int(is_counted(from_status))
+
+
+def increment(model, key_field: str, totals: Totals) -> None:
+    for (date, key), (quantity, revenue) in totals.items():
+        lookup = {"date": date, key_field: key}
+        changes = {
+            "quantity": F("quantity") + quantity,
+            "revenue": F("revenue") + revenue,
+        }
+        if model.objects.filter(**lookup).update(**changes):
+            continue
+        try:
+            # 같은 날/상품 행을 다른 트랜잭션이 먼저 만들었으면 UPDATE로 다시 반영합니다.
+            with transaction.atomic():
+                model.objects.create(**lookup, quantity=quantity, revenue=revenue)
+        except IntegrityError:
+            model.objects.filter(**lookup).update(**changes)
+
+
+@transaction.atomic
+def apply_order_sales(order_list: Iterable[Order], sign: int) -> None:
+    order_dict = {order.pk: order for order in order_list}
+    if not order_dict or not sign:
+        return
+
+    paid_at_dict = {}
+    paid_at_qs = (
+        OrderPayment.objects.filter(order_id__in=order_dict, paid_at__isnull=False)
+        .order_by("-pk")
+        .values_list("order_id", "paid_at")
+    )
+    for order_id, paid_at in paid_at_qs:
+        paid_at_dict.setdefault(order_id, paid_at)
+
+    product_totals: Totals = defaultdict(lambda: [0, 0])
+    category_totals: Totals = defaultdict(lambda: [0, 0])
+    ordered_product_qs = OrderedProduct.objects.filter(order_id__in=order_dict).values(
+        "order_id", "product_id", "product__category_id", "price", "quantity"
+    )
+    for row in ordered_product_qs:
+        order_id = row["order_id"]
+        date = timezone.localdate(
+            paid_at_dict.get(order_id) or order_dict[order_id].created_at
+        )
+        quantity = row["quantity"] * sign
+        revenue = row["price"] * row["quantity"] * sign
+        for totals, key in (
+            (product_totals, row["product_id"]),
+            (category_totals, row["product__category_id"]),
+        ):
+            totals[date, key][0] += quantity
+            totals[date, key][1] += revenue
+
+    increment(DailyProductSales, "product_id", product_totals)
+    increment(DailyCategorySales, "category_id", category_totals)
+
+
+def get_row_qs(
+    line_model,
+    payment_model,
+    since: Optional[datetime.date] = None,
+    until: Optional[datetime.date] = None,
+) -> QuerySet:
+    # 판매일/상품별 판매수량과 매출. line_model은 주문상품, payment_model은 그 주문의 결제 모델입니다.
+    paid_at = Subquery(
+        payment_model.objects.filter(
+            order_id=OuterRef("order_id"), paid_at__isnull=False
+        )
+        .order_by("-pk")
+        .values("paid_at")[:1]
+    )
+    line_qs = line_model.objects.filter(
+        order__status__in=COUNTED_ORDER_STATUSES
+    ).annotate(
+        date=TruncDate(
+            Coalesce(paid_at, F("order__created_at"), output_field=DateTimeField())
+        )
+    )
+    if since:
+        line_qs = line_qs.filter(date__gte=since)
+    if until:
+        line_qs = line_qs.filter(date__lte=until)
+    return (
+        line_qs.values("date", "product_id", "product__category_id")
+        .annotate(
+            total_quantity=Sum("quantity"),
+            total_revenue=Sum(F("price") * F("quantity")),
+        )
+        .order_by()
+    )
+
+
+def rebuild(
+    since: Optional[datetime.date] = None, until: Optional[datetime.date] = None
+) -> Tuple[int, int]:
+    # 주문 데이터로 집계를 다시 계산합니다. 기간을 지정하면 그 기간의 집계만 지우고 다시 만듭니다.
+    # 보관된 주문(mall/archive.py)도 매출이므로 운영/보관 테이블을 모두 읽습니다.
+    row_qs_list = [
+        get_row_qs(line_model, payment_model, since, until)
+        for line_model, payment_model in (
+            (OrderedProduct, OrderPayment),
+            (ArchivedOrderedProduct, ArchivedOrderPayment),
+        )
+    ]
+    product_rollup_qs = DailyProductSales.objects.all()
+    category_rollup_qs = DailyCategorySales.objects.all()
+    if since:
+        product_rollup_qs = product_rollup_qs.filter(date__gte=since)
+        category_rollup_qs = category_rollup_qs.filter(date__gte=since)
+    if until:
+        product_rollup_qs = product_rollup_qs.filter(date__lte=until)
+        category_rollup_qs = category_rollup_qs.filter(date__lte=until)
+
+    with transaction.atomic():
+        product_rollup_qs.delete()
+        category_rollup_qs.delete()
+
+        # 같은 날/상품이 운영/보관 테이블에 나뉘어 있을 수 있으므로 합쳐서 저장합니다.
+        product_totals: Totals = defaultdict(lambda: [0, 0])
+        category_totals: Totals = defaultdict(lambda: [0, 0])
+        for row_qs in row_qs_list:
+            for row in row_qs.iterator(chunk_size=2000):
+                for totals, key in (
+                    (product_totals, row["product_id"]),
+                    (category_totals, row["product__category_id"]),
+                ):
+                    totals[row["date"], key][0] += row["total_quantity"]
+                    totals[row["date"], key][1] += row["total_revenue"]
+        DailyProductSales.objects.bulk_create(
+            [
+                DailyProductSales(
+                    date=date,
+                    product_id=product_id,
+                    quantity=quantity,
+                    revenue=revenue,
+                )
+                for (date, product_id), (quantity, revenue) in product_totals.items()
+            ],
+            batch_size=1000,
+        )
+        DailyCategorySales.objects.bulk_create(
+            [
+                DailyCategorySales(
+                    date=date,
+                    category_id=category_id,
+                    quantity=quantity,
+                    revenue=revenue,
+                )
+                for (date, category_id), (quantity, revenue) in category_totals.items()
+            ],
+            batch_size=1000,
+        )
+    return len(product_totals), len(category_totals)
@@ -0,0 +1,100 @@
+from typing import Iterable, Optional, Set
+
+from django.conf import settings
+from rest_framework import serializers
+
+from mall.models import CartProduct
+
+
+# 응답 필드 선택 (?fields=id,status)
+# 최상위 serializer에만 fields 인자로 넘깁니다. (중첩 serializer에는 적용하지 않습니다.)
+class SparseFieldsMixin:
+    def __init__(self, *args, fields: Optional[Iterable[str]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+def parse_fields(request, serializer_class) -> Optional[Set[str]]:
+    # 없는 필드 이름은 조용히 무시하지 않고 400으로 알려줍니다.
+    value = request.query_params.get("fields")
+    if not value:
+        return None
+    fields = {name.strip() for name in value.split(",") if name.strip()}
+    unknown = fields - set(serializer_class().fields)
+    if unknown:
+        raise serializers.ValidationError(
+            {"fields": [f"알 수 없는 필드입니다: {', '.join(sorted(unknown))}"]}
+        )
+    return fields
+
+
+class CartProductSummarySerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    price = serializers.IntegerField()
+    status = serializers.CharField()
+    # 분류는 조인하지 않고 local_cache.attach_categories로 붙입니다.
+    category = serializers.CharField(source="category.name")
+
+
+class CartItemSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    product = CartProductSummarySerializer()
+    amount = serializers.IntegerField()
+
+    class Meta:
+        model = CartProduct
+        fields = ["id", "product_id", "product", "quantity", "amount"]
+
+
+class CartOperationSerializer(serializers.Serializer):
+    # set : 수량을 quantity로 바꿉니다. (0이면 장바구니에서 뺍니다.)
+    # add : 수량에 quantity를 더합니다. (장바구니에 없으면 새로 담습니다.)
+    product_id = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=0)
+    op = serializers.ChoiceField(choices=["set", "add"], default="set")
+
+    def validate(self, attrs):
+        if attrs["op"] == "add" and attrs["quantity"] < 1:
+            raise serializers.ValidationError({"quantity": ["1 이상이어야 합니다."]})
+        return attrs
+
+
+class CartBatchSerializer(serializers.Serializer):
+    items = serializers.ListField(
+        child=CartOperationSerializer(),
+        allow_empty=False,
+        max_length=settings.API_CART_BATCH_LIMIT,
+    )
+
+    def validate_items(self, items):
+        product_ids = [item["product_id"] for item in items]
+        if len(product_ids) != len(set(product_ids)):
+            raise serializers.ValidationError(
+                "같은 상품을 한 번에 여러 번 바꿀 수 없습니다."
+            )
+        return items
+
+
+class OrderedProductSerializer(serializers.Serializer):
+    product_id = serializers.IntegerField()
+    name = serializers.CharField()
+    price = serializers.IntegerField()
+    quantity = serializers.IntegerField()
+
+
+# 운영 주문(Order)과 보관 주문(ArchivedOrder)을 같은 모양으로 응답합니다. (mall/archive.py)
+class OrderSerializer(SparseFieldsMixin, serializers.Serializer):
+    id = serializers.IntegerField()
+    uid = serializers.UUIDField()
+    status = serializers.CharField()
+    status_display = serializers.CharField(source="get_status_display")
+    total_amount = serializers.IntegerField()
+    created_at = serializers.DateTimeField()
+    updated_at = serializers.DateTimeField()
+    is_archived = serializers.SerializerMethodField()
+    products = OrderedProductSerializer(source="orderedproduct_set", many=True)
+
+    def get_is_archived(self, order) -> bool:
+        return getattr(order, "is_archived", False)
@@ -0,0 +1,248 @@
+import logging
+import os
+import random
+import socket
+import time
+from datetime import timedelta
+from typing import Callable, Dict, Iterable, List, Optional
+from uuid import uuid4
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Subquery
+from django.utils import timezone
+
+from mall import metrics
+from mall.models import Task
+
+# DB 기반 작업 큐
+# 작업은 Task 테이블에 넣고, 워커(run_tasks 명령)가 배치 단위로 가져가서 실행합니다.
+# - 가져가기 : SELECT ... FOR UPDATE SKIP LOCKED로 다른 워커가 잠근 행을 건너뛰므로 워커끼리 기다리지 않습니다.
+#   SKIP LOCKED가 없는 DB(SQLite)에서는 대기 상태 조건을 건 UPDATE 한 문장으로 가져갑니다.
+# - 성공한 작업은 배치마다 한 번에 삭제하고, 실패하면 지수 백오프 후 다시 대기 상태로 돌립니다.
+# - 워커가 실행 도중 죽으면 TASK_LOCK_TIMEOUT 뒤에 다른 워커가 다시 대기 상태로 돌립니다.
+#   배치의 작업마다 실행 직전에 잠금 시각(locked_at)을 갱신하므로, 오래 걸리는 배치의 뒤쪽 작업이 되돌려지지 않습니다.
+#   이미 되돌려진(다른 워커가 가져간) 작업은 실행하지 않고, 결과 반영도 잠금을 가진 워커(locked_by)의 행에만 합니다.
+#   그래서 작업은 최소 한 번 실행(at-least-once)되며, 같은 작업이 두 번 실행되어도 결과가 같도록 작성해야 합니다.
+logger = logging.getLogger(__name__)
+
+
+class TaskFunction:
+    def __init__(
+        self,
+        func: Callable,
+        name: str,
+        queue: str,
+        priority: int,
+        max_attempts: Optional[int],
+    ):
+        self.func = func
+        self.name = name
+        self.queue = queue
+        self.priority = priority
+        self.max_attempts = max_attempts
+
+    def __call__(self, **kwargs):
+        return self.func(**kwargs)
+
+    def build(
+        self,
+        kwargs: dict,
+        priority: Optional[int] = None,
+        delay: float = 0,
+        queue: Optional[str] = None,
+    ) -> Task:
+        return Task(
+            name=self.name,
+            kwargs=kwargs,
+            queue=queue or self.queue,
+            priority=self.priority if priority is None else priority,
+            max_attempts=self.max_attempts or settings.TASK_MAX_ATTEMPTS,
+            run_at=timezone.now() + timedelta(seconds=delay),
+        )
+
+    def enqueue(
+        self,
+        priority: Optional[int] = None,
+        delay: float = 0,
+        queue: Optional[str] = None,
+        **kwargs,
+    ) -> Task:
+        # 트랜잭션 안에서 호출하면 작업도 같은 트랜잭션으로 저장되므로, 커밋된 뒤에만 워커에게 보입니다.
+        task = self.build(kwargs, priority=priority, delay=delay, queue=queue)
+        task.save()
+        return task
+
+    def enqueue_many(self, kwargs_list: Iterable[dict], **options) -> List[Task]:
+        return Task.objects.bulk_create(
+            [self.build(kwargs, **options) for kwargs in kwargs_list], batch_size=1000
+        )
+
+
+TASKS: Dict[str, TaskFunction] = {}
+
+
+def task(
+    name: Optional[str] = None,
+    queue: str = "default",
+    priority: int = 0,
+    max_attempts: Optional[int] = None,
+):
+    # 작업 인자는 Task.kwargs(JSON)에 저장되므로 JSON으로 바꿀 수 있는 키워드 인자만 받습니다.
+    def decorator(func):
+        task_name = name or f"{func.__module__}.{func.__name__}"
+        TASKS[task_name] = TaskFunction(func, task_name, queue, priority, max_attempts)
+        return TASKS[task_name]
+
+    return decorator
+
+
+def get_retry_delay(attempts: int) -> float:
+    delay = settings.TASK_RETRY_BASE_DELAY * (2 ** (attempts - 1))
+    # 같은 시각에 실패한 작업들이 한꺼번에 다시 실행되지 않도록 흩어줍니다.
+    return min(delay, settings.TASK_RETRY_MAX_DELAY) * random.uniform(0.5, 1)
+
+
+def claim(worker_id: str, queues: List[str], batch_size: int) -> List[Task]:
+    now = timezone.now()
+    queued_qs = Task.objects.filter(
+        status=Task.Status.QUEUED, queue__in=queues, run_at__lte=now
+    ).order_by("-priority", "run_at", "pk")
+    changes = {
+        "status": Task.Status.RUNNING,
+        "locked_at": now,
+        "attempts": F("attempts") + 1,
+    }
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            task_list = list(queued_qs.select_for_update(skip_locked=True)[:batch_size])
+            Task.objects.filter(pk__in=[t.pk for t in task_list]).update(
+                locked_by=worker_id, **changes
+            )
+        for t in task_list:
+            t.attempts += 1
+            t.locked_by = worker_id
+        return task_list
+
+    # SQLite는 쓰기가 한 번에 하나씩만 실행되므로, 서브쿼리로 고른 행을 한 문장으로 UPDATE 하면
+    # 다른 워커와 같은 행을 가져가지 않습니다. 이번에 가져간 행은 고유한 토큰으로 다시 읽습니다.
+    token = f"{worker_id}:{uuid4().hex}"
+    Task.objects.filter(
+        pk__in=Subquery(queued_qs.values("pk")[:batch_size]),
+        status=Task.Status.QUEUED,
+    ).update(locked_by=token, **changes)
+    return list(Task.objects.filter(locked_by=token).order_by("-priority", "run_at"))
+
+
+def renew_lock(task_obj: Task) -> bool:
+    # 아직 이 워커가 잠근 작업이면 잠금 시각을 지금으로 갱신합니다. 이미 되돌려진 작업이면 False
+    return bool(
+        Task.objects.filter(
+            pk=task_obj.pk, status=Task.Status.RUNNING, locked_by=task_obj.locked_by
+        ).update(locked_at=timezone.now())
+    )
+
+
+def fail(task_obj: Task, error: str) -> str:
+    locked_qs = Task.objects.filter(pk=task_obj.pk, locked_by=task_obj.locked_by)
+    if task_obj.attempts < task_obj.max_attempts:
+        locked_qs.update(
+            status=Task.Status.QUEUED,
+            run_at=timezone.now()
+            + timedelta(seconds=get_retry_delay(task_obj.attempts)),
+            locked_by="",
+            locked_at=None,
+            last_error=error,
+        )
+        return "retry"
+    locked_qs.update(status=Task.Status.FAILED, last_error=error)
+    return "failed"
+
+
+def requeue_stale() -> int:
+    # 실행 도중 워커가 죽어서 실행중으로 남은 작업을 되돌립니다. 시도 횟수를 다 쓴 작업은 실패 처리합니다.
+    stale = timezone.now() - timedelta(seconds=settings.TASK_LOCK_TIMEOUT)
+    stale_qs = Task.objects.filter(status=Task.Status.RUNNING, locked_at__lt=stale)
+    stale_qs.filter(attempts__gte=F("max_attempts")).update(
+        status=Task.Status.FAILED, last_error="실행 시간 초과 (워커 중단)"
+    )
+    return stale_qs.update(status=Task.Status.QUEUED, locked_by="", locked_at=None)
+
+
+class Worker:
+    def __init__(
+        self,
+        queues: Optional[List[str]] = None,
+        batch_size: int = 50,
+        poll_interval: float = 1.0,
+        burst: bool = False,
+    ):
+        self.queues = queues or ["default"]
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.burst = burst  # 대기 작업이 없으면 종료합니다.
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.processed_count = 0
+        self.last_requeue = 0.0
+
+    def execute(self, task_list: List[Task]) -> None:
+        done_task_list = []
+        for task_obj in task_list:
+            if not renew_lock(task_obj):
+                # 앞 작업들이 오래 걸려 잠금이 만료되었고, 다른 워커가 다시 가져갈 수 있는 작업
+                metrics.inc("task_runs_total", task=task_obj.name, outcome="lost")
+                continue
+            started = time.monotonic()
+            task_func = TASKS.get(task_obj.name)
+            try:
+                if task_func is None:
+                    raise LookupError(f"등록되지 않은 작업입니다: {task_obj.name}")
+                task_func.func(**task_obj.kwargs)
+            except Exception as e:
+                logger.warning("작업 실패 %s (%s)", task_obj, e, exc_info=e)
+                outcome = fail(task_obj, repr(e))
+            else:
+                done_task_list.append(task_obj)
+                outcome = "done"
+            metrics.inc("task_runs_total", task=task_obj.name, outcome=outcome)
+            metrics.observe(
+                "task_duration_seconds",
+                time.monotonic() - started,
+                task=task_obj.name,
+            )
+        if done_task_list:
+            # 한 배치의 작업은 같은 locked_by 값으로 가져온 것입니다.
+            Task.objects.filter(
+                pk__in=[task_obj.pk for task_obj in done_task_list],
+                locked_by=done_task_list[0].locked_by,
+            ).delete()
+        self.processed_count += len(task_list)
+
+    def run_once(self) -> int:
+        if time.monotonic() - self.last_requeue > settings.TASK_LOCK_TIMEOUT / 2:
+            self.last_requeue = time.monotonic()
+            requeue_stale()
+        task_list = claim(self.worker_id, self.queues, self.batch_size)
+        if task_list:
+            now = timezone.now()
+            for task_obj in task_list:
+                metrics.observe(
+                    "task_queue_lag_seconds",
+                    (now - task_obj.run_at).total_seconds(),
+                    queue=task_obj.queue,
+                )
+            self.execute(task_list)
+        return len(task_list)
+
+    def run(self, should_stop: Callable[[], bool] = lambda: False) -> int:
+        try:
+            while not should_stop():
+                if self.run_once():
+                    continue
+                if self.burst:
+                    break
+                time.sleep(self.poll_interval)
+        finally:
+            metrics.registry.maybe_flush(force=True)
+        return self.processed_count
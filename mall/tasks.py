@@ -0,0 +1,90 @@
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from mall import bulk_actions, cancellation
+from mall.models import BulkActionJob, CancellationJob, OrderPayment, Product
+from mall.portone import PortoneUnavailable
+from mall.taskqueue import task
+
+# 요청 밖에서 실행할 작업들 (mall/taskqueue.py, run_tasks 명령으로 실행)
+
+# 상품 목록 템플릿(mall/product_list.html)의 thumbnail 태그와 같은 크기/옵션이어야 미리 만든 썸네일을 재사용합니다.
+PRODUCT_THUMBNAIL_GEOMETRY = "300x300"
+PRODUCT_THUMBNAIL_OPTIONS = {"crop": "center"}
+
+
+@task(priority=10, max_attempts=10)
+def verify_payment(payment_id: int) -> None:
+    # 웹훅/검증 지연 결제를 포트원 API로 다시 검증합니다. 포트원 장애로 보류되면 재시도합니다.
+    payment = OrderPayment.objects.filter(pk=payment_id).first()
+    if payment is None:  # 다른 결제시도가 완료되어 삭제된 경우
+        return
+    payment.update()
+    if payment.is_pending:
+        raise PortoneUnavailable(f"결제 검증 보류: {payment.merchant_uid}")
+
+
+@task(queue="jobs")
+def run_cancellation_job(job_id: int) -> None:
+    # 관리자 화면에서 만든 대량 결제취소 작업을 처리합니다. (mall/cancellation.py, run_tasks --queue jobs)
+    # 작업 잠금(TASK_LOCK_TIMEOUT)이 만료되기 전에 끝나도록 나눠서 실행하고, 남은 항목은 다음 작업으로 이어서 처리합니다.
+    job = CancellationJob.objects.filter(pk=job_id).first()
+    if job is None or job.status == CancellationJob.Status.DONE:
+        return
+    job = cancellation.run_job(job, time_limit=settings.TASK_LOCK_TIMEOUT / 2)
+    if job.status != CancellationJob.Status.DONE:
+        run_cancellation_job.enqueue(job_id=job.pk)
+
+
+@task(queue="jobs")
+def run_bulk_action_job(job_id: int) -> None:
+    # 관리자 화면에서 만든 대량 작업을 처리합니다. (mall/bulk_actions.py, run_tasks --queue jobs)
+    # 결제취소 작업과 같이 나눠서 실행하고, 멈춘 위치(last_pk)부터 다음 작업으로 이어서 처리합니다.
+    job = BulkActionJob.objects.defer("target_ranges").filter(pk=job_id).first()
+    if job is None or job.is_finished:
+        return
+    job = bulk_actions.run_job(
+        job, resume=True, time_limit=settings.TASK_LOCK_TIMEOUT / 2
+    )
+    if job.status == BulkActionJob.Status.PENDING:
+        run_bulk_action_job.enqueue(job_id=job.pk)
+
+
+@task(queue="media")
+def generate_product_thumbnails(product_id: int) -> None:
+    # sorl-thumbnail은 처음 요청한 화면에서 썸네일을 만들므로, 상품 사진이 바뀌면 미리 만들어둡니다.
+    from sorl.thumbnail import get_thumbnail
+
+    product = Product.objects.filter(pk=product_id).first()
+    if product is None or not product.photo:
+        return
+    get_thumbnail(
+        product.photo, PRODUCT_THUMBNAIL_GEOMETRY, **PRODUCT_THUMBNAIL_OPTIONS
+    )
+
+
+@task(queue="media")
+def download_product_photo(product_id: int, url: str) -> None:
+    # 앱 시작 시간을 늘리지 않도록 requests는 실행할 때 import 합니다. (bench_startup 명령 참고)
+    import requests
+
+    product = Product.objects.filter(pk=product_id).first()
+    if product is None or product.photo:  # 이미 받은 경우
+        return
+    response = requests.get(url, timeout=30)
+    response.raise_for_status()
+    product.photo.save(
+        name=url.rsplit("/", 1)[-1], content=ContentFile(response.content), save=True
+    )
+
+
+@receiver(post_save, sender=Product)
+def enqueue_product_thumbnails(sender, instance: Product, created: bool, **kwargs):
+    if not instance.photo:
+        return
+    loaded_values = getattr(instance, "_loaded_values", None) or {}
+    if created or loaded_values.get("photo") != instance.photo.name:
+        # 같은 트랜잭션으로 저장되므로 상품 저장이 롤백되면 작업도 남지 않습니다.
+        generate_product_thumbnails.enqueue(product_id=instance.pk)
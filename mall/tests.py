@@ -1,3 +1,1314 @@
-from django.test import TestCase
+import json
+from datetime import timedelta
+from itertools import count
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY, get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from mall import (
+    archive,
+    autocomplete,
+    bulk_actions,
+    cancellation,
+    events,
+    fulfillment,
+    local_cache,
+    portone,
+    ratelimit,
+    sales,
+    taskqueue,
+    waiting_room,
+)
+from mall.models import (
+    ArchivedOrder,
+    ArchivedOrderedProduct,
+    BulkActionJob,
+    CancellationItem,
+    CancellationJob,
+    CartProduct,
+    Category,
+    DailyCategorySales,
+    DailyProductSales,
+    EventConsumerOffset,
+    Order,
+    OrderedProduct,
+    OrderEvent,
+    OrderPayment,
+    PortonePaymentMeta,
+    Product,
+    Task,
+)
+
+# 실행 : DATABASE_URL=sqlite:////tmp/mall.sqlite3 python manage.py test
+# (기본 설정의 MySQL 대신 SQLite로 실행합니다. 테스트 DB는 메모리에 만들어집니다.)
+
+User = get_user_model()
+
+
+# 모바일 앱 API (mall/api.py)
+# 응답 건수가 1건일 때와 여러 건일 때 쿼리 수가 같아야 합니다. (N+1 방지)
+class ApiQueryCountTests(TestCase):
+    N = 10
+
+    def setUp(self):
+        cache.clear()
+        local_cache.category_cache.invalidate()
+        local_cache.product_cache.invalidate()
+        self.user = User.objects.create_user("api", password="pw12345!")
+        self.category = Category.objects.create(name="과일")
+        self.client.force_login(self.user)
+        # 운영/보관 주문은 같은 pk 공간을 씁니다. (보관 주문은 원래 pk 그대로 옮겨집니다.)
+        self.order_pks = count(1)
+        self.archived_line_pks = count(1)
+
+    def create_products(self, size: int) -> list:
+        return [
+            Product.objects.create(
+                category=self.category,
+                name=f"상품 {index}",
+                price=1000,
+                status=Product.Status.ACTIVE,
+            )
+            for index in range(size)
+        ]
+
+    def create_order(self, line_count: int) -> Order:
+        order = Order.objects.create(
+            id=next(self.order_pks),
+            user=self.user,
+            total_amount=1000 * line_count,
+            status=Order.Status.PAID,
+        )
+        OrderedProduct.objects.bulk_create(
+            OrderedProduct(
+                order=order, product=product, name=product.name, price=1000, quantity=1
+            )
+            for product in self.create_products(line_count)
+        )
+        return order
+
+    def create_archived_order(self, line_count: int) -> ArchivedOrder:
+        now = timezone.now() - timedelta(days=400)
+        order = ArchivedOrder.objects.create(
+            id=next(self.order_pks),
+            uid=Order().uid,
+            user=self.user,
+            total_amount=1000 * line_count,
+            status=Order.Status.DELIVERED,
+            created_at=now,
+            updated_at=now,
+        )
+        ArchivedOrderedProduct.objects.bulk_create(
+            ArchivedOrderedProduct(
+                id=next(self.archived_line_pks),
+                order=order,
+                product=product,
+                name=product.name,
+                price=1000,
+                quantity=1,
+                created_at=now,
+                updated_at=now,
+            )
+            for product in self.create_products(line_count)
+        )
+        return order
+
+    def get(self, url: str):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def post_cart(self, items: list):
+        response = self.client.post(
+            reverse("mall:api_cart"),
+            json.dumps({"items": items}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def count_queries(self, func) -> int:
+        with CaptureQueriesContext(connection) as context:
+            func()
+        return len(context)
+
+    def assertConstantQueries(self, request, grow, budget: str) -> None:
+        # 작은 상태에서 센 쿼리 수와 grow() 후의 쿼리 수가 같아야 합니다.
+        request()  # 세션/사용자/분류 캐시를 채웁니다.
+        query_count = self.count_queries(request)
+        self.assertLessEqual(query_count, settings.API_QUERY_BUDGETS[budget])
+        grow()
+        with self.assertNumQueries(query_count):
+            request()
+
+    def test_cart_list(self):
+        url = reverse("mall:api_cart")
+        product = self.create_products(1)[0]
+        CartProduct.objects.create(user=self.user, product=product, quantity=1)
+
+        def grow():
+            CartProduct.objects.bulk_create(
+                CartProduct(user=self.user, product=product, quantity=2)
+                for product in self.create_products(self.N)
+            )
+
+        self.assertConstantQueries(lambda: self.get(url), grow, "cart")
+        data = self.get(url)
+        self.assertEqual(len(data["results"]), self.N + 1)
+        self.assertEqual(data["results"][0]["product"]["category"], "과일")
+        self.assertEqual(data["total_amount"], 1000 * (2 * self.N + 1))
+
+    def test_cart_batch_creates_new_products(self):
+        # 장바구니에 없던 상품은 upsert(bulk_create)로 담습니다.
+        warm_up, small, large = (self.create_products(size) for size in (1, 1, self.N))
+        # 분류 캐시를 채웁니다.
+        self.post_cart([{"product_id": warm_up[0].pk, "quantity": 1}])
+        small_count = self.count_queries(
+            lambda: self.post_cart([{"product_id": p.pk, "quantity": 2} for p in small])
+        )
+        self.assertLessEqual(small_count, settings.API_QUERY_BUDGETS["cart"])
+        with self.assertNumQueries(small_count):
+            data = self.post_cart([{"product_id": p.pk, "quantity": 3} for p in large])
+        self.assertEqual(len(data["results"]), self.N + 2)
+        self.assertEqual(
+            dict(CartProduct.objects.values_list("product_id", "quantity")),
+            {
+                warm_up[0].pk: 1,
+                **{p.pk: 2 for p in small},
+                **{p.pk: 3 for p in large},
+            },
+        )
+
+    def test_cart_batch_operations(self):
+        product_list = self.create_products(3)
+        for product in product_list:
+            CartProduct.objects.create(user=self.user, product=product, quantity=2)
+        new_product = self.create_products(1)[0]
+        self.post_cart(
+            [
+                {"product_id": product_list[0].pk, "quantity": 3, "op": "add"},
+                {"product_id": product_list[1].pk, "quantity": 0},
+                {"product_id": product_list[2].pk, "quantity": 7},
+                {"product_id": new_product.pk, "quantity": 1, "op": "add"},
+            ]
+        )
+        self.assertEqual(
+            dict(CartProduct.objects.values_list("product_id", "quantity")),
+            {product_list[0].pk: 5, product_list[2].pk: 7, new_product.pk: 1},
+        )
+
+    def test_cart_batch_rejects_inactive_product(self):
+        product = self.create_products(1)[0]
+        Product.objects.filter(pk=product.pk).update(status=Product.Status.SOLD_OUT)
+        local_cache.product_cache.invalidate()
+        response = self.client.post(
+            reverse("mall:api_cart"),
+            json.dumps({"items": [{"product_id": product.pk, "quantity": 1}]}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(CartProduct.objects.exists())
+
+    def test_order_list(self):
+        url = reverse("mall:api_order_list") + "?page_size=50"
+        self.create_order(1)
+        self.create_archived_order(1)
+
+        def grow():
+            for __ in range(self.N):
+                self.create_order(3)
+                self.create_archived_order(3)
+
+        self.assertConstantQueries(lambda: self.get(url), grow, "order_list")
+        data = self.get(url)
+        self.assertEqual(len(data["results"]), 2 * (self.N + 1))
+        self.assertTrue(any(order["is_archived"] for order in data["results"]))
+        self.assertEqual(len(data["results"][0]["products"]), 3)
+
+    def test_order_list_without_products(self):
+        # 주문상품을 빼면 prefetch 쿼리(운영/보관 각 1회)도 하지 않습니다.
+        url = reverse("mall:api_order_list") + "?page_size=50"
+        self.create_order(2)
+        self.create_archived_order(2)
+        self.get(url)
+        full_count = self.count_queries(lambda: self.get(url))
+        sparse_url = url + "&fields=id,status,is_archived"
+        with self.assertNumQueries(full_count - 2):
+            data = self.get(sparse_url)
+        self.assertEqual(set(data["results"][0]), {"id", "status", "is_archived"})
+
+    def test_order_list_cursor(self):
+        archived_order = self.create_archived_order(1)
+        order_list = [self.create_order(1) for __ in range(3)]
+        data = self.get(reverse("mall:api_order_list") + "?page_size=2&fields=id")
+        self.assertEqual(
+            [o["id"] for o in data["results"]], [order_list[2].pk, order_list[1].pk]
+        )
+        data = self.client.get(data["next"]).json()
+        self.assertEqual(
+            [o["id"] for o in data["results"]], [order_list[0].pk, archived_order.pk]
+        )
+        self.assertIsNone(data["next"])
+
+    def test_order_detail(self):
+        small = self.create_order(1)
+        large = self.create_order(self.N)
+        small_url = reverse("mall:api_order_detail", args=[small.pk])
+        large_url = reverse("mall:api_order_detail", args=[large.pk])
+        self.get(small_url)
+        count = self.count_queries(lambda: self.get(small_url))
+        self.assertLessEqual(count, settings.API_QUERY_BUDGETS["order_detail"])
+        with self.assertNumQueries(count):
+            data = self.get(large_url)
+        self.assertEqual(len(data["products"]), self.N)
+
+    def test_archived_order_detail(self):
+        small = self.create_archived_order(1)
+        large = self.create_archived_order(self.N)
+        small_url = reverse("mall:api_order_detail", args=[small.pk])
+        self.get(small_url)
+        count = self.count_queries(lambda: self.get(small_url))
+        with self.assertNumQueries(count):
+            data = self.get(reverse("mall:api_order_detail", args=[large.pk]))
+        self.assertTrue(data["is_archived"])
+        self.assertEqual(len(data["products"]), self.N)
+
+    def test_order_detail_of_other_user(self):
+        order = self.create_order(1)
+        other = User.objects.create_user("other", password="pw12345!")
+        self.client.force_login(other)
+        response = self.client.get(reverse("mall:api_order_detail", args=[order.pk]))
+        self.assertEqual(response.status_code, 404)
+
+
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+}
+
+
+def ok_view(request):
+    return HttpResponse("ok")
+
+
+# 요청 제한 (mall/ratelimit.py)
+# 시각을 고정해서 토큰이 다시 채워지지 않은 상태로 검사합니다.
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    RATE_LIMITS={"test": (1.0, 3)},
+    RATE_LIMIT_IP_FACTOR=10.0,
+)
+class RateLimitTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.now = 1_000_000.0
+        patcher = mock.patch.object(ratelimit.time, "time", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def request(self, user_id="1"):
+        request = RequestFactory().get("/")
+        request.session = {} if user_id is None else {SESSION_KEY: user_id}
+        return request
+
+    def test_token_bucket_allows_burst_then_rejects(self):
+        bucket = ratelimit.TokenBucket(rate=2.0, burst=3)
+        for __ in range(3):
+            self.assertEqual(bucket.consume("key"), (True, 0.0))
+        allowed, retry_after = bucket.consume("key")
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(retry_after, 0.5)
+        # 거절한 요청은 토큰을 쓰지 않으므로 0.5초 뒤에는 한 번 허용됩니다.
+        self.now += 0.5
+        self.assertTrue(bucket.consume("key")[0])
+        self.assertFalse(bucket.consume("key")[0])
+
+    def test_token_bucket_keys_are_independent(self):
+        bucket = ratelimit.TokenBucket(rate=1.0, burst=1)
+        self.assertTrue(bucket.consume("a")[0])
+        self.assertFalse(bucket.consume("a")[0])
+        self.assertTrue(bucket.consume("b")[0])
+
+    def test_decorator_returns_429_with_retry_after(self):
+        view = ratelimit.rate_limit("test")(ok_view)
+        for __ in range(3):
+            self.assertEqual(view(self.request()).status_code, 200)
+        response = view(self.request())
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "1")
+        # 다른 사용자는 자기 한도를 씁니다. (IP 한도는 RATE_LIMIT_IP_FACTOR 배)
+        self.assertEqual(view(self.request(user_id="2")).status_code, 200)
+
+    def test_decorator_limits_anonymous_requests_by_ip(self):
+        view = ratelimit.rate_limit("test")(ok_view)
+        for __ in range(30):
+            self.assertEqual(view(self.request(user_id=None)).status_code, 200)
+        self.assertEqual(view(self.request(user_id=None)).status_code, 429)
+
+
+# 주문 대기열 (mall/waiting_room.py)
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    WAITING_ROOM_SLOTS=1,
+    WAITING_ROOM_ADMIT_RATE=1.0,
+    WAITING_ROOM_POLL_SECONDS=5,
+)
+class WaitingRoomTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.now = 1_000_000.0
+        patcher = mock.patch.object(waiting_room.time, "time", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_admit_and_release(self):
+        self.assertTrue(waiting_room.admit("1").admitted)
+        # 다시 들어와도 같은 자리를 씁니다.
+        self.assertTrue(waiting_room.admit("1").admitted)
+
+        admission = waiting_room.admit("2")
+        self.assertFalse(admission.admitted)
+        self.assertEqual(admission.position, 1)
+        self.assertEqual(admission.wait_seconds, 1.0)
+
+        # 차례가 되어도 자리가 없으면 기다립니다.
+        self.now += 1
+        admission = waiting_room.admit("2")
+        self.assertFalse(admission.admitted)
+        self.assertEqual(admission.position, 0)
+
+        waiting_room.release("1")
+        self.assertFalse(waiting_room.holds_slot("1"))
+        self.assertTrue(waiting_room.admit("2").admitted)
+        self.assertTrue(waiting_room.holds_slot("2"))
+
+    def test_release_keeps_slot_taken_by_other_user(self):
+        self.assertTrue(waiting_room.admit("1").admitted)
+        # 1번 사용자의 자리가 만료되어 2번 사용자가 차지한 경우
+        cache.set(waiting_room.slot_key(0), "2")
+        waiting_room.release("1")
+        self.assertEqual(cache.get(waiting_room.slot_key(0)), "2")
+
+    def test_decorator_renders_waiting_page(self):
+        view = waiting_room.waiting_room(ok_view)
+        request = RequestFactory().get("/")
+        request.session = {SESSION_KEY: "1"}
+        self.assertEqual(view(request).status_code, 200)
+
+        request.session = {SESSION_KEY: "2"}
+        response = view(request)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "5")
+
+        # 로그인하지 않은 요청은 그대로 넘깁니다.
+        request.session = {}
+        self.assertEqual(view(request).status_code, 200)
+
+
+# 포트원 서킷 브레이커와 재시도 예산 (mall/portone.py)
+class CircuitBreakerTests(SimpleTestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch("mall.portone.time.monotonic", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = portone.CircuitBreaker(failure_threshold=3, reset_timeout=10)
+
+    def trip(self):
+        for __ in range(3):
+            self.breaker.record_failure()
+
+    def test_opens_after_consecutive_failures(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.assertTrue(self.breaker.allow_request())
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, portone.CircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.allow_request())
+        self.assertEqual(self.breaker.trip_count, 1)
+
+    def test_success_resets_failure_count(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, portone.CircuitBreaker.CLOSED)
+
+    def test_half_open_allows_one_trial_request(self):
+        self.trip()
+        self.now += 10
+        self.assertTrue(self.breaker.allow_request())
+        self.assertEqual(self.breaker.state, portone.CircuitBreaker.HALF_OPEN)
+        self.assertFalse(self.breaker.allow_request())
+
+        # 시험 호출이 성공하면 닫습니다.
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, portone.CircuitBreaker.CLOSED)
+        self.assertTrue(self.breaker.allow_request())
+
+    def test_half_open_failure_reopens(self):
+        self.trip()
+        self.now += 10
+        self.assertTrue(self.breaker.allow_request())
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, portone.CircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.allow_request())
+        self.assertEqual(self.breaker.trip_count, 2)
+
+        # 다시 연 시점부터 reset_timeout을 기다립니다.
+        self.now += 9
+        self.assertFalse(self.breaker.allow_request())
+        self.now += 1
+        self.assertTrue(self.breaker.allow_request())
+
+
+class RetryBudgetTests(SimpleTestCase):
+    def test_retries_are_limited_to_ratio_of_calls(self):
+        budget = portone.RetryBudget(ratio=0.5, min_tokens=1, max_tokens=2)
+        self.assertTrue(budget.withdraw())
+        self.assertFalse(budget.withdraw())
+        self.assertEqual(budget.exhausted_count, 1)
+
+        # 호출 2건마다 재시도 1회
+        budget.deposit()
+        self.assertFalse(budget.withdraw())
+        budget.deposit()
+        self.assertTrue(budget.withdraw())
+
+    def test_tokens_are_capped(self):
+        budget = portone.RetryBudget(ratio=0.5, min_tokens=0, max_tokens=2)
+        for __ in range(10):
+            budget.deposit()
+        self.assertEqual(budget.snapshot()["tokens"], 2)
+        self.assertTrue(budget.withdraw())
+        self.assertTrue(budget.withdraw())
+        self.assertFalse(budget.withdraw())
+
+
+# 메트릭 엔드포인트 (/metrics)
+@override_settings(METRICS_TOKEN="secret", METRICS_ALLOWED_IPS=["10.0.0.1"])
+class MetricsViewTests(SimpleTestCase):
+    def get(self, remote_addr="10.0.0.2", **headers):
+        return self.client.get(
+            reverse("metrics"), REMOTE_ADDR=remote_addr, headers=headers
+        )
+
+    def test_allowed_ip(self):
+        self.assertEqual(self.get(remote_addr="10.0.0.1").status_code, 200)
+
+    def test_bearer_token(self):
+        self.assertEqual(self.get(Authorization="Bearer secret").status_code, 200)
+        self.assertEqual(self.get(Authorization="Bearer wrong").status_code, 403)
+        self.assertEqual(self.get().status_code, 403)
+
+    @override_settings(METRICS_TOKEN="")
+    def test_empty_token_is_not_accepted(self):
+        self.assertEqual(self.get(Authorization="Bearer ").status_code, 403)
+
+
+class FakePortoneClient:
+    # 포트원 결제 조회(find) 응답을 흉내냅니다.
+    def __init__(self, status: str, amount: int):
+        self.response = {"status": status, "amount": amount, "paid_at": 0}
+
+    def find(self, merchant_uid):
+        return self.response
+
+    def is_paid(self, amount, response):
+        return response["status"] == "paid" and response["amount"] == amount
+
+
+# 결제 재검증 (포트원 웹훅 → tasks.verify_payment → OrderPayment.update → Order.change_status)
+class PaymentWebhookTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("buyer", password="pw12345!")
+        self.order = Order.objects.create(user=self.user, total_amount=1000)
+        self.payment = OrderPayment.objects.create(
+            order=self.order,
+            name="상품",
+            desired_amount=1000,
+            buyer_name="buyer",
+            buyer_email="buyer@example.com",
+        )
+
+    def receive_webhook(self, pay_status: str) -> None:
+        response = self.client.post(
+            reverse("mall:portone_webhook"),
+            json.dumps({"merchant_uid": self.payment.merchant_uid}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        with mock.patch(
+            "mall.models.get_client",
+            return_value=FakePortoneClient(pay_status, 1000),
+        ):
+            taskqueue.Worker(burst=True).run()
+        self.order.refresh_from_db()
+
+    def test_paid_webhook_pays_requested_order(self):
+        self.receive_webhook("paid")
+        self.assertEqual(self.order.status, Order.Status.PAID)
+        self.assertEqual(
+            list(
+                OrderEvent.objects.filter(
+                    event_type=OrderEvent.Type.ORDER_STATUS_CHANGED
+                ).values_list("from_status", "to_status")
+            ),
+            [(Order.Status.REQUESTED, Order.Status.PAID)],
+        )
+
+    def test_webhook_keeps_shipped_order(self):
+        # 결제완료 후 물류센터가 배송중으로 바꾼 주문에 같은 결제의 웹훅이 다시 들어온 경우
+        self.receive_webhook("paid")
+        Order.objects.filter(pk=self.order.pk).update(status=Order.Status.SHIPPED)
+        event_count = OrderEvent.objects.count()
+
+        self.receive_webhook("paid")
+        self.assertEqual(self.order.status, Order.Status.SHIPPED)
+        self.assertEqual(OrderEvent.objects.count(), event_count)
+
+    def test_failed_payment_keeps_paid_order(self):
+        self.receive_webhook("paid")
+        event_count = OrderEvent.objects.count()
+        self.assertFalse(self.order.change_status(Order.Status.FAILED_PAYMENT))
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, Order.Status.PAID)
+        self.assertEqual(OrderEvent.objects.count(), event_count)
+
+    def test_meta_is_stored_in_side_table_and_loaded_lazily(self):
+        self.receive_webhook("paid")
+        self.assertEqual(
+            PortonePaymentMeta.load(self.payment.uid),
+            {"status": "paid", "amount": 1000, "paid_at": 0},
+        )
+        with self.assertNumQueries(1):
+            payment = OrderPayment.objects.get(pk=self.payment.pk)
+        # meta는 처음 접근할 때 한 번만 읽습니다.
+        with self.assertNumQueries(1):
+            self.assertEqual(payment.meta["status"], "paid")
+            self.assertEqual(payment.meta["amount"], 1000)
+
+        # meta를 바꾸지 않고 저장하면 결제내역 테이블은 그대로 둡니다.
+        payment = OrderPayment.objects.get(pk=self.payment.pk)
+        with mock.patch.object(PortonePaymentMeta, "store") as store:
+            payment.save()
+            store.assert_not_called()
+            payment.meta = {"status": "cancelled"}
+            payment.save()
+            store.assert_called_once_with(payment.uid, {"status": "cancelled"})
+
+
+class RecordingSink(events.BaseSink):
+    def __init__(self, name: str, fail: bool = False):
+        super().__init__(name)
+        self.fail = fail
+        self.published = []
+
+    def publish(self, event_list):
+        if self.fail:
+            raise ConnectionError("sink down")
+        self.published.extend(event["id"] for event in event_list)
+
+
+# 주문 이벤트 outbox 릴레이 (mall/events.py)
+@override_settings(ORDER_EVENT_RELAY_LAG=0)
+class OrderEventRelayTests(TestCase):
+    def create_events(self, size: int) -> list:
+        return [
+            OrderEvent.objects.create(
+                event_type=OrderEvent.Type.ORDER_STATUS_CHANGED,
+                order_id=1,
+                from_status=Order.Status.REQUESTED,
+                to_status=Order.Status.PAID,
+            ).pk
+            for __ in range(size)
+        ]
+
+    def get_offset(self, name: str) -> int:
+        # 전달에 실패하면 처음 만든 오프셋 행도 함께 롤백됩니다.
+        offset = EventConsumerOffset.objects.filter(name=name).first()
+        return offset.last_event_id if offset else 0
+
+    def test_relay_in_batches_and_resume_from_offset(self):
+        pk_list = self.create_events(5)
+        sink = RecordingSink("a")
+        self.assertEqual(events.relay({"a": sink}, batch_size=2), {"a": 5})
+        self.assertEqual(sink.published, pk_list)
+        self.assertEqual(self.get_offset("a"), pk_list[-1])
+
+        # 재시작한 릴레이는 오프셋 다음 이벤트만 전달합니다.
+        new_pk_list = self.create_events(2)
+        sink = RecordingSink("a")
+        self.assertEqual(events.relay({"a": sink}, batch_size=2), {"a": 2})
+        self.assertEqual(sink.published, new_pk_list)
+
+    def test_failed_sink_keeps_offset_and_does_not_block_others(self):
+        pk_list = self.create_events(3)
+        failing, working = RecordingSink("a", fail=True), RecordingSink("b")
+        self.assertEqual(
+            events.relay({"a": failing, "b": working}, batch_size=10),
+            {"a": 0, "b": 3},
+        )
+        self.assertEqual(self.get_offset("a"), 0)
+        self.assertEqual(working.published, pk_list)
+
+        failing.fail = False
+        events.relay({"a": failing}, batch_size=10)
+        self.assertEqual(failing.published, pk_list)
+
+    @override_settings(ORDER_EVENT_RELAY_LAG=60)
+    def test_recent_events_wait_for_next_batch(self):
+        # 방금 만들어진 이벤트는 먼저 만들어졌지만 늦게 커밋된 이벤트가 있을 수 있어 건너뜁니다.
+        self.create_events(2)
+        sink = RecordingSink("a")
+        self.assertEqual(events.relay({"a": sink}, batch_size=10), {"a": 0})
+        self.assertEqual(self.get_offset("a"), 0)
+
+
+class FakeCancelClient:
+    # 포트원 결제취소(cancel) 응답을 흉내냅니다. (스레드 풀에서 호출되므로 DB에 접근하지 않습니다.)
+    def __init__(self, already_cancelled=()):
+        self.already_cancelled = set(already_cancelled)
+        self.canceled_uids = []
+
+    def cancel(self, reason, merchant_uid):
+        from iamport import Iamport
+
+        if merchant_uid in self.already_cancelled:
+            raise Iamport.ResponseError(-1, "이미 취소된 결제건입니다.")
+        self.canceled_uids.append(merchant_uid)
+        return {"status": "cancelled", "merchant_uid": merchant_uid}
+
+    def find(self, merchant_uid):
+        return {"status": "cancelled", "merchant_uid": merchant_uid}
+
+
+# 대량 결제취소 (mall/cancellation.py)
+class CancellationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("buyer", password="pw12345!")
+        category = Category.objects.create(name="과일")
+        self.product = Product.objects.create(
+            category=category, name="사과", price=1000, status=Product.Status.ACTIVE
+        )
+
+    def create_paid_order(self) -> Order:
+        order = Order.objects.create(user=self.user, total_amount=2000)
+        OrderedProduct.objects.create(
+            order=order, product=self.product, name="사과", price=1000, quantity=2
+        )
+        OrderPayment.objects.create(
+            order=order,
+            name="사과",
+            desired_amount=2000,
+            buyer_name="buyer",
+            buyer_email="buyer@example.com",
+            pay_status=OrderPayment.PayStatus.PAID,
+            is_paid_ok=True,
+            paid_at=timezone.now(),
+        )
+        order.change_status(Order.Status.PAID)
+        return order
+
+    def create_job(self, order_list) -> CancellationJob:
+        payment_qs = OrderPayment.objects.filter(order__in=order_list)
+        return cancellation.create_job(payment_qs, reason="테스트")
+
+    def run_job(self, job, client, before_apply=None, **kwargs) -> CancellationJob:
+        # before_apply : 포트원 호출과 DB 반영 사이에 다른 경로(물류센터 반영 등)가 주문을 바꾼 경우를 재현합니다.
+        apply_results = cancellation.apply_results
+
+        def apply_after_change(*args):
+            if before_apply:
+                before_apply()
+            apply_results(*args)
+
+        with mock.patch("mall.cancellation.get_client", return_value=client):
+            with mock.patch.object(cancellation, "apply_results", apply_after_change):
+                return cancellation.run_job(job, workers=1, rate=1000, **kwargs)
+
+    def get_revenue(self) -> int:
+        return sum(DailyProductSales.objects.values_list("revenue", flat=True))
+
+    def test_cancel_paid_orders(self):
+        order_list = [self.create_paid_order() for __ in range(2)]
+        self.assertEqual(self.get_revenue(), 4000)
+
+        job = self.run_job(self.create_job(order_list), FakeCancelClient())
+        self.assertEqual(job.status, CancellationJob.Status.DONE)
+        self.assertEqual((job.canceled_count, job.failed_count), (2, 0))
+        for order in order_list:
+            order.refresh_from_db()
+            self.assertEqual(order.status, Order.Status.CANCELED)
+        self.assertFalse(OrderPayment.objects.filter(is_paid_ok=True).exists())
+        self.assertEqual(self.get_revenue(), 0)
+        self.assertEqual(
+            OrderEvent.objects.filter(
+                event_type=OrderEvent.Type.ORDER_STATUS_CHANGED,
+                to_status=Order.Status.CANCELED,
+            ).count(),
+            2,
+        )
+
+    def test_order_shipped_during_cancel_is_not_overwritten(self):
+        order = self.create_paid_order()
+
+        def ship():
+            Order.objects.filter(pk=order.pk).update(status=Order.Status.SHIPPED)
+
+        job = self.run_job(
+            self.create_job([order]), FakeCancelClient(), before_apply=ship
+        )
+        order.refresh_from_db()
+        self.assertEqual(order.status, Order.Status.SHIPPED)
+        self.assertEqual(self.get_revenue(), 2000)
+        item = job.item_set.get()
+        self.assertEqual(item.status, CancellationItem.Status.FAILED)
+        self.assertIn("배송중", item.error)
+        # 환불은 되었으므로 결제는 취소로 반영합니다.
+        payment = OrderPayment.objects.get(order=order)
+        self.assertEqual(payment.pay_status, OrderPayment.PayStatus.CANCELED)
+        self.assertFalse(
+            OrderEvent.objects.filter(
+                event_type=OrderEvent.Type.ORDER_STATUS_CHANGED,
+                order_id=order.pk,
+                to_status=Order.Status.CANCELED,
+            ).exists()
+        )
+
+    def test_order_canceled_during_cancel_is_subtracted_once(self):
+        order = self.create_paid_order()
+
+        def cancel_order():
+            Order.objects.get(pk=order.pk).change_status(Order.Status.CANCELED)
+
+        job = self.run_job(
+            self.create_job([order]), FakeCancelClient(), before_apply=cancel_order
+        )
+        self.assertEqual(job.canceled_count, 1)
+        self.assertEqual(self.get_revenue(), 0)
+        self.assertEqual(
+            OrderEvent.objects.filter(
+                event_type=OrderEvent.Type.ORDER_STATUS_CHANGED,
+                order_id=order.pk,
+                to_status=Order.Status.CANCELED,
+            ).count(),
+            1,
+        )
+
+    def test_resume_processes_remaining_items(self):
+        order_list = [self.create_paid_order() for __ in range(3)]
+        job = self.create_job(order_list)
+        client = FakeCancelClient()
+
+        # 첫 배치만 처리하고 멈춘 경우 (time_limit=0)
+        job = self.run_job(job, client, batch_size=1, time_limit=0)
+        self.assertEqual(job.status, CancellationJob.Status.RUNNING)
+        self.assertEqual(job.canceled_count, 1)
+
+        job = self.run_job(job, client, batch_size=1)
+        self.assertEqual(job.status, CancellationJob.Status.DONE)
+        self.assertEqual(job.canceled_count, 3)
+        self.assertEqual(len(client.canceled_uids), 3)
+        self.assertEqual(len(set(client.canceled_uids)), 3)
+        self.assertEqual(self.get_revenue(), 0)
+
+    def test_resume_after_portone_cancel_without_db_update(self):
+        # 이전 실행에서 포트원 취소 후 DB 반영 전에 중단된 결제는 조회 결과로 취소완료 처리합니다.
+        order = self.create_paid_order()
+        payment = OrderPayment.objects.get(order=order)
+        client = FakeCancelClient(already_cancelled=[payment.merchant_uid])
+        job = self.run_job(self.create_job([order]), client)
+        self.assertEqual(job.canceled_count, 1)
+        order.refresh_from_db()
+        self.assertEqual(order.status, Order.Status.CANCELED)
+
+    def test_admin_action_enqueues_task(self):
+        order = self.create_paid_order()
+        admin_user = User.objects.create_superuser("admin", password="pw12345!")
+        self.client.force_login(admin_user)
+        payment = OrderPayment.objects.get(order=order)
+        response = self.client.post(
+            reverse("admin:mall_orderpayment_changelist"),
+            {"action": "cancel_payments", "_selected_action": [payment.pk]},
+        )
+        self.assertEqual(response.status_code, 302)
+        job = CancellationJob.objects.get()
+        self.assertEqual(job.status, CancellationJob.Status.PENDING)
+
+        client = FakeCancelClient()
+        with mock.patch("mall.cancellation.get_client", return_value=client):
+            taskqueue.Worker(queues=["jobs"], burst=True).run()
+        job.refresh_from_db()
+        self.assertEqual(job.status, CancellationJob.Status.DONE)
+        self.assertEqual(client.canceled_uids, [payment.merchant_uid])
+
+
+# 관리자 대량 작업 (mall/bulk_actions.py)
+class BulkActionJobTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name="과일")
+        self.product_list = [
+            Product.objects.create(
+                category=category,
+                name=f"상품 {index}",
+                price=1000,
+                status=Product.Status.ACTIVE,
+            )
+            for index in range(5)
+        ]
+
+    def create_job(self, product_list=None) -> BulkActionJob:
+        pk_list = [product.pk for product in product_list or self.product_list]
+        return bulk_actions.create_job(
+            "product.sold_out", Product.objects.filter(pk__in=pk_list)
+        )
+
+    def get_sold_out_count(self) -> int:
+        return Product.objects.filter(status=Product.Status.SOLD_OUT).count()
+
+    def test_to_ranges_and_get_chunk(self):
+        ranges, total_count = bulk_actions.to_ranges([1, 2, 3, 7, 9, 10])
+        self.assertEqual(ranges, [[1, 3], [7, 7], [9, 10]])
+        self.assertEqual(total_count, 6)
+        range_ends = [last for first, last in ranges]
+        self.assertEqual(bulk_actions.get_chunk(ranges, range_ends, 0, 4), [1, 2, 3, 7])
+        self.assertEqual(bulk_actions.get_chunk(ranges, range_ends, 2, 2), [3, 7])
+        self.assertEqual(bulk_actions.get_chunk(ranges, range_ends, 7, 10), [9, 10])
+        self.assertEqual(bulk_actions.get_chunk(ranges, range_ends, 10, 10), [])
+
+    def test_create_job_stores_ranges(self):
+        # 연속된 pk는 구간 하나로 저장합니다.
+        job = self.create_job()
+        self.assertEqual(
+            job.target_ranges,
+            [[self.product_list[0].pk, self.product_list[-1].pk]],
+        )
+        self.assertEqual(job.total_count, 5)
+
+        job = self.create_job(self.product_list[::2])
+        self.assertEqual(len(job.target_ranges), 3)
+        self.assertEqual(job.total_count, 3)
+
+    def test_run_job(self):
+        job = bulk_actions.run_job(self.create_job(), chunk_size=2)
+        self.assertEqual(job.status, BulkActionJob.Status.DONE)
+        self.assertEqual(job.processed_count, 5)
+        self.assertEqual(job.changed_count, 5)
+        self.assertEqual(self.get_sold_out_count(), 5)
+
+    def test_resume_after_time_limit(self):
+        # 첫 청크만 처리하고 멈추면 대기 상태로 돌려두고, 다음 실행은 멈춘 위치부터 이어서 처리합니다.
+        job = bulk_actions.run_job(self.create_job(), chunk_size=2, time_limit=0)
+        self.assertEqual(job.status, BulkActionJob.Status.PENDING)
+        self.assertEqual(job.processed_count, 2)
+        self.assertEqual(job.last_pk, self.product_list[1].pk)
+        self.assertEqual(self.get_sold_out_count(), 2)
+
+        job = bulk_actions.run_job(job, chunk_size=2, resume=True)
+        self.assertEqual(job.status, BulkActionJob.Status.DONE)
+        self.assertEqual(job.processed_count, 5)
+        self.assertEqual(self.get_sold_out_count(), 5)
+
+    def test_cancel_requested(self):
+        job = bulk_actions.run_job(self.create_job(), chunk_size=2, time_limit=0)
+        BulkActionJob.objects.filter(pk=job.pk).update(cancel_requested=True)
+        job = bulk_actions.run_job(job, chunk_size=2, resume=True)
+        self.assertEqual(job.status, BulkActionJob.Status.CANCELED)
+        self.assertEqual(self.get_sold_out_count(), 2)
+
+    def test_running_job_is_not_claimed_twice(self):
+        job = self.create_job()
+        self.assertTrue(bulk_actions.claim(job))
+        self.assertFalse(bulk_actions.claim(job, resume=True))
+        job = bulk_actions.run_job(job)
+        self.assertEqual(job.status, BulkActionJob.Status.RUNNING)
+        self.assertEqual(self.get_sold_out_count(), 0)
+
+    @override_settings(BULK_ACTION_CHUNK_SIZE=2, TASK_LOCK_TIMEOUT=0)
+    def test_admin_action_enqueues_task(self):
+        admin_user = User.objects.create_superuser("admin", password="pw12345!")
+        self.client.force_login(admin_user)
+        response = self.client.post(
+            reverse("admin:mall_product_changelist"),
+            {
+                "action": "make_sold_out",
+                "_selected_action": [product.pk for product in self.product_list],
+            },
+        )
+        job = BulkActionJob.objects.get()
+        self.assertRedirects(
+            response,
+            reverse("admin:mall_bulkactionjob_change", args=[job.pk]),
+            fetch_redirect_response=False,
+        )
+        self.assertEqual(job.status, BulkActionJob.Status.PENDING)
+
+        # 청크마다 나눠 실행되고 남은 부분은 다시 등록된 작업이 이어서 처리합니다.
+        taskqueue.Worker(queues=["jobs"], burst=True).run()
+        job.refresh_from_db()
+        self.assertEqual(job.status, BulkActionJob.Status.DONE)
+        self.assertEqual(self.get_sold_out_count(), 5)
+
+
+# 일별 매출 집계 (mall/sales.py)
+class SalesRollupTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("buyer", password="pw12345!")
+        self.category = Category.objects.create(name="과일")
+        self.product = Product.objects.create(
+            category=self.category,
+            name="사과",
+            price=1000,
+            status=Product.Status.ACTIVE,
+        )
+
+    def create_paid_order(self, quantity: int = 2) -> Order:
+        order = Order.objects.create(user=self.user, total_amount=1000 * quantity)
+        OrderedProduct.objects.create(
+            order=order,
+            product=self.product,
+            name="사과",
+            price=1000,
+            quantity=quantity,
+        )
+        OrderPayment.objects.create(
+            order=order,
+            name="사과",
+            desired_amount=1000 * quantity,
+            buyer_name="buyer",
+            buyer_email="buyer@example.com",
+            pay_status=OrderPayment.PayStatus.PAID,
+            is_paid_ok=True,
+            paid_at=timezone.now(),
+        )
+        order.change_status(Order.Status.PAID)
+        return order
+
+    def get_rollups(self) -> list:
+        return [
+            list(model.objects.order_by("pk").values_list(key, "quantity", "revenue"))
+            for model, key in (
+                (DailyProductSales, "product_id"),
+                (DailyCategorySales, "category_id"),
+            )
+        ]
+
+    def test_get_status_sign(self):
+        self.assertEqual(
+            sales.get_status_sign(Order.Status.REQUESTED, Order.Status.PAID), 1
+        )
+        self.assertEqual(
+            sales.get_status_sign(Order.Status.PAID, Order.Status.SHIPPED), 0
+        )
+        self.assertEqual(
+            sales.get_status_sign(Order.Status.SHIPPED, Order.Status.CANCELED), -1
+        )
+        self.assertEqual(
+            sales.get_status_sign(Order.Status.REQUESTED, Order.Status.CANCELED), 0
+        )
+
+    def test_status_changes_update_rollups(self):
+        order = self.create_paid_order()
+        self.create_paid_order(quantity=1)
+        self.assertEqual(
+            self.get_rollups(),
+            [[(self.product.pk, 3, 3000)], [(self.category.pk, 3, 3000)]],
+        )
+
+        order.change_status(Order.Status.SHIPPED)
+        self.assertEqual(self.get_rollups()[0], [(self.product.pk, 3, 3000)])
+
+        # 취소하면 원래 판매일의 집계에서 뺍니다.
+        order.change_status(Order.Status.CANCELED)
+        self.assertEqual(
+            self.get_rollups(),
+            [[(self.product.pk, 1, 1000)], [(self.category.pk, 1, 1000)]],
+        )
+
+    def test_rebuild_matches_incremental_rollups(self):
+        self.create_paid_order()
+        self.create_paid_order(quantity=3).change_status(Order.Status.CANCELED)
+        delivered = self.create_paid_order(quantity=4)
+        delivered.change_status(Order.Status.DELIVERED)
+        # 배송완료 주문을 보관 테이블로 옮겨도 매출에 포함됩니다.
+        self.assertEqual(archive.archive_orders(days=-1), 2)
+        self.assertFalse(Order.objects.filter(pk=delivered.pk).exists())
+
+        expected = self.get_rollups()
+        self.assertEqual(expected[0], [(self.product.pk, 6, 6000)])
+        DailyProductSales.objects.update(quantity=0, revenue=0)
+        DailyCategorySales.objects.all().delete()
+
+        self.assertEqual(sales.rebuild(), (1, 1))
+        self.assertEqual(
+            [sorted(rollup) for rollup in self.get_rollups()],
+            [sorted(rollup) for rollup in expected],
+        )
+
+
+executed_task_list = []
+
+
+@taskqueue.task(name="tests.record", queue="tests", max_attempts=2)
+def record_task(value: int, fail: bool = False) -> None:
+    executed_task_list.append(value)
+    if fail:
+        raise ValueError(value)
+
+
+# DB 기반 작업 큐 (mall/taskqueue.py)
+# SQLite에는 SKIP LOCKED가 없으므로 조건부 UPDATE 한 문장으로 가져가는 경로를 검사합니다.
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        executed_task_list.clear()
+
+    def test_claim_does_not_return_same_task_twice(self):
+        for value in range(3):
+            record_task.enqueue(value=value)
+        record_task.enqueue(value=9, priority=10)
+        record_task.enqueue(value=8, delay=60)  # 아직 실행 시각 전
+        record_task.enqueue(value=7, queue="other")
+
+        first = taskqueue.claim("worker-1", ["tests"], batch_size=2)
+        second = taskqueue.claim("worker-2", ["tests"], batch_size=10)
+        self.assertEqual([t.kwargs["value"] for t in first], [9, 0])
+        self.assertEqual([t.kwargs["value"] for t in second], [1, 2])
+        self.assertEqual({t.attempts for t in first + second}, {1})
+        self.assertEqual(taskqueue.claim("worker-3", ["tests"], batch_size=10), [])
+
+    def test_retry_then_fail(self):
+        record_task.enqueue(value=1, fail=True)
+        worker = taskqueue.Worker(queues=["tests"], burst=True)
+        with self.assertLogs("mall.taskqueue", "WARNING"):
+            worker.run()
+        task_obj = Task.objects.get()
+        self.assertEqual(task_obj.status, Task.Status.QUEUED)
+        self.assertGreater(task_obj.run_at, timezone.now())
+
+        Task.objects.update(run_at=timezone.now())
+        with self.assertLogs("mall.taskqueue", "WARNING"):
+            worker.run()
+        task_obj.refresh_from_db()
+        self.assertEqual(task_obj.status, Task.Status.FAILED)
+        self.assertEqual(task_obj.attempts, 2)
+        self.assertEqual(executed_task_list, [1, 1])
+
+    def test_done_tasks_are_deleted(self):
+        record_task.enqueue(value=1)
+        taskqueue.Worker(queues=["tests"], burst=True).run()
+        self.assertEqual(executed_task_list, [1])
+        self.assertFalse(Task.objects.exists())
+
+    @override_settings(TASK_LOCK_TIMEOUT=60)
+    def test_stale_task_is_not_run_by_previous_worker(self):
+        # 워커 1이 앞 작업을 오래 실행하는 동안 잠금이 만료되어 워커 2가 가져간 경우
+        record_task.enqueue(value=1)
+        (task_obj,) = taskqueue.claim("worker-1", ["tests"], batch_size=1)
+        Task.objects.update(locked_at=timezone.now() - timedelta(seconds=61))
+        self.assertEqual(taskqueue.requeue_stale(), 1)
+        (other_task_obj,) = taskqueue.claim("worker-2", ["tests"], batch_size=1)
+
+        self.assertFalse(taskqueue.renew_lock(task_obj))
+        taskqueue.Worker(queues=["tests"]).execute([task_obj])
+        self.assertEqual(executed_task_list, [])
+        self.assertTrue(Task.objects.filter(pk=task_obj.pk).exists())
+
+        self.assertTrue(taskqueue.renew_lock(other_task_obj))
+        taskqueue.Worker(queues=["tests"]).execute([other_task_obj])
+        self.assertEqual(executed_task_list, [1])
+        self.assertFalse(Task.objects.exists())
+
+    @override_settings(TASK_LOCK_TIMEOUT=60)
+    def test_lock_is_renewed_before_each_task(self):
+        record_task.enqueue(value=1)
+        (task_obj,) = taskqueue.claim("worker-1", ["tests"], batch_size=1)
+        Task.objects.update(locked_at=timezone.now() - timedelta(seconds=50))
+        self.assertTrue(taskqueue.renew_lock(task_obj))
+        self.assertEqual(taskqueue.requeue_stale(), 0)
+
+
+# 물류센터 배송 상태 일괄 반영 (mall/fulfillment.py)
+@override_settings(FULFILLMENT_API_TOKEN="secret", FULFILLMENT_CHUNK_SIZE=2)
+class FulfillmentTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("buyer", password="pw12345!")
+        self.order_list = [
+            Order.objects.create(
+                user=self.user, total_amount=1000, status=Order.Status.PAID
+            )
+            for __ in range(3)
+        ]
+
+    def get_status_list(self) -> list:
+        return list(Order.objects.order_by("pk").values_list("status", flat=True))
+
+    def post(self, body: str, content_type: str = "application/x-ndjson", **headers):
+        return self.client.post(
+            reverse("mall:fulfillment_transitions"),
+            body,
+            content_type=content_type,
+            headers={"Authorization": "Bearer secret", **headers},
+        )
+
+    def test_is_allowed(self):
+        Status = Order.Status
+        self.assertTrue(fulfillment.is_allowed(Status.PAID, Status.SHIPPED))
+        self.assertTrue(fulfillment.is_allowed(Status.SHIPPED, Status.DELIVERED))
+        self.assertFalse(fulfillment.is_allowed(Status.DELIVERED, Status.SHIPPED))
+        self.assertFalse(fulfillment.is_allowed(Status.REQUESTED, Status.SHIPPED))
+        self.assertFalse(fulfillment.is_allowed(Status.CANCELED, Status.DELIVERED))
+        self.assertFalse(fulfillment.is_allowed(Status.PAID, Status.CANCELED))
+
+    def test_apply_transitions(self):
+        first, second, third = self.order_list
+        Order.objects.filter(pk=third.pk).update(status=Order.Status.CANCELED)
+        lines = [
+            json.dumps({"order_uid": str(first.uid), "status": "prepared_product"}),
+            json.dumps(
+                {"order_id": first.pk, "status": "shipped"}
+            ),  # 같은 청크에서 이어서
+            json.dumps({"order_id": second.pk, "status": "paid"}),  # 이미 같은 상태
+            json.dumps({"order_id": third.pk, "status": "shipped"}),  # 취소된 주문
+            json.dumps({"order_id": 999999, "status": "shipped"}),
+            "{not json",
+            json.dumps({"order_id": second.pk, "status": "delivered"}),
+        ]
+        rejection_list = []
+        result = fulfillment.apply_transitions(
+            fulfillment.iter_rows(lines, "jsonl"),
+            chunk_size=2,
+            reject=rejection_list.append,
+        )
+        self.assertEqual(
+            (result.updated_count, result.unchanged_count, result.rejected_count),
+            (2, 1, 3),
+        )
+        # 한 청크 안에서 여러 번 바뀐 주문은 처음 상태 → 마지막 상태 한 번으로 셉니다.
+        self.assertEqual(
+            dict(result.transition_counts),
+            {
+                (Order.Status.PAID, Order.Status.SHIPPED): 1,
+                (Order.Status.PAID, Order.Status.DELIVERED): 1,
+            },
+        )
+        self.assertEqual(
+            sorted(rejection.line for rejection in rejection_list), [4, 5, 6]
+        )
+        self.assertEqual(
+            self.get_status_list(),
+            [Order.Status.SHIPPED, Order.Status.DELIVERED, Order.Status.CANCELED],
+        )
+        self.assertEqual(
+            list(
+                OrderEvent.objects.filter(order_id=first.pk).values_list(
+                    "from_status", "to_status"
+                )
+            ),
+            [
+                (Order.Status.PAID, Order.Status.PREPARED_PRODUCT),
+                (Order.Status.PREPARED_PRODUCT, Order.Status.SHIPPED),
+            ],
+        )
+
+    def test_api_requires_token(self):
+        body = json.dumps({"order_id": self.order_list[0].pk, "status": "shipped"})
+        response = self.post(body, Authorization="Bearer wrong")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(self.get_status_list()[0], Order.Status.PAID)
+
+    def test_api_csv(self):
+        first, second, __ = self.order_list
+        body = (
+            "order_id,status,carrier,tracking_number\n"
+            f"{first.pk},shipped,CJ,123\n"
+            f"{second.pk},requested,,\n"
+        )
+        response = self.post(body, content_type="text/csv")
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual((data["updated"], data["rejected"]), (1, 1))
+        self.assertEqual(data["rejections"][0]["line"], 3)
+        self.assertEqual(
+            OrderEvent.objects.get(order_id=first.pk).payload,
+            {"source": "api", "carrier": "CJ", "tracking_number": "123"},
+        )
+
+
+# 검색어 자동완성 (mall/autocomplete.py)
+@override_settings(CACHES=LOCMEM_CACHES)
+class AutocompleteTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        autocomplete.index = None
+        self.addCleanup(setattr, autocomplete, "index", None)
+        self.fruit = Category.objects.create(name="과일")
+        self.meat = Category.objects.create(name="정육")
+        self.apple = self.create_product("사과")
+        self.cheongsong_apple = self.create_product("청송 사과")
+        self.chicken = self.create_product("닭가슴살", category=self.meat)
+
+    def create_product(self, name, category=None, status=Product.Status.ACTIVE):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Product.objects.create(
+                category=category or self.fruit, name=name, price=1000, status=status
+            )
+
+    def search(self, query: str) -> list:
+        return [row["name"] for row in autocomplete.search(query, 8)["products"]]
+
+    def test_search_by_partial_syllable(self):
+        # 입력 중인 글자("삭" = "사" + 받침 ㄱ 입력 중)로도 찾습니다.
+        self.assertEqual(self.search("삭"), ["사과", "청송 사과"])
+        self.assertEqual(self.search("달"), ["닭가슴살"])
+        self.assertEqual(self.search("ㅊ"), ["청송 사과"])
+        self.assertEqual(self.search("배"), [])
+
+    def test_name_matches_come_before_word_matches(self):
+        self.assertEqual(self.search("사과"), ["사과", "청송 사과"])
+        self.assertEqual(self.search("청송 사"), ["청송 사과"])
+
+    def test_categories_without_active_products_are_hidden(self):
+        Category.objects.create(name="과자")
+        result = autocomplete.search("과", 8)
+        self.assertEqual([row["name"] for row in result["categories"]], ["과일"])
+
+    def test_refresh_applies_changes(self):
+        index = autocomplete.refresh()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.apple.status = Product.Status.SOLD_OUT
+            self.apple.save()
+            self.chicken.name = "닭다리살"
+            self.chicken.save()
+        self.create_product("사과즙")
+        self.create_product("사과칩", status=Product.Status.SOLD_OUT)
+
+        self.assertEqual(self.search("사과"), ["사과즙", "청송 사과"])
+        self.assertEqual(self.search("닭"), ["닭다리살"])
+        # 바뀐 상품만 다시 읽어 같은 색인을 고칩니다.
+        self.assertIs(autocomplete.refresh(), index)
+        self.assertEqual(index.version, autocomplete.get_version())
+
+    def test_refresh_rebuilds_when_change_log_expired(self):
+        index = autocomplete.refresh()
+        self.create_product("사과즙")
+        self.create_product("사과잼")
+        cache.delete(autocomplete.change_key(index.version + 1))
+        self.assertIsNot(autocomplete.refresh(), index)
+        self.assertEqual(self.search("사과"), ["사과", "사과잼", "사과즙", "청송 사과"])
+
+    def test_view_does_not_query_db(self):
+        autocomplete.refresh()
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("mall:autocomplete"), {"q": "삭"})
+        self.assertEqual(
+            [row["name"] for row in response.json()["products"]],
+            ["사과", "청송 사과"],
+        )
@@ -1,10 +1,11 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 app_name = "mall"
 
 urlpatterns = [
     path("", views.product_list, name="product_list"),
+    path("autocomplete/", views.product_autocomplete, name="autocomplete"),
     path("cart/", views.cart_detail, name="cart_detail"),
     path("cart/<int:product_pk>/add/", views.add_to_cart, name="add_to_cart"),
     path("orders/", views.order_list, name="order_list"),
@@ -16,4 +17,16 @@ urlpatterns = [
         name="order_check",
     ),
     path("orders/<int:pk>/", views.order_detail, name="order_detail"),
+    path(
+        "fulfillment/transitions/",
+        views.fulfillment_transitions,
+        name="fulfillment_transitions",
+    ),
+    path("portone/webhook/", views.portone_webhook, name="portone_webhook"),
+    path("portone/status/", views.portone_status, name="portone_status"),
+    path("profiler/", views.profiler_samples, name="profiler_samples"),
+    path("api/cart/", api.cart, name="api_cart"),
+    path("api/checkout/", api.checkout, name="api_checkout"),
+    path("api/orders/", api.order_list, name="api_order_list"),
+    path("api/orders/<int:pk>/", api.order_detail, name="api_order_detail"),
 ]
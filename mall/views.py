@@ -1,15 +1,36 @@
+import hmac
+import json
+
 from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.forms import modelformset_factory
-from django.http import HttpResponse
+from django.http import Http404, HttpResponse, JsonResponse
 from django.shortcuts import render, get_object_or_404, redirect
 from django.urls import reverse
+from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 from django.views.generic import ListView
 
-from mysite import settings
+from django.conf import settings
 from mall.forms import CartProductForm
-from mall.models import Product, CartProduct, Order, OrderPayment
+from mall import (
+    archive,
+    autocomplete,
+    fulfillment,
+    local_cache,
+    metrics,
+    order_cache,
+    portone,
+    profiler,
+    recommendations,
+    tasks,
+)
+from mall.page_cache import cache_anonymous_page, product_list_tags
+from mall.ratelimit import get_user_id, rate_limit
+from mall.sales import COUNTED_ORDER_STATUSES
+from mall.waiting_room import release as release_waiting_room, waiting_room
+from mall.models import ArchivedOrder, Product, CartProduct, Order, OrderPayment
 
 # Create your views here.
 
@@ -31,9 +52,8 @@ class ProductListView(ListView):  # ListView 페이징 처리가 기본으로 
     # 템플릿 경로 mall/product_list.html은 ProductListView 설정을 통해 디폴트로 찾아서 생략
     # context_data 이름인 product_list도 모델명소문자_list로서 디폴트로 지정되서 생략
     model = Product
-    queryset = Product.objects.filter(status=Product.Status.ACTIVE).select_related(
-        "category"
-    )  # 정적
+    # 분류는 거의 바뀌지 않으므로 조인하지 않고 프로세스 캐시에서 붙입니다. (get_context_data)
+    queryset = Product.objects.filter(status=Product.Status.ACTIVE)  # 정적
     paginate_by = 4
 
     def get_queryset(self):  # 동적으로 검색어 쿼리셋
@@ -47,8 +67,28 @@ class ProductListView(ListView):  # ListView 페이징 처리가 기본으로 
             qs = qs.filter(name__icontains=query)
         return qs
 
+    def get_context_data(self, **kwargs):
+        context_data = super().get_context_data(**kwargs)
+        local_cache.attach_categories(context_data["object_list"])
+        return context_data
+
+
+# 비로그인 사용자의 목록 화면은 검색어/페이지별로 캐시합니다. (mall/page_cache.py)
+product_list = cache_anonymous_page(
+    "mall:product_list",
+    params={"query": "", "page": "1"},
+    tags=product_list_tags,
+)(ProductListView.as_view())
+
 
-product_list = ProductListView.as_view()
+# 검색창 자동완성. 워커 메모리의 색인에서 찾으므로 DB를 조회하지 않습니다. (mall/autocomplete.py)
+def product_autocomplete(request):
+    try:
+        limit = int(request.GET.get("limit", settings.AUTOCOMPLETE_LIMIT))
+    except ValueError:
+        limit = settings.AUTOCOMPLETE_LIMIT
+    limit = min(max(limit, 1), settings.AUTOCOMPLETE_MAX_LIMIT)
+    return JsonResponse(autocomplete.search(request.GET.get("q", ""), limit))
 
 
 @login_required
@@ -83,15 +123,23 @@ def cart_detail(request):
             queryset=cart_product_qs,
         )
 
+    # 폼셋이 읽어둔 장바구니 목록을 재사용하고, 추천은 장바구니 전체에 대해 한 번에 조회합니다.
+    recommended_products = recommendations.get_recommended_products(
+        [cart_product.product_id for cart_product in formset.get_queryset()],
+        limit=settings.RECOMMENDATION_CART_LIMIT,
+    )
+
     return render(
         request,
         "mall/cart_detail.html",
         {
             "formset": formset,
+            "recommended_products": recommended_products,
         },
     )
 
 
+@rate_limit("add_to_cart")
 @login_required
 @require_POST  # 포스트 요청일때만 add_to_cart 뷰가 호출됨
 def add_to_cart(request, product_pk):
@@ -102,10 +150,11 @@ def add_to_cart(request, product_pk):
     product = get_object_or_404(Product, pk=product_pk)
     둘이 같음
     """
-    product_qs = Product.objects.filter(  # ACTIVE 상태의 물건만 장바구니에 담을 수 있게
-        status=Product.Status.ACTIVE,
-    )
-    product = get_object_or_404(product_qs, pk=product_pk)
+    # ACTIVE 상태의 물건만 장바구니에 담을 수 있게
+    # 상품 상태는 프로세스 캐시의 상품 요약으로 확인해서 클릭마다 상품을 조회하지 않습니다. (mall/local_cache.py)
+    product = local_cache.get_product(product_pk)
+    if product is None or not product.is_active:
+        raise Http404("상품을 찾을 수 없습니다.")
 
     quantity = int(
         request.GET.get("quantity", 1)
@@ -114,7 +163,7 @@ def add_to_cart(request, product_pk):
     # 반환값으로 튜플을 받고, 첫 번째 값으로 CartProduct 인스턴스, 두번 째 값으로 생성여부를 받습니다.
     cart_product, is_created = CartProduct.objects.get_or_create(
         user=request.user,
-        product=product,
+        product_id=product.pk,
         defaults={"quantity": quantity},
     )
 
@@ -135,16 +184,28 @@ def add_to_cart(request, product_pk):
 # Pagination 처리가 필요하다면 ListView를 사용.
 @login_required
 def order_list(request):
-    order_qs = Order.objects.all().filter(user=request.user, status=Order.Status.PAID)
+    # 결제가 끝난 주문(결제완료~배송완료)을 보여줍니다.
+    order_qs = Order.objects.all().filter(
+        user=request.user, status__in=COUNTED_ORDER_STATUSES
+    )
+    # 오래된 주문은 보관 테이블로 옮겨지므로(mall/archive.py) 같은 조건으로 함께 읽어서 최신순으로 합칩니다.
+    archived_order_qs = ArchivedOrder.objects.filter(
+        user=request.user, status__in=COUNTED_ORDER_STATUSES
+    )
     return render(
         request,
         "mall/order_list.html",
         {
-            "order_list": order_qs,
+            "order_list": archive.get_order_list(
+                order_qs, archived_order_qs, limit=settings.ORDER_LIST_LIMIT
+            ),
         },
     )
 
 
+# 대기열(mall/waiting_room.py)을 통과한 요청만 주문을 만듭니다.
+@waiting_room
+@rate_limit("order_new")
 @login_required
 def order_new(request):
     # 현재 유저의 장바구니 내역은 밑에 쿼리를 통해 조회할 수 있다.
@@ -156,6 +217,7 @@ def order_new(request):
     return redirect("mall:order_pay", order.pk)
 
 
+@rate_limit("order_pay")
 @login_required
 def order_pay(request, pk):
     order = get_object_or_404(
@@ -207,18 +269,121 @@ def order_check(request, order_pk, payment_pk):
     # order__pk 대신에 order__user = request.user가 원래 의도에 맞습니다.
     payment = get_object_or_404(OrderPayment, pk=payment_pk, order__pk=order_pk)
     payment.update()
+    # 결제 시도가 끝났으므로 대기열 자리를 다음 사용자에게 넘깁니다.
+    release_waiting_room(get_user_id(request))
+    if payment.is_pending:
+        # 포트원 장애로 검증이 보류되면 작업 큐에서 백오프하며 다시 검증합니다.
+        tasks.verify_payment.enqueue(
+            delay=settings.TASK_RETRY_BASE_DELAY, payment_id=payment.pk
+        )
+        messages.warning(
+            request,
+            "결제 확인이 지연되고 있습니다. 잠시 후 주문내역에서 다시 확인해주세요.",
+        )
     # return redirect(payment.order)
     return redirect("mall:order_detail", order_pk)
 
 
 @login_required
 def order_detail(request, pk):
+    # 결제가 끝난 주문은 캐시된 화면을 DB 조회 없이 돌려줍니다. (mall/order_cache.py)
+    response = order_cache.get_cached_response(request, pk)
+    if response is not None:
+        return response
     # 로그인 유저만이 본인의 주문만 볼 수 있도록 조건 걸기
-    order = get_object_or_404(Order, pk=pk, user=request.user)
-    return render(
+    # 운영 테이블에 없으면 보관 테이블에서 찾습니다. (같은 pk로 보관됩니다.)
+    order = archive.get_order_or_404(
+        pk, prefetch=["orderedproduct_set"], user=request.user
+    )
+    return order_cache.render_order(
         request,
+        order,
         "mall/order_detail.html",
         {
             "order": order,
         },
     )
+
+
+# 포트원 웹훅은 merchant_uid로 결제건을 알려줍니다. 요청 본문은 신뢰하지 않고 포트원 API로 다시 검증합니다.
+@csrf_exempt
+@require_POST
+def portone_webhook(request):
+    if request.content_type == "application/json":
+        try:
+            data = json.loads(request.body)
+        except ValueError:
+            return HttpResponse("invalid json", status=400)
+        if not isinstance(data, dict):
+            return HttpResponse("invalid json", status=400)
+    else:
+        data = request.POST
+    try:
+        payment = OrderPayment.get_by_merchant_uid(data.get("merchant_uid"))
+    except OrderPayment.DoesNotExist:
+        raise Http404("결제내역을 찾을 수 없습니다.")
+    # 포트원 조회는 작업 큐에서 처리하고 웹훅에는 바로 응답합니다. (검증 실패 시 작업 큐가 재시도합니다.)
+    tasks.verify_payment.enqueue(payment_id=payment.pk)
+    return HttpResponse("ok")
+
+
+# 물류센터 배송 상태 일괄 반영 API (mall/fulfillment.py)
+# 본문은 JSONL(행마다 {"order_uid": ..., "status": ...}) 또는 CSV이고, 한 줄씩 읽어서 청크 단위로 반영하므로
+# 본문 전체를 메모리에 올리지 않습니다. (request.body를 쓰지 않아 DATA_UPLOAD_MAX_MEMORY_SIZE 제한도 받지 않습니다.)
+@csrf_exempt
+@require_POST
+def fulfillment_transitions(request):
+    token = settings.FULFILLMENT_API_TOKEN
+    authorization = request.headers.get("Authorization", "")
+    if not token or not hmac.compare_digest(authorization, f"Bearer {token}"):
+        return JsonResponse({"error": "unauthorized"}, status=401)
+
+    fmt = "csv" if request.content_type == "text/csv" else "jsonl"
+    lines = fulfillment.decode_lines(request)
+    rejection_list = []
+
+    def reject(rejection):
+        if len(rejection_list) < settings.FULFILLMENT_MAX_REJECTIONS:
+            rejection_list.append(rejection.as_dict())
+
+    result = fulfillment.apply_transitions(
+        fulfillment.iter_rows(lines, fmt),
+        chunk_size=settings.FULFILLMENT_CHUNK_SIZE,
+        reject=reject,
+        source="api",
+    )
+    return JsonResponse({**result.as_dict(), "rejections": rejection_list})
+
+
+# 포트원 서킷 브레이커 상태와 재시도 예산을 모니터링용으로 노출합니다.
+@staff_member_required
+def portone_status(request):
+    return JsonResponse(portone.get_status())
+
+
+# 프로메테우스 수집용 엔드포인트. 모든 워커의 메트릭을 합산해서 텍스트 포맷으로 응답합니다.
+def metrics_view(request):
+    token = settings.METRICS_TOKEN
+    authorization = request.headers.get("Authorization", "")
+    if not (token and hmac.compare_digest(authorization, f"Bearer {token}")) and (
+        request.META.get("REMOTE_ADDR") not in settings.METRICS_ALLOWED_IPS
+    ):
+        return HttpResponse(status=403)
+    return HttpResponse(
+        metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+# 샘플링 프로파일러가 이 워커 프로세스에 모아둔 최근 샘플을 보여줍니다. (전체 기록은 PROFILER_LOG_PATH)
+@staff_member_required
+def profiler_samples(request):
+    sample_list = sorted(profiler.samples, key=lambda s: s["total_ms"], reverse=True)
+    return render(
+        request,
+        "mall/profiler_samples.html",
+        {
+            "title": "요청 프로파일 샘플",
+            "sample_list": sample_list,
+            "sample_rate": settings.PROFILER_SAMPLE_RATE,
+        },
+    )
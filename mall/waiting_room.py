@@ -0,0 +1,136 @@
+import random
+import time
+from dataclasses import dataclass
+from functools import wraps
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.shortcuts import render
+
+from mall import metrics
+from mall.ratelimit import get_user_id
+
+# 주문(order_new) 대기열
+# 동시에 결제를 진행하는 사용자 수를 WAITING_ROOM_SLOTS 개로 제한하고, 나머지는 순번을 받아 대기 화면에서 기다립니다.
+# 대기 화면의 새로고침은 캐시만 읽으므로 DB에 부하를 주지 않습니다. (상태를 워커끼리 공유하려면 공유 캐시가 필요합니다.)
+#
+# - 순번 : next_ticket 을 incr 해서 받습니다. 입장 순번은 시각 × WAITING_ROOM_ADMIT_RATE 로 계산하므로,
+#   순번을 받고 떠난 사용자가 있어도 대기열이 멈추지 않고 초당 ADMIT_RATE 명씩 앞으로 갑니다.
+#   대기열이 비어 있으면(next_ticket이 입장 순번보다 뒤처지면) 바로 차례가 됩니다.
+# - 자리 : 차례가 된 사용자는 빈 자리(slot) 키를 cache.add로 차지해야 입장합니다. add는 원자적이라 자리 수를 넘지 않습니다.
+#   결제 확인(order_check)에서 자리를 반납하고, 결제를 포기한 사용자의 자리는 WAITING_ROOM_CHECKOUT_TIMEOUT 뒤에 비워집니다.
+
+NEXT_TICKET_KEY = "waiting_room:next_ticket"
+
+
+def slot_key(index: int) -> str:
+    return f"waiting_room:slot:{index}"
+
+
+def ticket_key(user_id) -> str:
+    return f"waiting_room:ticket:{user_id}"
+
+
+def holder_key(user_id) -> str:
+    return f"waiting_room:holder:{user_id}"
+
+
+@dataclass
+class Admission:
+    admitted: bool
+    position: int = 0  # 내 앞의 대기 인원 (0이면 빈 자리를 기다리는 중)
+    wait_seconds: float = 0.0  # 예상 대기 시간
+
+
+def get_now_serving() -> int:
+    return int(time.time() * settings.WAITING_ROOM_ADMIT_RATE)
+
+
+def get_ticket(user_id) -> int:
+    ticket = cache.get(ticket_key(user_id))
+    if ticket is not None:
+        return ticket
+    now_serving = get_now_serving()
+    cache.add(NEXT_TICKET_KEY, now_serving - 1, timeout=None)
+    ticket = cache.incr(NEXT_TICKET_KEY)
+    if ticket <= now_serving:
+        # 대기열이 비어 있던 경우. 다음 순번이 현재 입장 순번부터 이어지도록 당깁니다.
+        ticket = now_serving
+        cache.set(NEXT_TICKET_KEY, now_serving, timeout=None)
+    wait_seconds = (ticket - now_serving) / settings.WAITING_ROOM_ADMIT_RATE
+    cache.set(
+        ticket_key(user_id),
+        ticket,
+        timeout=int(wait_seconds) + settings.WAITING_ROOM_CHECKOUT_TIMEOUT,
+    )
+    return ticket
+
+
+def holds_slot(user_id) -> bool:
+    index = cache.get(holder_key(user_id))
+    return index is not None and cache.get(slot_key(index)) == user_id
+
+
+def claim_slot(user_id) -> bool:
+    slot_keys = [slot_key(index) for index in range(settings.WAITING_ROOM_SLOTS)]
+    taken = cache.get_many(slot_keys)
+    free_list = [index for index, key in enumerate(slot_keys) if key not in taken]
+    # 동시에 입장하는 사용자끼리 같은 자리를 두고 다투지 않도록 빈 자리를 섞어서 시도합니다.
+    for index in random.sample(free_list, min(len(free_list), 3)):
+        timeout = settings.WAITING_ROOM_CHECKOUT_TIMEOUT
+        if cache.add(slot_key(index), user_id, timeout=timeout):
+            cache.set(holder_key(user_id), index, timeout=timeout)
+            cache.delete(ticket_key(user_id))
+            return True
+    return False
+
+
+def admit(user_id) -> Admission:
+    if holds_slot(user_id):
+        return Admission(admitted=True)
+    position = max(get_ticket(user_id) - get_now_serving(), 0)
+    if position == 0 and claim_slot(user_id):
+        metrics.inc("waiting_room_requests_total", result="admitted")
+        return Admission(admitted=True)
+    metrics.inc("waiting_room_requests_total", result="waiting")
+    return Admission(
+        admitted=False,
+        position=position,
+        wait_seconds=position / settings.WAITING_ROOM_ADMIT_RATE,
+    )
+
+
+def release(user_id: Optional[str]) -> None:
+    # 결제를 마친 사용자의 자리를 반납합니다. 자리가 만료되어 다른 사용자가 차지한 경우에는 건드리지 않습니다.
+    if user_id is None:
+        return
+    index = cache.get(holder_key(user_id))
+    if index is not None and cache.get(slot_key(index)) == user_id:
+        cache.delete(slot_key(index))
+    cache.delete(holder_key(user_id))
+
+
+def waiting_room(view_func):
+    # 로그인하지 않은 요청은 그대로 넘겨서 login_required가 로그인 화면으로 보내도록 합니다.
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        user_id = get_user_id(request)
+        if not settings.WAITING_ROOM_SLOTS or user_id is None:
+            return view_func(request, *args, **kwargs)
+        admission = admit(user_id)
+        if admission.admitted:
+            return view_func(request, *args, **kwargs)
+        response = render(
+            request,
+            "mall/waiting_room.html",
+            {
+                "admission": admission,
+                "refresh_seconds": settings.WAITING_ROOM_POLL_SECONDS,
+            },
+            status=503,
+        )
+        response["Retry-After"] = str(settings.WAITING_ROOM_POLL_SECONDS)
+        return response
+
+    return wrapper
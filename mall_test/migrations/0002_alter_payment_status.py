@@ -0,0 +1,29 @@
+# Generated by Django 4.2.9 on 2026-10-19 18:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mall_test", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="payment",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("ready", "미결제"),
+                    ("paid", "결제완료"),
+                    ("cancelled", "결제취소"),
+                    ("failed", "결제실패"),
+                    ("pending", "검증대기"),
+                ],
+                db_index=True,
+                default="ready",
+                max_length=9,
+            ),
+        ),
+    ]
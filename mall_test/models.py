@@ -1,17 +1,16 @@
 import logging
-from uuid import uuid4
+from uuid import UUID, uuid4
 
 from django.core.validators import MinValueValidator
 from django.db import models
 from django.http import Http404
-from iamport import Iamport
+
+from mall.portone import PortoneUnavailable, get_client
 
 
 logger = logging.getLogger("portone")
 # from iamport import Iamport
 
-from mysite import settings
-
 
 # Create your models here.
 class Payment(models.Model):
@@ -20,8 +19,9 @@ class Payment(models.Model):
         PAID = "paid", "결제완료"
         CANCELLED = "cancelled", "결제취소"
         FAILED = "failed", "결제실패"
+        PENDING = "pending", "검증대기"  # 포트원 장애로 검증을 미룬 상태
 
-    uid = models.UUIDField(default=uuid4, editable=False)
+    uid = models.UUIDField(default=uuid4, editable=False, unique=True)
     name = models.CharField(max_length=100)
     amount = models.PositiveIntegerField(
         validators=[
@@ -43,15 +43,32 @@ class Payment(models.Model):
     def merchant_uid(self) -> str:
         return self.uid.hex
 
+    # 포트원/웹훅이 전달한 merchant_uid로 uid 인덱스를 이용해 조회합니다.
+    @classmethod
+    def get_by_merchant_uid(cls, merchant_uid: str) -> "Payment":
+        try:
+            uid = UUID(merchant_uid)
+        except (TypeError, ValueError):
+            raise cls.DoesNotExist(f"잘못된 merchant_uid 입니다: {merchant_uid}")
+        return cls.objects.get(uid=uid)
+
     # commit true는 필드를 변경하고, commit 참/거짓에 따라 self.save()
     # 호출 여부를 조절하고 싶을 목적으로 사용
 
     def portone_check(self, commit=True):  # 결제 내역 검증 로직 view에서는 호출만 할 것
-        api = Iamport(
-            imp_key=settings.PORTONE_API_KEY, imp_secret=settings.PORTONE_API_SECRET
-        )
+        from iamport import Iamport  # 결제 API를 호출할 때만 import
+
+        api = get_client()
         try:
             meta = api.find(merchant_uid=self.merchant_uid)
+        except PortoneUnavailable as e:
+            # 서킷이 열려 있으면 기다리지 않고 검증 대기로 남겨둡니다.
+            logger.warning(str(e))
+            self.status = self.StatusChoices.PENDING
+            self.is_paid_ok = False
+            if commit:
+                self.save()
+            return
         except (
             Iamport.ResponseError,
             Iamport.HttpError,
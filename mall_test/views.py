@@ -1,7 +1,7 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse
 
-from mysite import settings
+from django.conf import settings
 from mall_test.forms import PaymentForm
 from mall_test.models import Payment
 
@@ -0,0 +1,92 @@
+import contextvars
+import random
+import time
+
+from django.conf import settings
+from django.db import connections
+
+# 읽기 복제본 라우팅
+# 상품/분류 조회와 주문내역 조회는 복제본에서 읽고, 쓰기는 항상 primary(default)로 보냅니다.
+# 복제 지연 때문에 방금 쓴 데이터가 복제본에 없을 수 있으므로, 쓰기를 한 사용자의 읽기는
+# DATABASE_REPLICA_STICKY_SECONDS 동안 primary로 보냅니다. (read-your-writes)
+
+PRIMARY = "default"
+STICKY_COOKIE_NAME = "db_sticky_until"
+
+
+class RoutingState:
+    def __init__(self, use_primary: bool):
+        self.use_primary = use_primary
+        self.wrote = False
+
+
+# 요청 단위 상태. 스레드/비동기 환경 모두에서 요청별로 분리되도록 contextvar를 사용합니다.
+routing_state: contextvars.ContextVar = contextvars.ContextVar(
+    "db_routing_state", default=None
+)
+
+
+def pin_to_primary() -> contextvars.Token:
+    # 관리 명령이나 배치 작업처럼 쓰기 직후 결과를 다시 읽어야 하는 코드에서 사용합니다.
+    return routing_state.set(RoutingState(use_primary=True))
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not settings.DATABASE_REPLICAS:
+            return None
+        if model._meta.label_lower not in settings.DATABASE_REPLICA_MODELS:
+            return None
+        state = routing_state.get()
+        if state is not None and (state.use_primary or state.wrote):
+            return PRIMARY
+        # 트랜잭션 안에서의 읽기는 같은 트랜잭션의 쓰기를 봐야 하므로 primary로 보냅니다.
+        if connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        state = routing_state.get()
+        if state is not None:
+            state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # primary와 복제본은 같은 데이터이므로 서로 다른 DB에서 읽은 객체끼리도 관계를 허용합니다.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
+
+
+class ReplicaStickinessMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sticky_until = request.COOKIES.get(STICKY_COOKIE_NAME, "")
+        try:
+            is_sticky = float(sticky_until) > time.time()
+        except ValueError:
+            is_sticky = False
+        # POST 등 쓰기 요청은 처음부터 primary에서 읽습니다.
+        use_primary = is_sticky or request.method not in ("GET", "HEAD", "OPTIONS")
+
+        state = RoutingState(use_primary=use_primary)
+        token = routing_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            routing_state.reset(token)
+
+        if state.wrote:
+            # order_new → order_pay 처럼 쓰기 직후 리다이렉트된 요청도 primary에서 읽도록 쿠키로 표시합니다.
+            seconds = settings.DATABASE_REPLICA_STICKY_SECONDS
+            response.set_cookie(
+                STICKY_COOKIE_NAME,
+                str(time.time() + seconds),
+                max_age=seconds,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
@@ -51,7 +51,6 @@ INSTALLED_APPS = [
     "django.contrib.staticfiles",
     "rest_framework",
     # third apps
-    "debug_toolbar",
     "django_bootstrap5",
     "sorl.thumbnail",
     "widget_tweaks",
@@ -62,8 +61,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
-    "debug_toolbar.middleware.DebugToolbarMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    # 샘플링된 요청만 SQL/템플릿/응답시간을 기록합니다. (PROFILER_SAMPLE_RATE)
+    "mall.profiler.ProfilerMiddleware",
+    # 세션/인증 미들웨어의 쿼리까지 뷰별 쿼리 수에 포함되도록 앞쪽에 둡니다.
+    "mall.middleware.MetricsMiddleware",
+    "mysite.db_router.ReplicaStickinessMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -71,6 +74,12 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
+
+# 디버그 툴바는 개발 환경에서만 사용합니다. 운영에서는 모든 요청에 오버헤드만 더합니다.
+if DEBUG:
+    INSTALLED_APPS.insert(INSTALLED_APPS.index("django_bootstrap5"), "debug_toolbar")
+    MIDDLEWARE.insert(0, "debug_toolbar.middleware.DebugToolbarMiddleware")
+
 ROOT_URLCONF = "mysite.urls"
 
 templates_dir = os.path.join(BASE_DIR, "templates")  # 내가 생성한 템플릿 위치
@@ -87,6 +96,7 @@ TEMPLATES = [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "mall.page_cache.csrf_placeholder",
             ],
         },
     },
@@ -113,6 +123,153 @@ DATABASES = {
         },
     }
 }
+# 로컬에서 SQLite 등으로 바꿔 실행할 때 (예: DATABASE_URL=sqlite:////tmp/primary.sqlite3)
+if env.str("DATABASE_URL", default=""):
+    DATABASES["default"] = env.db("DATABASE_URL")
+
+# 읽기 복제본 (예: REPLICA_DATABASE_URLS=mysql://user:pw@replica1/payment,mysql://...)
+# 로컬에서는 sqlite 파일 2개와 sync_sqlite_replicas 명령으로 복제 지연을 재현할 수 있습니다.
+DATABASE_REPLICAS = []
+for i, replica_url in enumerate(env.list("REPLICA_DATABASE_URLS", default=[]), start=1):
+    replica = environ.Env.db_url_config(replica_url)
+    if replica["ENGINE"] == DATABASES["default"]["ENGINE"]:
+        replica["OPTIONS"] = DATABASES["default"].get("OPTIONS", {})
+    replica["TEST"] = {
+        "MIRROR": "default"
+    }  # 테스트에서는 복제본이 primary를 그대로 바라봅니다.
+    DATABASES[f"replica{i}"] = replica
+    DATABASE_REPLICAS.append(f"replica{i}")
+
+DATABASE_ROUTERS = ["mysite.db_router.PrimaryReplicaRouter"]
+# 복제본에서 읽어도 되는 모델 (상품 목록, 주문내역 조회)
+DATABASE_REPLICA_MODELS = [
+    "mall.category",
+    "mall.product",
+    "mall.order",
+    "mall.orderedproduct",
+]
+# 쓰기 이후 이 시간(초) 동안은 해당 사용자의 읽기를 primary로 보냅니다. 복제 지연보다 길게 잡아주세요.
+DATABASE_REPLICA_STICKY_SECONDS = env.int("DATABASE_REPLICA_STICKY_SECONDS", default=5)
+
+# 캐시 (예: CACHE_URL=memcache://127.0.0.1:11211, CACHE_URL=rediscache://127.0.0.1:6379/1)
+# 기본값 locmem은 프로세스별 캐시이므로 워커가 여럿인 운영에서는 공유 캐시를 지정해주세요.
+CACHES = {"default": env.cache("CACHE_URL", default="locmemcache://")}
+
+# 요청 제한 (mall/ratelimit.py). 범위 이름 → (초당 허용 수, 한 번에 허용할 최대 수)
+# 로그인 사용자별로 적용하고, 같은 IP에는 RATE_LIMIT_IP_FACTOR 배의 한도를 적용합니다.
+RATE_LIMITS = {
+    "add_to_cart": (2.0, 10),
+    "order_new": (0.2, 3),
+    "order_pay": (0.2, 5),
+}
+RATE_LIMIT_IP_FACTOR = env.float("RATE_LIMIT_IP_FACTOR", default=5.0)
+
+# 주문 대기열 (mall/waiting_room.py). 0이면 대기열을 쓰지 않습니다.
+# 동시에 결제를 진행할 수 있는 사용자 수와, 초당 입장시키는 순번 수
+WAITING_ROOM_SLOTS = env.int("WAITING_ROOM_SLOTS", default=200)
+WAITING_ROOM_ADMIT_RATE = env.float("WAITING_ROOM_ADMIT_RATE", default=2.0)
+# 입장 후 이 시간(초) 안에 결제를 마치지 않으면 자리를 비웁니다.
+WAITING_ROOM_CHECKOUT_TIMEOUT = env.int("WAITING_ROOM_CHECKOUT_TIMEOUT", default=600)
+WAITING_ROOM_POLL_SECONDS = env.int("WAITING_ROOM_POLL_SECONDS", default=5)
+
+# 세션은 캐시에서 읽고, 저장할 때는 DB에도 함께 씁니다. (캐시가 비워져도 로그인이 유지됩니다.)
+SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+
+# 비로그인 사용자 페이지 캐시 (mall/page_cache.py)
+PAGE_CACHE_TIMEOUT = env.int("PAGE_CACHE_TIMEOUT", default=60 * 10)
+# 브라우저 캐시 시간. 로그인 후 이전 화면이 보이지 않도록 기본은 0(ETag로 재검증)입니다.
+PAGE_CACHE_BROWSER_MAX_AGE = env.int("PAGE_CACHE_BROWSER_MAX_AGE", default=0)
+
+# 검색어 자동완성 (mall/autocomplete.py, /mall/autocomplete/)
+AUTOCOMPLETE_LIMIT = env.int("AUTOCOMPLETE_LIMIT", default=8)  # 기본 응답 건수
+AUTOCOMPLETE_MAX_LIMIT = 20
+AUTOCOMPLETE_MAX_QUERY_LENGTH = 50
+# 색인 변경 기록을 보관하는 시간(초)과, 한 번에 이어서 반영할 최대 변경 수. 넘으면 색인을 다시 만듭니다.
+AUTOCOMPLETE_CHANGE_TIMEOUT = env.int("AUTOCOMPLETE_CHANGE_TIMEOUT", default=60 * 60)
+AUTOCOMPLETE_MAX_CHANGES = env.int("AUTOCOMPLETE_MAX_CHANGES", default=5000)
+
+# 프로세스 메모리 조회 캐시 (mall/local_cache.py). 캐시별 최대 항목 수와, 다른 워커의 변경을 확인하는 주기(초)
+LOCAL_CACHE_CATEGORY_SIZE = env.int("LOCAL_CACHE_CATEGORY_SIZE", default=1000)
+LOCAL_CACHE_PRODUCT_SIZE = env.int("LOCAL_CACHE_PRODUCT_SIZE", default=10000)
+LOCAL_CACHE_VERSION_CHECK_INTERVAL = env.float(
+    "LOCAL_CACHE_VERSION_CHECK_INTERVAL", default=1.0
+)
+# 공유 캐시 없이도 변경이 반영되도록 항목을 다시 읽는 시간(초)
+LOCAL_CACHE_MAX_AGE = env.float("LOCAL_CACHE_MAX_AGE", default=30.0)
+
+# 사이트맵/상품 피드 (mall/catalog_feed.py, build_catalog_feeds 명령)
+# 파일을 만들 디렉토리와 파일 안의 절대 주소에 쓸 사이트 주소. 상품 pk CATALOG_FEED_SHARD_SIZE 개 범위마다 조각 파일 하나를 만듭니다.
+CATALOG_FEED_ROOT = env.str(
+    "CATALOG_FEED_ROOT", default=str(BASE_DIR / "var" / "catalog")
+)
+CATALOG_FEED_BASE_URL = env.str(
+    "CATALOG_FEED_BASE_URL", default="http://localhost:8000"
+)
+# 사이트맵 한 파일은 5만 개를 넘을 수 없습니다.
+CATALOG_FEED_SHARD_SIZE = env.int("CATALOG_FEED_SHARD_SIZE", default=10000)
+CATALOG_FEED_MAX_AGE = env.int("CATALOG_FEED_MAX_AGE", default=60 * 60)
+
+# 모바일 앱용 JSON API (mall/api.py, /mall/api/)
+REST_FRAMEWORK = {
+    "DEFAULT_AUTHENTICATION_CLASSES": [
+        "rest_framework.authentication.SessionAuthentication"
+    ],
+    "DEFAULT_PERMISSION_CLASSES": ["rest_framework.permissions.IsAuthenticated"],
+    "DEFAULT_RENDERER_CLASSES": ["rest_framework.renderers.JSONRenderer"],
+    "DEFAULT_PARSER_CLASSES": ["rest_framework.parsers.JSONParser"],
+}
+# 주문내역 페이지 크기 (?page_size= 로 API_MAX_PAGE_SIZE까지)
+API_PAGE_SIZE = env.int("API_PAGE_SIZE", default=20)
+API_MAX_PAGE_SIZE = 100
+API_CART_BATCH_LIMIT = 100  # 장바구니 일괄 변경 한 번에 바꿀 수 있는 상품 수
+# 뷰별 요청당 쿼리 수 예산(인증/세션 조회 포함). 응답 건수와 상관없이 일정해야 하며, 넘으면 경고 로그와 메트릭을 남깁니다.
+API_QUERY_BUDGETS = {
+    "cart": 10,
+    "checkout": 12,
+    "order_list": 8,
+    "order_detail": 6,
+}
+
+# 결제가 끝난 주문의 주문내역 화면 캐시 시간 (mall/order_cache.py). 상태가 바뀌면 바로 새 화면을 렌더링합니다.
+ORDER_DETAIL_CACHE_TIMEOUT = env.int("ORDER_DETAIL_CACHE_TIMEOUT", default=60 * 60 * 24)
+
+# 관리자 목록에서 정확히 셀 최대 건수. 이보다 많으면 예상 건수를 보여주고 keyset 이동을 합니다. (mall/changelist.py)
+ADMIN_COUNT_LIMIT = env.int("ADMIN_COUNT_LIMIT", default=10000)
+
+# 관리자 대량 작업 (mall/bulk_actions.py)
+# 청크 하나를 한 트랜잭션으로 처리합니다. 크면 빠르지만 행 잠금을 오래 잡습니다.
+BULK_ACTION_CHUNK_SIZE = env.int("BULK_ACTION_CHUNK_SIZE", default=1000)
+# 진행중인 작업이 이 시간 동안 진행이 없으면 실행하던 프로세스가 죽은 것으로 보고 run_bulk_actions가 이어서 처리합니다.
+BULK_ACTION_STALE_SECONDS = env.int("BULK_ACTION_STALE_SECONDS", default=300)
+
+# DB 기반 작업 큐 (mall/taskqueue.py, run_tasks 명령)
+TASK_MAX_ATTEMPTS = env.int("TASK_MAX_ATTEMPTS", default=5)
+# 재시도 간격(초). 실패할 때마다 두 배로 늘어나고 TASK_RETRY_MAX_DELAY를 넘지 않습니다.
+TASK_RETRY_BASE_DELAY = env.float("TASK_RETRY_BASE_DELAY", default=5)
+TASK_RETRY_MAX_DELAY = env.float("TASK_RETRY_MAX_DELAY", default=600)
+# 실행중인 작업이 이 시간(초)을 넘기면 워커가 죽은 것으로 보고 다시 대기 상태로 돌립니다.
+TASK_LOCK_TIMEOUT = env.int("TASK_LOCK_TIMEOUT", default=600)
+
+# 함께 많이 구매한 상품 추천 (mall/recommendations.py, build_recommendations 명령)
+# 상품별로 저장할 추천 수
+RECOMMENDATION_TOP_K = env.int("RECOMMENDATION_TOP_K", default=20)
+# 함께 구매한 주문 수가 이보다 적은 상품 쌍은 추천하지 않습니다.
+RECOMMENDATION_MIN_COUNT = env.int("RECOMMENDATION_MIN_COUNT", default=1)
+# 장바구니 화면에 보여줄 추천 수
+RECOMMENDATION_CART_LIMIT = env.int("RECOMMENDATION_CART_LIMIT", default=4)
+
+# 오래된 주문 보관 (mall/archive.py, archive_orders 명령)
+# 배송완료/취소 후 이 기간(일) 동안 변경이 없던 주문을 보관 테이블로 옮깁니다.
+ORDER_ARCHIVE_AFTER_DAYS = env.int("ORDER_ARCHIVE_AFTER_DAYS", default=365)
+# 주문목록 화면에 보여줄 최근 주문 수
+ORDER_LIST_LIMIT = env.int("ORDER_LIST_LIMIT", default=100)
+
+# 물류센터 배송 상태 일괄 반영 (mall/fulfillment.py, apply_fulfillment 명령, /mall/fulfillment/transitions/)
+# API 요청의 Authorization: Bearer <토큰> 과 비교합니다. 비어 있으면 API를 쓰지 않습니다.
+FULFILLMENT_API_TOKEN = env.str("FULFILLMENT_API_TOKEN", default="")
+FULFILLMENT_CHUNK_SIZE = env.int("FULFILLMENT_CHUNK_SIZE", default=1000)
+# API 응답에 담을 최대 거절 행 수 (거절 건수는 모두 셉니다)
+FULFILLMENT_MAX_REJECTIONS = env.int("FULFILLMENT_MAX_REJECTIONS", default=1000)
 
 
 # Password validation
@@ -135,6 +292,14 @@ AUTH_PASSWORD_VALIDATORS = [
 
 AUTH_USER_MODEL = "accounts.User"  # 이거 설정해야 내가 설정한 커스텀 유저모델로 마이그레이션됨 안하면 기본 USER로 설정됨
 
+# 요청마다 User를 DB에서 읽지 않고 캐시된 스냅샷을 사용합니다. (accounts/backends.py)
+# ModelBackend는 배포 전에 로그인한 세션(세션에 백엔드 경로가 저장됨)이 로그아웃되지 않도록 남겨둡니다.
+AUTHENTICATION_BACKENDS = [
+    "accounts.backends.CachedModelBackend",
+    "django.contrib.auth.backends.ModelBackend",
+]
+USER_CACHE_TIMEOUT = env.int("USER_CACHE_TIMEOUT", default=60 * 10)
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/3.2/topics/i18n/
@@ -156,6 +321,24 @@ STATICFILES_DIRS = [
     BASE_DIR / "static",
 ]
 
+# collectstatic 시 파일명에 내용 해시를 붙이고 .gz/.br 압축본을 미리 만듭니다. (mysite/storage.py)
+# 운영에서는 nginx가 STATIC_ROOT를 직접 서빙하는 것을 권장합니다.
+#   location /static/ {
+#       alias /srv/mysite/staticfiles/;
+#       gzip_static on; brotli_static on;
+#       add_header Cache-Control "public, max-age=31536000, immutable";
+#   }
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "mysite.storage.CompressedManifestStaticFilesStorage"},
+}
+# 이보다 작은 파일은 압축본을 만들지 않습니다. (bytes)
+STATIC_COMPRESS_MIN_SIZE = env.int("STATIC_COMPRESS_MIN_SIZE", default=512)
+# nginx 없이 운영할 때 장고가 STATIC_ROOT의 파일을 서빙합니다. (mysite.views.serve_static)
+STATIC_SERVE_FROM_APP = env.bool("STATIC_SERVE_FROM_APP", default=False)
+# 해시가 없는 파일명(원본 이름)으로 요청된 정적 파일의 캐시 시간 (초)
+STATIC_UNHASHED_MAX_AGE = env.int("STATIC_UNHASHED_MAX_AGE", default=60 * 10)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
@@ -163,6 +346,12 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 MEDIA_URL = "/media/"  # 항상 / 로 끝나도록 설정
 MEDIA_ROOT = env.str("MEDIA_ROOT", default=BASE_DIR / "media")
+# 미디어 파일 전송 방식 (mysite.views.serve_media)
+# nginx 내부 location 경로를 지정하면 X-Accel-Redirect로, MEDIA_SENDFILE이 참이면 X-Sendfile로 전송을 넘기고,
+# 둘 다 없으면 FileResponse(wsgi.file_wrapper/sendfile, Range 지원)로 응답합니다.
+MEDIA_ACCEL_REDIRECT_PREFIX = env.str("MEDIA_ACCEL_REDIRECT_PREFIX", default="")
+MEDIA_SENDFILE = env.bool("MEDIA_SENDFILE", default=False)
+MEDIA_MAX_AGE = env.int("MEDIA_MAX_AGE", default=60 * 60 * 24)
 
 
 STRIPE_SECRET_KEY = env.str(
@@ -187,5 +376,62 @@ PORTONE_PG_PROVIDER = env.str("PORTONE_PG_PROVIDER", default="")
 
 PORTONE_PG = PORTONE_PG_PROVIDER
 
+# 포트원 API 호출 타임아웃(초), 재시도, 서킷 브레이커 설정
+PORTONE_CONNECT_TIMEOUT = env.float("PORTONE_CONNECT_TIMEOUT", default=2.0)
+PORTONE_READ_TIMEOUT = env.float("PORTONE_READ_TIMEOUT", default=5.0)
+PORTONE_MAX_RETRIES = env.int("PORTONE_MAX_RETRIES", default=2)
+PORTONE_RETRY_BACKOFF_BASE = env.float("PORTONE_RETRY_BACKOFF_BASE", default=0.1)
+PORTONE_RETRY_BACKOFF_MAX = env.float("PORTONE_RETRY_BACKOFF_MAX", default=1.0)
+# 호출 1건당 재시도 토큰 0.2개 적립 → 재시도는 전체 호출의 20% 이내로 제한
+PORTONE_RETRY_BUDGET_RATIO = env.float("PORTONE_RETRY_BUDGET_RATIO", default=0.2)
+PORTONE_RETRY_BUDGET_MIN_TOKENS = env.float(
+    "PORTONE_RETRY_BUDGET_MIN_TOKENS", default=10.0
+)
+PORTONE_RETRY_BUDGET_MAX_TOKENS = env.float(
+    "PORTONE_RETRY_BUDGET_MAX_TOKENS", default=100.0
+)
+PORTONE_BREAKER_FAILURE_THRESHOLD = env.int(
+    "PORTONE_BREAKER_FAILURE_THRESHOLD", default=5
+)
+PORTONE_BREAKER_RESET_TIMEOUT = env.float("PORTONE_BREAKER_RESET_TIMEOUT", default=30.0)
+# 대량 결제취소 (python manage.py cancel_payments)
+PORTONE_CANCEL_WORKERS = env.int("PORTONE_CANCEL_WORKERS", default=4)
+PORTONE_CANCEL_RATE = env.float("PORTONE_CANCEL_RATE", default=10.0)  # 초당 호출 수
+PORTONE_CANCEL_MAX_RETRIES = env.int("PORTONE_CANCEL_MAX_RETRIES", default=3)
+
 LOGIN_URL = "accounts:login"
 LOGOUT_REDIRECT_URL = "accounts:login"
+
+# 주문/결제 이벤트 outbox 릴레이 (python manage.py relay_order_events)
+ORDER_EVENT_SINKS = {
+    "jsonl": {
+        "BACKEND": "mall.events.JsonlFileSink",
+        "OPTIONS": {
+            "path": env.str(
+                "ORDER_EVENT_JSONL_PATH",
+                default=str(BASE_DIR / "var" / "events" / "order_events.jsonl"),
+            ),
+        },
+    },
+}
+ORDER_EVENT_RELAY_BATCH_SIZE = env.int("ORDER_EVENT_RELAY_BATCH_SIZE", default=500)
+# 커밋이 늦은 트랜잭션의 이벤트를 건너뛰지 않도록, 생성 후 이 시간(초)이 지난 이벤트만 전달합니다.
+ORDER_EVENT_RELAY_LAG = env.float("ORDER_EVENT_RELAY_LAG", default=1.0)
+
+# 메트릭 (/metrics)
+# gunicorn 처럼 워커가 여러 개일 때는 METRICS_DIR를 지정해야 워커별 메트릭이 합산됩니다.
+METRICS_DIR = env.str("METRICS_DIR", default="")
+METRICS_FLUSH_INTERVAL = env.float("METRICS_FLUSH_INTERVAL", default=5.0)
+# 수집기의 Authorization: Bearer <토큰> 이 맞거나, 접속 IP(REMOTE_ADDR)가 허용 목록에 있으면 응답합니다.
+# 프록시 뒤에서는 REMOTE_ADDR가 프록시 주소이므로 토큰을 쓰세요. (운영 설정은 허용 IP가 비어 있습니다.)
+METRICS_TOKEN = env.str("METRICS_TOKEN", default="")
+METRICS_ALLOWED_IPS = env.list("METRICS_ALLOWED_IPS", default=["127.0.0.1"])
+
+# 샘플링 프로파일러 (mall/profiler.py)
+PROFILER_SAMPLE_RATE = env.float("PROFILER_SAMPLE_RATE", default=0.0)  # 0.01 = 1%
+PROFILER_RING_SIZE = env.int("PROFILER_RING_SIZE", default=200)
+PROFILER_LOG_PATH = env.str(
+    "PROFILER_LOG_PATH", default=str(BASE_DIR / "var" / "log" / "profiler.log")
+)
+PROFILER_LOG_MAX_BYTES = env.int("PROFILER_LOG_MAX_BYTES", default=10 * 1024 * 1024)
+PROFILER_LOG_BACKUP_COUNT = env.int("PROFILER_LOG_BACKUP_COUNT", default=5)
@@ -0,0 +1,32 @@
+"""
+운영 환경 설정
+
+기본 설정(mysite/settings.py)을 그대로 읽은 뒤, 워커 기동 시간과 메모리만 늘리는
+개발용 앱과 미들웨어를 제외합니다.
+
+    DJANGO_SETTINGS_MODULE=mysite.settings_production gunicorn mysite.wsgi
+
+기동 시간/메모리는 bench_startup 명령으로 확인합니다.
+
+    python manage.py bench_startup --settings=mysite.settings_production
+"""
+
+from .settings import *  # noqa: F401,F403
+
+DEBUG = False
+
+# 운영에서 쓰지 않는 앱
+# - debug_toolbar : 개발용 (DEBUG=True 로 기본 설정을 읽었더라도 제외)
+# - mall_test : 포트원 연동 연습용 앱 (URL도 등록하지 않습니다. mysite/urls.py 참고)
+DEV_ONLY_APPS = ["debug_toolbar", "mall_test"]
+
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in DEV_ONLY_APPS]
+
+MIDDLEWARE = [
+    middleware
+    for middleware in MIDDLEWARE
+    if not middleware.startswith("debug_toolbar.")
+]
+
+# 운영은 프록시 뒤에서 실행되어 모든 요청의 REMOTE_ADDR가 프록시 주소이므로, /metrics는 METRICS_TOKEN으로만 엽니다.
+METRICS_ALLOWED_IPS = env.list("METRICS_ALLOWED_IPS", default=[])
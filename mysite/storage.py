@@ -0,0 +1,78 @@
+import gzip
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:  # brotli 패키지가 없으면 .gz 파일만 만듭니다.
+    brotli = None
+
+# collectstatic 단계에서 파일명에 내용 해시를 붙이고(style.3f2a9c.css),
+# 압축 효과가 있는 파일은 .gz/.br 파일을 미리 만들어둡니다.
+# 해시가 붙은 파일은 내용이 바뀌면 이름도 바뀌므로 브라우저가 1년 동안 재검증 없이 캐시할 수 있고,
+# nginx(gzip_static/brotli_static)나 mysite.views.serve_static 은 요청마다 압축하지 않고 미리 만든 파일을 보냅니다.
+
+COMPRESSIBLE_EXTENSIONS = {
+    ".css",
+    ".js",
+    ".mjs",
+    ".map",
+    ".json",
+    ".svg",
+    ".html",
+    ".txt",
+    ".xml",
+    ".ico",
+    ".ttf",
+    ".otf",
+    ".eot",
+}
+
+
+def compress_file(path: Path) -> None:
+    data = path.read_bytes()
+    variants = [(".gz", lambda raw: gzip.compress(raw, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append((".br", lambda raw: brotli.compress(raw, quality=11)))
+    for suffix, compress in variants:
+        compressed = compress(data)
+        # 압축해도 크기가 거의 줄지 않으면 압축 해제 비용만 들기 때문에 만들지 않습니다.
+        if len(compressed) >= len(data) * 0.95:
+            continue
+        path.with_name(path.name + suffix).write_bytes(compressed)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def url_converter(self, name, hashed_files, template=None):
+        converter = super().url_converter(name, hashed_files, template)
+
+        def safe_converter(matchobj):
+            # 서드파티 CSS/JS(jqwidgets 데모 등)가 없는 파일을 참조하면 collectstatic 전체가 중단되므로,
+            # 그런 참조는 해시 없이 원래 경로를 그대로 둡니다.
+            try:
+                return converter(matchobj)
+            except ValueError:
+                return matchobj.group(0)
+
+        return safe_converter
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed_names = {}
+        for name, hashed_name, processed in super().post_process(
+            paths, dry_run=dry_run, **options
+        ):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed_names[name] = hashed_name
+            yield name, hashed_name, processed
+
+        if dry_run:
+            return
+        for hashed_name in hashed_names.values():
+            path = Path(self.path(hashed_name))
+            if path.suffix.lower() not in COMPRESSIBLE_EXTENSIONS:
+                continue
+            if path.stat().st_size < settings.STATIC_COMPRESS_MIN_SIZE:
+                continue
+            compress_file(path)
@@ -0,0 +1,112 @@
+import time
+
+from django.db import router, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from mall.models import CartProduct, Order, Product
+from mysite import db_router
+from mysite.db_router import (
+    PRIMARY,
+    STICKY_COOKIE_NAME,
+    ReplicaStickinessMiddleware,
+    pin_to_primary,
+    routing_state,
+)
+
+# 읽기 복제본 라우팅 (mysite/db_router.py)
+# 라우터는 별칭만 고르고 연결은 열지 않으므로, 복제본 별칭(replica1)은 설정에만 두고 쿼리 없이 검사합니다.
+# 실제 복제 지연 재현은 sqlite 파일 2개와 sync_sqlite_replicas 명령으로 합니다.
+
+
+@override_settings(DATABASE_REPLICAS=["replica1"])
+class PrimaryReplicaRouterTests(SimpleTestCase):
+    def test_reads_go_to_replica(self):
+        self.assertEqual(Product.objects.all().db, "replica1")
+        self.assertEqual(router.db_for_read(Order), "replica1")
+
+    def test_models_not_listed_read_from_primary(self):
+        self.assertEqual(router.db_for_read(CartProduct), PRIMARY)
+
+    def test_writes_go_to_primary(self):
+        self.assertEqual(router.db_for_write(Product), PRIMARY)
+        self.assertFalse(router.allow_migrate("replica1", "mall"))
+        self.assertTrue(router.allow_migrate(PRIMARY, "mall"))
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas(self):
+        self.assertEqual(router.db_for_read(Product), PRIMARY)
+
+    def test_read_after_write_in_same_request(self):
+        token = routing_state.set(db_router.RoutingState(use_primary=False))
+        try:
+            self.assertEqual(router.db_for_read(Product), "replica1")
+            router.db_for_write(Order)
+            self.assertEqual(router.db_for_read(Product), PRIMARY)
+        finally:
+            routing_state.reset(token)
+        self.assertEqual(router.db_for_read(Product), "replica1")
+
+    def test_pin_to_primary(self):
+        token = pin_to_primary()
+        try:
+            self.assertEqual(router.db_for_read(Product), PRIMARY)
+        finally:
+            routing_state.reset(token)
+
+
+@override_settings(DATABASE_REPLICAS=["replica1"])
+class PrimaryReplicaAtomicTests(SimpleTestCase):
+    databases = {"default"}
+
+    def test_reads_inside_transaction_go_to_primary(self):
+        with transaction.atomic():
+            self.assertEqual(router.db_for_read(Product), PRIMARY)
+
+
+@override_settings(DATABASE_REPLICAS=["replica1"], DATABASE_REPLICA_STICKY_SECONDS=5)
+class ReplicaStickinessMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.read_db = None
+
+    def read_view(self, request):
+        self.read_db = router.db_for_read(Product)
+        return HttpResponse("ok")
+
+    def write_view(self, request):
+        router.db_for_write(Order)
+        return self.read_view(request)
+
+    def request(self, view, method="get", cookies=None):
+        request = getattr(RequestFactory(), method)("/")
+        request.COOKIES.update(cookies or {})
+        return ReplicaStickinessMiddleware(view)(request)
+
+    def test_get_reads_from_replica(self):
+        response = self.request(self.read_view)
+        self.assertEqual(self.read_db, "replica1")
+        self.assertNotIn(STICKY_COOKIE_NAME, response.cookies)
+
+    def test_post_reads_from_primary(self):
+        self.request(self.read_view, method="post")
+        self.assertEqual(self.read_db, PRIMARY)
+
+    def test_write_sets_sticky_cookie(self):
+        response = self.request(self.write_view, method="post")
+        self.assertEqual(self.read_db, PRIMARY)
+        cookie = response.cookies[STICKY_COOKIE_NAME]
+        self.assertEqual(cookie["max-age"], 5)
+        self.assertGreater(float(cookie.value), time.time())
+
+        # 쓰기 직후 리다이렉트된 GET 요청도 primary에서 읽습니다.
+        self.request(self.read_view, cookies={STICKY_COOKIE_NAME: cookie.value})
+        self.assertEqual(self.read_db, PRIMARY)
+
+    def test_expired_or_invalid_cookie_reads_from_replica(self):
+        for value in (str(time.time() - 1), "invalid"):
+            self.request(self.read_view, cookies={STICKY_COOKIE_NAME: value})
+            self.assertEqual(self.read_db, "replica1")
+
+    def test_state_is_reset_after_request(self):
+        self.request(self.write_view, method="post")
+        self.assertIsNone(routing_state.get())
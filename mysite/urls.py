@@ -1,20 +1,45 @@
+from django.apps import apps
+from django.conf import settings
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
 from django.views.generic import TemplateView
 
-from . import settings
-from django.conf.urls.static import static
 from django.shortcuts import render
 
+from mall.page_cache import cache_anonymous_page
+from mall.views import metrics_view
+from mysite.views import serve_catalog_file, serve_media, serve_static
+
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("accounts/", include("accounts.urls")),
-    path("mall_test/", include("mall_test.urls")),
     path("mall/", include("mall.urls")),
-    path("", TemplateView.as_view(template_name="root.html"), name="root"),
+    path("metrics", metrics_view, name="metrics"),
+    # 사이트맵/상품 피드 (build_catalog_feeds 명령이 만든 파일)
+    re_path(
+        r"^(?P<path>sitemap(?:-\d+)?\.xml(?:\.gz)?|feeds/products\.tsv\.gz)$",
+        serve_catalog_file,
+        name="catalog_file",
+    ),
+    path(
+        "",
+        cache_anonymous_page("root")(TemplateView.as_view(template_name="root.html")),
+        name="root",
+    ),
 ]
 
+# 운영 설정(mysite/settings_production.py)에서는 연습용 앱을 설치하지 않습니다.
+if apps.is_installed("mall_test"):
+    urlpatterns += [path("mall_test/", include("mall_test.urls"))]
 if settings.DEBUG:  # 디버그 모드일 때만
     urlpatterns += [path("__debug__/", include("debug_toolbar.urls"))]
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+
+# 개발 서버(runserver)는 staticfiles 앱이 정적 파일을 서빙합니다.
+if settings.STATIC_SERVE_FROM_APP and not settings.DEBUG:
+    urlpatterns += [
+        re_path(rf"^{settings.STATIC_URL.lstrip('/')}(?P<path>.+)$", serve_static)
+    ]
+urlpatterns += [
+    re_path(rf"^{settings.MEDIA_URL.lstrip('/')}(?P<path>.+)$", serve_media),
+]
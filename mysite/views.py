@@ -0,0 +1,203 @@
+import mimetypes
+import os
+import re
+from functools import lru_cache
+from pathlib import Path
+from urllib.parse import quote
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from django.views.static import was_modified_since
+
+# 정적/미디어 파일 전송
+# 파일 바이트를 파이썬 워커가 직접 복사하지 않도록 다음 순서로 처리합니다.
+# 1. MEDIA_ACCEL_REDIRECT_PREFIX 지정 시 : nginx에 X-Accel-Redirect 헤더로 전송을 넘깁니다.
+# 2. MEDIA_SENDFILE 지정 시 : apache(mod_xsendfile) 등에 X-Sendfile 헤더로 넘깁니다.
+# 3. 그 외 : FileResponse로 응답하면 WSGI 서버의 wsgi.file_wrapper(gunicorn은 sendfile)로 전송됩니다.
+#    Range 요청은 파일 위치를 옮기고 Content-Length를 범위 길이로 지정해서 같은 경로로 보냅니다.
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Accept-Encoding 에 따라 고를 미리 압축된 파일 (선호 순)
+PRECOMPRESSED_VARIANTS = [("br", ".br"), ("gzip", ".gz")]
+
+
+@lru_cache(maxsize=1)
+def hashed_static_names() -> frozenset:
+    # collectstatic이 만든 manifest(staticfiles.json)의 해시 파일명 목록
+    return frozenset(getattr(staticfiles_storage, "hashed_files", {}).values())
+
+
+class RangeFile:
+    # FileResponse가 끝까지 읽지 않도록 요청 범위까지만 read 하는 래퍼
+    # fileno()를 그대로 노출하므로 sendfile 경로에서도 같은 파일 위치부터 Content-Length 만큼 전송됩니다.
+    def __init__(self, f, start: int, length: int):
+        self.f = f
+        self.remaining = length
+        self.name = f.name
+        f.seek(start)
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b""
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.f.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.f.fileno()
+
+    def close(self):
+        self.f.close()
+
+
+def parse_range(header: str, size: int):
+    # 단일 범위만 지원합니다. 해석할 수 없으면 None을 반환해서 전체 파일을 보냅니다.
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first == "":  # bytes=-500 : 마지막 500바이트
+        start = max(0, size - int(last))
+        end = size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start > end or start >= size:
+        raise ValueError("unsatisfiable range")
+    return start, end
+
+
+def file_response(
+    request,
+    full_path: Path,
+    cache_control: str,
+    content_type: str,
+    content_encoding: str = "",
+):
+    stat = full_path.stat()
+    if not was_modified_since(
+        request.META.get("HTTP_IF_MODIFIED_SINCE"), stat.st_mtime
+    ):
+        response = HttpResponseNotModified()
+        response["Cache-Control"] = cache_control
+        return response
+
+    byte_range = None
+    range_header = request.META.get("HTTP_RANGE")
+    # 압축본은 원본과 바이트 위치가 다르므로 Range를 적용하지 않습니다.
+    if range_header and not content_encoding:
+        try:
+            byte_range = parse_range(range_header, stat.st_size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{stat.st_size}"
+            return response
+
+    f = full_path.open("rb")
+    if byte_range:
+        start, end = byte_range
+        response = FileResponse(
+            RangeFile(f, start, end - start + 1), content_type=content_type
+        )
+        response.status_code = 206
+        response["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+        response["Content-Length"] = end - start + 1
+    else:
+        response = FileResponse(f, content_type=content_type)
+        response["Content-Length"] = stat.st_size
+    if content_encoding:
+        response["Content-Encoding"] = content_encoding
+    response["Accept-Ranges"] = "bytes"
+    response["Last-Modified"] = http_date(stat.st_mtime)
+    response["Cache-Control"] = cache_control
+    return response
+
+
+@require_safe
+def serve_static(request, path):
+    # nginx 없이 gunicorn만으로 운영할 때 사용합니다. (STATIC_SERVE_FROM_APP)
+    # 해시가 붙은 파일명은 내용이 바뀌지 않으므로 immutable로 응답합니다.
+    try:
+        full_path = Path(safe_join(settings.STATIC_ROOT, path))
+    except ValueError:
+        raise Http404
+    if not full_path.is_file():
+        raise Http404
+
+    cache_control = (
+        IMMUTABLE_CACHE_CONTROL
+        if path in hashed_static_names()
+        else f"public, max-age={settings.STATIC_UNHASHED_MAX_AGE}"
+    )
+    content_type = mimetypes.guess_type(full_path.name)[0] or "application/octet-stream"
+
+    accept_encoding = request.META.get("HTTP_ACCEPT_ENCODING", "")
+    content_encoding = ""
+    for encoding, suffix in PRECOMPRESSED_VARIANTS:
+        compressed_path = full_path.with_name(full_path.name + suffix)
+        if encoding in accept_encoding and compressed_path.is_file():
+            full_path = compressed_path
+            content_encoding = encoding
+            break
+
+    response = file_response(
+        request, full_path, cache_control, content_type, content_encoding
+    )
+    patch_vary_headers(response, ["Accept-Encoding"])
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    try:
+        full_path = Path(safe_join(settings.MEDIA_ROOT, path))
+    except ValueError:
+        raise Http404
+    if not full_path.is_file():
+        raise Http404
+
+    cache_control = f"public, max-age={settings.MEDIA_MAX_AGE}"
+    content_type = mimetypes.guess_type(full_path.name)[0] or "application/octet-stream"
+
+    if settings.MEDIA_ACCEL_REDIRECT_PREFIX:
+        # nginx 설정 예)
+        # location /protected-media/ { internal; alias /srv/mysite/media/; }
+        response = HttpResponse(content_type=content_type)
+        response["X-Accel-Redirect"] = settings.MEDIA_ACCEL_REDIRECT_PREFIX + quote(
+            path
+        )
+        response["Cache-Control"] = cache_control
+        return response
+    if settings.MEDIA_SENDFILE:
+        response = HttpResponse(content_type=content_type)
+        response["X-Sendfile"] = os.fspath(full_path)
+        response["Cache-Control"] = cache_control
+        return response
+    return file_response(request, full_path, cache_control, content_type)
+
+
+@require_safe
+def serve_catalog_file(request, path):
+    # 사이트맵은 파일이 있는 경로 아래의 주소만 담을 수 있으므로 사이트 루트(/sitemap.xml)에서 서빙합니다.
+    # (mall/catalog_feed.py, 주소 패턴은 mysite/urls.py)
+    try:
+        full_path = Path(safe_join(settings.CATALOG_FEED_ROOT, path))
+    except ValueError:
+        raise Http404
+    if not full_path.is_file():
+        raise Http404
+
+    # .xml.gz 사이트맵과 피드는 gzip 파일 그대로 내려받는 것이므로 Content-Encoding을 붙이지 않습니다.
+    content_type = "application/gzip" if path.endswith(".gz") else "application/xml"
+    cache_control = f"public, max-age={settings.CATALOG_FEED_MAX_AGE}"
+    return file_response(request, full_path, cache_control, content_type)
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mysite.settings')
 
 application = get_wsgi_application()
+
+# 검색어 자동완성 색인은 워커가 요청을 받기 전에 미리 만듭니다. (mall/autocomplete.py)
+from mall import autocomplete  # noqa: E402
+
+autocomplete.warm_up()